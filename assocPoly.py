@@ -0,0 +1,136 @@
+##################################################################
+#
+# Associative polynomials and their Lie parts (Dynkin-Specht-Wever)
+#  © 2024 Benjamin Walter <benjamin.walter@uvi.edu>
+#
+# Included functions:
+#   dynkin( polynomial )
+#   lie_projection( polynomial )
+#   is_lie( polynomial )
+#   homogeneous_parts( polynomial )
+#
+# Polynomials are dictionaries { word : coefficient }, as made by lie_expansion() and LiePolynomial.expand()
+#
+# See docstrings for more information on use
+#
+##################################################################
+
+from fractions import Fraction
+
+from liePoly import LiePolynomial, _bracket
+
+
+#######################################################################
+#######################################################################
+# The Dynkin map θ sends a word x1 x2 ... xn to the left-normed bracket [[...[x1,x2],...],xn].
+# By the Dynkin-Specht-Wever theorem a homogeneous polynomial p of degree n is a Lie element exactly when
+# θ(p) = n p, and p -> θ(p)/n is a projection onto Lie elements.
+#
+# Brackets are computed in the Lyndon basis (LiePolynomial, whose brackets of basis elements are memoized).
+# Since θ(ux) = [θ(u), x], grouping the words of p by their last letter x gives
+#     θ(p) = sum over x of [θ(p_x), x]        (p_x holds the words of p ending in x, with x removed)
+# so all words sharing a prefix share the brackets of that prefix, and each group costs one bracket.
+#######################################################################
+
+def _theta(polynomial):
+    """Dynkin map of a polynomial as a dictionary { Lyndon word : coefficient }"""
+    result , groups = dict(), dict()
+
+    for w, c in polynomial.items():
+        if len(w) == 1:
+            result[w] = result.get(w, 0) + c
+        elif len(w) > 1:
+            group = groups.setdefault(w[-1], dict())
+            group[w[:-1]] = group.get(w[:-1], 0) + c
+
+    for x, group in groups.items():                  # [θ(p_x), x]  on dictionaries (no LiePolynomials in between)
+        for u, c in _theta(group).items():
+            for w, k in _bracket(u, x).items():
+                result[w] = result.get(w, 0) + c * k
+
+    return {w : c for w, c in result.items() if c != 0}
+
+
+
+def _polynomial(polynomial):
+    """Read a word as a polynomial, and drop zero terms"""
+    if isinstance(polynomial, str):
+        return {polynomial : 1}
+    if isinstance(polynomial, LiePolynomial):
+        return polynomial.expand()
+    return {w : c for w, c in polynomial.items() if c != 0}
+
+
+
+def homogeneous_parts(polynomial):
+    """Split a polynomial by degree:  { degree : polynomial }"""
+    parts = dict()
+    for w, c in _polynomial(polynomial).items():
+        parts.setdefault(len(w), dict())[w] = c
+    return parts
+
+
+
+def dynkin(polynomial):
+    """Dynkin map θ: the sum of left-normed brackets of the words of a polynomial
+
+       Arguments:
+       ----------
+        polynomial : dictionary { word : coefficient } or string
+
+       Result:
+       -------
+        LiePolynomial (in the Lyndon basis)
+    """
+    return LiePolynomial(_theta(_polynomial(polynomial)))
+
+
+
+def lie_projection(polynomial):
+    """Dynkin-Specht-Wever projection onto Lie elements:  θ(p_n)/n on each homogeneous part p_n
+       (the constant term is dropped)
+
+       Arguments:
+       ----------
+        polynomial : dictionary { word : coefficient } or string
+
+       Result:
+       -------
+        LiePolynomial (in the Lyndon basis -- use .left() for the left-greedy basis)
+    """
+    result = dict()
+    for w, c in dynkin(polynomial).terms.items():
+        c = Fraction(c, len(w))
+        result[w] = int(c) if c.denominator == 1 else c
+
+    return LiePolynomial(result)
+
+
+
+def is_lie(polynomial):
+    """Test whether an associative polynomial is a Lie element (it agrees with its Dynkin-Specht-Wever projection)
+       Lie elements of degree at least 2 vanish when letters commute, so that is checked first.  Then homogeneous
+       parts are compared with their projections starting from the lowest degree.
+    """
+    polynomial = _polynomial(polynomial)
+
+    if "" in polynomial:
+        return False
+
+    abelian = dict()                                    # coefficients summed over each grading
+    for w, c in polynomial.items():
+        if len(w) > 1:
+            grading = ''.join(sorted(w))
+            abelian[grading] = abelian.get(grading, 0) + c
+    if any(abelian.values()):
+        return False
+
+    parts = homogeneous_parts(polynomial)
+    for n in sorted(parts):
+        if lie_projection(parts[n]).expand() != parts[n]:
+            return False
+
+    return True
+
+#######################################################################
+#######################################################################
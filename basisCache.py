@@ -0,0 +1,391 @@
+##################################################################
+#
+# Caching Lie and coLie bases across gradings related by renaming letters
+#  © 2024 Benjamin Walter <benjamin.walter@uvi.edu>
+#
+# Included classes:
+#   GradingBasis( grading, order, words, left, star, lyndon, diagonal )
+#   BasisCache( store )
+#   LRUCache( budget )
+#
+# Included functions:
+#   grading_basis( grading, kind )
+#
+# See docstrings for more information on use
+#
+##################################################################
+
+import sys            # sizes of cached objects are measured with sys.getsizeof()
+import string         # canonical gradings use the letters a, b, c, ...
+import collections    # LRU order is kept by an OrderedDict
+from fractions import Fraction
+
+from coLie import LieTree, EilTree
+from lieBasis import genLS, bracketStd, leftStar
+
+
+#######################################################################
+#######################################################################
+# Gradings such as "aaabbc", "abbbcc" and "aabccc" differ by renaming letters, and so do their Lie spaces.
+# Bases built from Lyndon words depend on the order of letters, so renaming letters carries the bases of
+# "aaabbc" to the bases of "abbbcc" built using the letter order b < c < a.  Such bases (and the pairings
+# between them) are computed once for each partition of multiplicities, using letters ordered by decreasing
+# multiplicity, and relabeled for other gradings.
+#
+# The bases of a grading using the usual order of letters (as made by lieBasis) only depend on the order
+# pattern of multiplicities (the composition), so they are computed once for each composition and shared
+# between gradings -- taken from the partition bases when the letters are already in decreasing multiplicity.
+# They are related to the relabeled bases by a transition matrix, which is only made when asked for.
+#######################################################################
+
+class GradingBasis():
+    """GradingBasis holds the Lyndon words, Lie brackets and dual coLie symbols of one grading
+
+    Parameters
+    ----------
+    grading  : string
+         Letters with multiplicities
+    order    : string
+         Letters in the order used for Lyndon words
+    words    : list of strings
+         Lyndon words (in the order of genLS)
+    left     : list of strings
+         Left-greedy brackets of the words
+    star     : list of strings
+         Star symbols of the words (dual to the left-greedy brackets)
+    lyndon   : list of strings
+         Standard brackets of the words
+    diagonal : list of integers
+         Pairings of star symbols with their left-greedy brackets
+
+    Example
+    -------
+    basis = BasisCache().basis("abbbcc")
+    basis.coordinates("[[b,c],[b,[a,[b,c]]]]")
+    """
+
+    def __init__(self, grading, order, words, left, star, lyndon, diagonal):
+        self.grading  = ''.join(sorted(grading))
+        self.order    = order
+        self.words    = words
+        self.left     = left
+        self.star     = star
+        self.lyndon   = lyndon
+        self.diagonal = diagonal
+
+
+    @classmethod
+    def compute(cls, grading):
+        """Compute bases of a grading using the usual order of letters"""
+        words = list(genLS(grading))
+        pairs = [leftStar(word) for word in words]        # (left bracket, star symbol, diagonal pairing)
+
+        return cls(grading, ''.join(sorted(set(grading))), words, [str(bracket) for bracket, _, _ in pairs],
+                   [str(symbol) for _, symbol, _ in pairs], [str(bracketStd(word)) for word in words],
+                   [diagonal for _, _, diagonal in pairs])
+
+
+    def relabel(self, table):
+        """Rename letters using a dictionary {old letter : new letter}"""
+        table = str.maketrans(table)
+
+        return GradingBasis(self.grading.translate(table), self.order.translate(table),
+                            [word.translate(table) for word in self.words],
+                            [bracket.translate(table) for bracket in self.left],
+                            [symbol.translate(table) for symbol in self.star],
+                            [bracket.translate(table) for bracket in self.lyndon],
+                            list(self.diagonal))
+
+
+    def coordinates(self, bracket, short=False):
+        """Write a Lie bracket of this grading in the left-greedy basis (pairing with star symbols)"""
+        if not isinstance(bracket, LieTree):
+            bracket = LieTree(bracket)
+
+        result = dict()
+        for symbol, left, diagonal in zip(self.star, self.left, self.diagonal):
+            coeff = Fraction(EilTree(symbol) * bracket, diagonal)
+            if coeff != 0:
+                result[LieTree(left).short if short else left] = int(coeff) if coeff.denominator == 1 else coeff
+
+        return result
+
+
+    def __len__(self):
+        return len(self.words)
+
+
+    def __repr__(self):
+        return f'GradingBasis({self.grading}) with letter order {self.order}'
+
+
+
+class BasisCache():
+    """BasisCache serves bases of gradings, computing them once for each partition of multiplicities
+
+    Parameters
+    ----------
+    store : LRUCache   (default: a new LRUCache)
+         Where computed bases and transition matrices are kept
+
+    Example
+    -------
+    cache = BasisCache()
+    cache.basis("abbbcc")        # bases using the letter order b < c < a  (relabeled from "aaabbc")
+    cache.standard("abbbcc")     # bases using the usual letter order a < b < c
+    cache.transition("abbbcc")   # matrix from the first left-greedy basis to the second
+
+    Attributes
+    ----------
+    store    : LRUCache
+         Bases of canonical gradings keyed by ("partition", multiplicities), standard bases keyed by
+         ("composition", multiplicities), and transition matrices (made only when asked for) keyed by
+         ("transition", multiplicities)
+    computed : integer
+         Number of gradings whose bases were computed (rather than relabeled)
+    """
+
+    def __init__(self, store=None):
+        self.store    = LRUCache() if store is None else store
+        self.computed = 0
+
+
+    @staticmethod
+    def __ranking(grading):
+        """ranking is used internally to order letters by decreasing multiplicity (then alphabetically)"""
+        letters = sorted(set(grading))
+        return sorted(letters, key=lambda letter: -grading.count(letter))
+
+
+    def __compute(self, grading):
+        """compute is used internally to compute (rather than relabel) bases of a grading"""
+        self.computed += 1
+        return GradingBasis.compute(grading)
+
+
+    def basis(self, grading):
+        """Bases of a grading, with Lyndon words for the letter order of decreasing multiplicity"""
+        ranking   = BasisCache.__ranking(grading)
+        partition = tuple([grading.count(letter) for letter in ranking])
+        canonical = ''.join([string.ascii_letters[n] * count for n, count in enumerate(partition)])
+
+        basis = self.store.get(("partition", partition), lambda: self.__compute(canonical))
+
+        return basis.relabel({string.ascii_letters[n] : letter for n, letter in enumerate(ranking)})
+
+
+    def standard(self, grading):
+        """Bases of a grading using the usual order of letters (the same as lieBasis makes)"""
+        letters , composition , canonical = BasisCache.__composition(grading)
+
+        def compute():
+            ranking = BasisCache.__ranking(canonical)
+            if ranking == sorted(ranking):                               # letters already in usual order
+                partition = tuple([canonical.count(letter) for letter in ranking])
+                return self.store.get(("partition", partition), lambda: self.__compute(canonical))
+            return self.__compute(canonical)
+
+        standard = self.store.get(("composition", composition), compute)
+
+        return standard.relabel({string.ascii_letters[n] : letter for n, letter in enumerate(letters)})
+
+
+    def transition(self, grading):
+        """Matrix whose columns are the left-greedy brackets of basis(grading) written in the left-greedy basis of standard(grading)"""
+        _ , composition , canonical = BasisCache.__composition(grading)
+
+        def compute():
+            basis , standard = self.basis(canonical), self.standard(canonical)
+            matrix = [[Fraction(EilTree(symbol) * LieTree(bracket), diagonal) for bracket in basis.left]
+                      for symbol, diagonal in zip(standard.star, standard.diagonal)]
+            return [[int(c) if c.denominator == 1 else c for c in row] for row in matrix]
+
+        return self.store.get(("transition", composition), compute)
+
+
+    @staticmethod
+    def __composition(grading):
+        """composition is used internally to find the letters, multiplicities and canonical grading of a grading"""
+        letters     = sorted(set(grading))
+        composition = tuple([grading.count(letter) for letter in letters])
+        canonical   = ''.join([string.ascii_letters[n] * count for n, count in enumerate(composition)])
+        return letters, composition, canonical
+
+
+    def __repr__(self):
+        return f'BasisCache in {self.store}'
+
+
+
+class LRUCache():
+    """LRUCache keeps computed values within a memory budget, evicting the least recently used values first
+
+    Parameters
+    ----------
+    budget : integer   (default: 256 MiB)
+         Largest total size in bytes of cached values (the newest value is kept even if it is larger)
+
+    Example
+    -------
+    cache = LRUCache(1 << 20)
+    cache.get(("aabc", "left"), lambda: GradingBasis.compute("aabc"))
+    cache.stats()
+
+    Attributes
+    ----------
+    budget    : integer
+         Memory budget in bytes
+    size      : integer
+         Current total size in bytes of cached values (measured with sys.getsizeof)
+    hits , misses , evictions : integers
+         Counts of lookups finding a value, lookups computing a value, and values evicted
+    """
+
+    def __init__(self, budget=1 << 28):
+        self.budget  = budget
+        self.size    = 0
+        self.hits , self.misses , self.evictions = 0, 0, 0
+        self.__entries = collections.OrderedDict()      # key -> (value, size), oldest first
+
+
+    def get(self, key, compute):
+        """Cached value for key, calling compute() to make it if it is missing"""
+        if key in self.__entries:
+            self.hits += 1
+            self.__entries.move_to_end(key)
+            return self.__entries[key][0]
+
+        self.misses += 1
+        value = compute()
+        self.put(key, value)
+
+        return value
+
+
+    def put(self, key, value):
+        """Cache a value (evicting old values if the budget is exceeded)"""
+        if key in self.__entries:
+            self.size -= self.__entries.pop(key)[1]
+
+        size = _sizeof(value)
+        self.__entries[key] = (value, size)
+        self.size += size
+
+        self.__evict()
+
+
+    def resize(self, budget):
+        """Change the memory budget"""
+        self.budget = budget
+        self.__evict()
+
+
+    def __evict(self):
+        """evict is used internally to remove least recently used values until the cache fits its budget"""
+        while self.size > self.budget and len(self.__entries) > 1:
+            _ , (_ , size) = self.__entries.popitem(last=False)
+            self.size -= size
+            self.evictions += 1
+
+
+    def clear(self):
+        self.__entries.clear()
+        self.size = 0
+
+
+    def stats(self):
+        """Dictionary of cache statistics"""
+        lookups = self.hits + self.misses
+        return { "entries"   : len(self.__entries),
+                 "bytes"     : self.size,
+                 "budget"    : self.budget,
+                 "hits"      : self.hits,
+                 "misses"    : self.misses,
+                 "evictions" : self.evictions,
+                 "hit rate"  : self.hits / lookups if lookups else 0.0 }
+
+
+    def __contains__(self, key):
+        return key in self.__entries
+
+
+    def __len__(self):
+        return len(self.__entries)
+
+
+    def __repr__(self):
+        return f'LRUCache with {len(self.__entries)} entries using {self.size} of {self.budget} bytes'
+
+
+
+def _sizeof(value, seen=None):
+    """Approximate memory used by a value and everything it holds"""
+    if seen is None:
+        seen = set()
+    if id(value) in seen:
+        return 0
+    seen.add(id(value))
+
+    size = sys.getsizeof(value)
+
+    if isinstance(value, dict):
+        size += sum([_sizeof(k, seen) + _sizeof(v, seen) for k, v in value.items()])
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        size += sum([_sizeof(item, seen) for item in value])
+    elif hasattr(value, "__dict__"):
+        size += _sizeof(vars(value), seen)
+
+    return size
+
+
+
+#######################################################################
+#######################################################################
+# The cache used by the basis modules
+#
+# bracket_to_left, LiePolynomial.left, word_to_lie, lcs_depth and symbolBasis read their bases from here.
+# Bases of kind "left" are the standard bases of BasisCache (built once for each composition of multiplicities),
+# so no relabeled basis or transition matrix is made for them.
+#######################################################################
+
+store     = LRUCache()
+symmetric = BasisCache(store)
+
+
+def grading_basis(grading, kind="left"):
+    """Cached bases of a grading
+
+       Arguments:
+       ----------
+        grading : string
+           Letters with multiplicities
+        kind    : string  ["left"]
+           "left"      -- GradingBasis using the usual order of letters (as made by lieBasis)
+           "relabeled" -- GradingBasis using the letter order of decreasing multiplicity
+           "lyndon"    -- matrix whose columns are the standard brackets written in the left-greedy basis
+
+       Result:
+       -------
+        GradingBasis or matrix (list of rows)
+    """
+    grading = ''.join(sorted(grading))
+
+    if kind == "left":
+        return store.get((grading, kind), lambda: symmetric.standard(grading))
+
+    if kind == "relabeled":
+        return store.get((grading, kind), lambda: symmetric.basis(grading))
+
+    if kind == "lyndon":
+        def compute():
+            basis  = grading_basis(grading)
+            matrix = [[Fraction(EilTree(symbol) * LieTree(bracket), diagonal) for bracket in basis.lyndon]
+                      for symbol, diagonal in zip(basis.star, basis.diagonal)]
+            return [[int(c) if c.denominator == 1 else c for c in row] for row in matrix]
+
+        return store.get((grading, kind), compute)
+
+    raise ValueError(f'Unknown kind of basis {kind}')
+
+#######################################################################
+#######################################################################
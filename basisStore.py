@@ -0,0 +1,462 @@
+##################################################################
+#
+# Binary files of precomputed bases, read through memory maps
+#  © 2024 Benjamin Walter <benjamin.walter@uvi.edu>
+#
+# Included classes:
+#   GradingFile( path )
+#   CSRMatrix( indptr, indices, data )
+#   BasisStore( directory )
+#
+# Included functions:
+#   write_grading( path, grading )
+#   encode_grading( grading )
+#   read_stream( path )
+#
+# See docstrings for more information on use
+#
+##################################################################
+
+import os      # store index and grading files live in one directory
+import re      # used for reading letters out of brackets
+import json    # file headers and the store index are json
+import mmap    # grading files are shared between processes through memory maps
+import struct  # file headers start with a magic string and a length
+from array import array
+
+from coLie import LieTree, EilTree
+from basisCache import grading_basis
+
+
+#######################################################################
+#######################################################################
+# File format  (one file for each grading)
+#
+#   magic      8 bytes   b"coLieBS1"
+#   length     8 bytes   little-endian length of the json header
+#   header     json      grading, alphabet, count and length of words, and an index of sections
+#                        { name : [offset, typecode, number of items] }   (offsets from the end of the header)
+#   sections   arrays, each starting at a multiple of 8 bytes
+#
+# Sections:
+#   words      count x length letter ids              (Lyndon words, in genLS order)
+#   left       count x (length-1) split points        (left-greedy brackets: number of leaves of the left
+#   lyndon     count x (length-1) split points         subbracket at each bracket, in preorder)
+#   star.letters , star.parents    count x length     (star symbols: letter ids and parents of vertices in
+#                                                       preorder, -1 at the root)
+#   diagonal   count                                  (pairings of star symbols with left-greedy brackets)
+#   <matrix>.indptr , <matrix>.indices , <matrix>.data  (sparse matrices by rows -- CSR)
+#
+# Leaves of brackets of Lyndon words are the letters of the word in order, so split points determine them.
+#######################################################################
+
+_magic = b"coLieBS1"
+
+
+def _split_points(bracket, splits):
+    """Append split points of a LieTree in preorder, returning its number of leaves"""
+    if bracket.weight == 0:
+        return 1
+    position = len(splits)
+    splits.append(0)
+    left = _split_points(bracket.left, splits)
+    splits[position] = left
+    return left + _split_points(bracket.right, splits)
+
+
+def _parents(symbol, letters, parents, index, start=None, parent=-1):
+    """Append letter ids and parents of the vertices of an EilTree in preorder (numbering vertices from start)"""
+    if start is None:
+        start = len(letters)
+    position = len(letters) - start
+    letters.append(index[symbol.decoration])
+    parents.append(parent)
+    for branch in symbol.subsymbols:
+        _parents(branch, letters, parents, index, start, position)
+
+
+
+def write_grading(path, grading, matrices=None):
+    """Write bases of a grading to a binary file
+
+       Arguments:
+       ----------
+        path     : string
+           File to write
+        grading  : string
+           Letters with multiplicities
+        matrices : dictionary { name : matrix }  [the standard brackets in the left-greedy basis as "lyndon"]
+           Pairing or change of basis matrices (lists of rows, or CSRMatrix) to store
+
+       Result:
+       -------
+        number of basis elements written
+    """
+    count , parts = _encode(grading, matrices)
+
+    with open(path + ".tmp", "wb") as file:
+        for part in parts:
+            file.write(part)
+
+    os.replace(path + ".tmp", path)
+
+    return count
+
+
+
+def _encode(grading, matrices):
+    """Number of basis elements, and the header and sections of the file of a grading (see write_grading)"""
+    basis    = grading_basis(grading)
+    alphabet = ''.join(sorted(set(grading)))
+    index    = {letter : n for n, letter in enumerate(alphabet)}
+    count , length = len(basis), len(basis.grading)
+
+    if matrices is None:
+        matrices = {"lyndon" : grading_basis(grading, "lyndon")}
+
+    letter_type = 'B' if len(alphabet) <= 256 else 'H'
+    split_type  = 'B' if length <= 256 else 'H'
+    parent_type = 'h' if length < 1 << 15 else 'i'
+
+    sections = { "words"        : array(letter_type, [index[letter] for word in basis.words for letter in word]),
+                 "left"         : array(split_type),
+                 "lyndon"       : array(split_type),
+                 "star.letters" : array(letter_type),
+                 "star.parents" : array(parent_type),
+                 "diagonal"     : array('q', basis.diagonal) }
+
+    for word, left, lyndon, star in zip(basis.words, basis.left, basis.lyndon, basis.star):
+        for name, bracket in (("left", left), ("lyndon", lyndon)):
+            if re.sub(r'\W', '', bracket) != word:
+                raise ValueError(f'Leaves of {bracket} are not the letters of {word}')
+            _split_points(LieTree(bracket), sections[name])
+        _parents(EilTree(star), sections["star.letters"], sections["star.parents"], index)
+
+    for name, matrix in matrices.items():
+        if not isinstance(matrix, CSRMatrix):
+            matrix = CSRMatrix.fromrows(matrix)
+        sections[name + ".indptr"] , sections[name + ".indices"] , sections[name + ".data"] = matrix.indptr, matrix.indices, matrix.data
+
+    contents , offset = dict(), 0
+    for name, data in sections.items():
+        contents[name] = [offset, data.typecode, len(data)]
+        offset += -(-len(data) * data.itemsize // 8) * 8
+
+    header = json.dumps({ "grading"  : basis.grading,
+                          "alphabet" : alphabet,
+                          "count"    : count,
+                          "length"   : length,
+                          "matrices" : sorted(matrices),
+                          "sections" : contents }).encode("utf-8")
+    header += b" " * (-len(header) % 8)
+
+    return count, [_magic + struct.pack("<Q", len(header)) + header] + [_padded(data.tobytes()) for data in sections.values()]
+
+
+
+def _padded(raw):
+    return raw + b"\0" * (-len(raw) % 8)
+
+
+
+def encode_grading(grading, matrices=None):
+    """Bases of a grading in the binary file format, as bytes (see write_grading)
+       Files of several gradings can be written one after another to a stream (see read_stream).
+    """
+    return b''.join(_encode(grading, matrices)[1])
+
+
+
+def read_stream(path):
+    """Generator of GradingFiles for the files written one after another in a stream (see encode_grading)"""
+    size , offset = os.path.getsize(path), 0
+    while offset < size:
+        basis = GradingFile(path, offset)
+        offset += basis.size
+        yield basis
+
+
+
+class CSRMatrix():
+    """CSRMatrix is a sparse matrix stored by rows (compressed sparse row format)
+
+    Parameters
+    ----------
+    indptr  : array of integers
+         Row i has entries indptr[i] : indptr[i+1] of indices and data
+    indices : array of integers
+         Column of each entry
+    data    : array of integers
+         Value of each entry
+
+    Example
+    -------
+    matrix = CSRMatrix.fromrows([[1, 0, 2], [0, 0, 3]])
+    matrix.row(0)       # {0 : 1, 2 : 2}
+    matrix[1, 2]        # 3
+    """
+
+    def __init__(self, indptr, indices, data):
+        self.indptr , self.indices , self.data = indptr, indices, data
+
+
+    @classmethod
+    def fromrows(cls, rows):
+        """Make a CSRMatrix from a list of rows (entries must be integers)"""
+        indptr , indices , data = array('q', [0]), array('i'), array('q')
+
+        for row in rows:
+            for j, value in enumerate(row):
+                if value != 0:
+                    if int(value) != value:
+                        raise ValueError("Only integer matrices can be stored")
+                    indices.append(j)
+                    data.append(int(value))
+            indptr.append(len(indices))
+
+        return cls(indptr, indices, data)
+
+
+    def row(self, i):
+        """Nonzero entries of a row as a dictionary { column : value }"""
+        start , end = self.indptr[i], self.indptr[i+1]
+        return dict(zip(self.indices[start:end], self.data[start:end]))
+
+
+    def __getitem__(self, position):
+        i , j = position
+        return self.row(i).get(j, 0)
+
+
+    def __len__(self):
+        return len(self.indptr) - 1
+
+
+    def __repr__(self):
+        return f'CSRMatrix with {len(self)} rows and {len(self.data)} nonzero entries'
+
+
+
+class GradingFile():
+    """GradingFile reads bases of a grading from a file made by write_grading, without copying them
+
+    The file is memory mapped, so processes reading the same file share its pages.  Words, brackets and
+    symbols are only made into strings, LieTrees and EilTrees when they are accessed.
+
+    Parameters
+    ----------
+    path   : string
+    offset : integer   (default: 0)
+         Position of the file in a stream of files (see read_stream)
+
+    Example
+    -------
+    with GradingFile("aabbc.basis") as basis:
+        basis.word(3) , basis.left(3) , basis.star(3)
+        basis.matrix("lyndon").row(3)
+
+    Attributes
+    ----------
+    grading  : string
+    alphabet : string
+         Letters in order of their ids
+    count    : integer
+         Number of basis elements
+    length   : integer
+         Length of words
+    matrices : list of strings
+         Names of stored matrices
+    sections : dictionary
+         Memoryviews of the arrays in the file
+    size     : integer
+         Number of bytes of the file (in a stream)
+    """
+
+    def __init__(self, path, offset=0):
+        self.path = path
+        self.__file = open(path, "rb")
+        self.__map  = mmap.mmap(self.__file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if self.__map[offset : offset + 8] != _magic:
+            raise ValueError(f'{path} is not a basis file')
+
+        size , = struct.unpack("<Q", self.__map[offset + 8 : offset + 16])
+        header = json.loads(self.__map[offset + 16 : offset + 16 + size].decode("utf-8"))
+        start  = offset + 16 + size
+
+        self.grading , self.alphabet = header["grading"], header["alphabet"]
+        self.count   , self.length   = header["count"], header["length"]
+
+        view = memoryview(self.__map)
+        self.sections , end = dict(), start
+        for name, (offset, typecode, items) in header["sections"].items():
+            itemsize = array(typecode).itemsize
+            self.sections[name] = view[start + offset : start + offset + items * itemsize].cast(typecode)
+            end = max(end, start + offset + -(-items * itemsize // 8) * 8)
+        view.release()
+        self.size = end - start + 16 + size
+
+        self.matrices = header["matrices"]
+        self.__trees  = dict()                         # LieTrees and EilTrees made so far
+
+
+    def word(self, i):
+        """Lyndon word i as a string"""
+        ids = self.sections["words"][i * self.length : (i+1) * self.length]
+        return ''.join([self.alphabet[n] for n in ids])
+
+
+    def __bracket(self, name, i):
+        """bracket is used internally to rebuild a bracket from its split points"""
+        word   = self.word(i)
+        splits = iter(self.sections[name][i * (self.length - 1) : (i+1) * (self.length - 1)].tolist())
+
+        def build(start, end):
+            if end - start == 1:
+                return word[start]
+            middle = start + next(splits)
+            left = build(start, middle)
+            return f'[{left},{build(middle, end)}]'
+
+        return build(0, self.length)
+
+
+    def left(self, i):
+        """Left-greedy bracket i as a LieTree"""
+        if ("left", i) not in self.__trees:
+            self.__trees["left", i] = LieTree(self.__bracket("left", i))
+        return self.__trees["left", i]
+
+
+    def lyndon(self, i):
+        """Standard bracket i as a LieTree"""
+        if ("lyndon", i) not in self.__trees:
+            self.__trees["lyndon", i] = LieTree(self.__bracket("lyndon", i))
+        return self.__trees["lyndon", i]
+
+
+    def star(self, i):
+        """Star symbol i as an EilTree"""
+        if ("star", i) not in self.__trees:
+            self.__trees["star", i] = self.__symbol(i)
+        return self.__trees["star", i]
+
+
+    def __symbol(self, i):
+        """symbol is used internally to rebuild a star symbol from its parent array"""
+        letters = self.sections["star.letters"][i * self.length : (i+1) * self.length].tolist()
+        parents = self.sections["star.parents"][i * self.length : (i+1) * self.length].tolist()
+
+        children = [[] for _ in range(self.length)]
+        for vertex in range(1, self.length):
+            children[parents[vertex]].append(vertex)
+
+        def build(vertex):
+            return ''.join([f'({build(child)})' for child in children[vertex]]) + self.alphabet[letters[vertex]]
+
+        return EilTree(build(0))
+
+
+    def diagonal(self, i):
+        return self.sections["diagonal"][i]
+
+
+    def matrix(self, name):
+        """Stored matrix as a CSRMatrix (of memoryviews into the file)"""
+        return CSRMatrix(self.sections[name + ".indptr"], self.sections[name + ".indices"], self.sections[name + ".data"])
+
+
+    def close(self):
+        for section in self.sections.values():
+            section.release()
+        self.sections = dict()
+        self.__map.close()
+        self.__file.close()
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, *exception):
+        self.close()
+
+
+    def __len__(self):
+        return self.count
+
+
+    def __repr__(self):
+        return f'GradingFile({self.path}) with {self.count} words of grading {self.grading}'
+
+
+
+class BasisStore():
+    """BasisStore is a directory of grading files with an index
+
+    Parameters
+    ----------
+    directory : string
+         Directory holding the files (made if needed)
+
+    Example
+    -------
+    store = BasisStore("bases")
+    store.build(["aabbc", "aaabbc"])
+    store.open("aabbc").left(0)
+
+    Attributes
+    ----------
+    index : dictionary
+         File name of each grading
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+        self.__files = dict()
+        path = os.path.join(directory, "index.json")
+        self.index = dict()
+        if os.path.exists(path):
+            with open(path) as file:
+                self.index = json.load(file)
+
+
+    def build(self, gradings, matrices=None):
+        """Write files for gradings which are not yet in the store"""
+        for grading in gradings:
+            grading = ''.join(sorted(grading))
+            if grading not in self.index:
+                name = f'{grading}.basis'
+                write_grading(os.path.join(self.directory, name), grading, matrices)
+                self.index[grading] = name
+
+        with open(os.path.join(self.directory, "index.json.tmp"), "w") as file:
+            json.dump(self.index, file)
+        os.replace(os.path.join(self.directory, "index.json.tmp"), os.path.join(self.directory, "index.json"))
+
+
+    def open(self, grading):
+        """GradingFile of a grading (opened once and kept open)"""
+        grading = ''.join(sorted(grading))
+        if grading not in self.__files:
+            self.__files[grading] = GradingFile(os.path.join(self.directory, self.index[grading]))
+        return self.__files[grading]
+
+
+    def close(self):
+        for file in self.__files.values():
+            file.close()
+        self.__files = dict()
+
+
+    def __contains__(self, grading):
+        return ''.join(sorted(grading)) in self.index
+
+
+    def __repr__(self):
+        return f'BasisStore({self.directory}) with {len(self.index)} gradings'
+
+#######################################################################
+#######################################################################
@@ -0,0 +1,266 @@
+##################################################################
+#
+# Benchmarks for generating bases, pairing and braiding
+#  © 2024 Benjamin Walter <benjamin.walter@uvi.edu>
+#
+# Usage:
+#   python benchmarks/bench.py                                  (all cases, JSON to stdout)
+#   python benchmarks/bench.py -o baseline.json
+#   python benchmarks/bench.py --compare baseline.json          (flag regressions, exit status 1 if any)
+#   python benchmarks/bench.py --cases pair_tree braid_word --weights 4 6 8 --letters 2 3
+#
+# Included functions:
+#   grading( weight, letters )
+#   random_bracket( grading, rng )
+#   random_word( grading, rng )
+#   random_signed_word( letters, length, rng )
+#   measure( function )
+#   run( cases, weights, letters )
+#   compare( results, baseline, threshold )
+#
+# Only the standard library is used (timeit for time, tracemalloc for peak memory)
+#
+##################################################################
+
+import os
+import sys
+import json
+import time
+import random
+import string
+import timeit
+import argparse
+import platform
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))   # modules live one level up
+
+from coLie import LieTree, EilWord, SignedWord
+from lieBasis import genLS, genLS_old, genLS_all, bracketStd, bracketLeft, bracketRight, bracketCfg, bracketChib, symbolStar, bracket_to_left
+from basisCache import store
+
+
+#######################################################################
+#######################################################################
+# Seeded workloads
+#######################################################################
+
+def grading(weight, letters):
+    """Grading with weight letters spread as evenly as possible over the first letters of the alphabet
+       Example: grading(6, 3) --> "aabbcc"
+    """
+    letters = min(letters, weight)
+    return ''.join([string.ascii_lowercase[n] * (weight // letters + (n < weight % letters)) for n in range(letters)])
+
+
+
+def random_bracket(grading, rng):
+    """Random Lie bracket using the letters of a grading (each exactly as often as in the grading)"""
+    leaves = [LieTree(letter) for letter in grading]
+    rng.shuffle(leaves)
+
+    while len(leaves) > 1:                            # bracket random neighbours until one tree remains
+        n = rng.randrange(len(leaves) - 1)
+        leaves[n:n+2] = [leaves[n] * leaves[n+1]]
+
+    return leaves[0]
+
+
+
+def random_word(grading, rng):
+    """Random word using the letters of a grading"""
+    word = list(grading)
+    rng.shuffle(word)
+    return ''.join(word)
+
+
+
+def random_signed_word(letters, length, rng):
+    """Random signed word of a given length in the first letters of the alphabet"""
+    alphabet = string.ascii_lowercase[:letters]
+    return SignedWord([(rng.choice(alphabet), rng.choice((1, -1))) for _ in range(length)])
+
+
+
+#######################################################################
+#######################################################################
+# Cases
+#
+# Each case takes (weight, letters, rng) and returns a function of no arguments to be timed, or None when
+# the size is out of range for that case (genLS_old enumerates every word of a given length, for example).
+#######################################################################
+
+def _words(g):
+    return list(genLS(g))
+
+
+def _pair_word(weight, letters, rng):
+    g = grading(weight, letters)
+    words , brackets = [EilWord(w) for w in _words(g)], [bracketStd(w) for w in _words(g)]
+    return lambda: [[w * b for b in brackets] for w in words]
+
+
+def _pair_tree(weight, letters, rng):
+    g = grading(weight, letters)
+    symbols , brackets = [symbolStar(w) for w in _words(g)], [bracketLeft(w) for w in _words(g)]
+    return lambda: [[s * b for b in brackets] for s in symbols]
+
+
+def _to_left(weight, letters, rng, cold=False):
+    brackets = [random_bracket(grading(weight, letters), rng) for _ in range(8)]
+    def run():
+        if cold:
+            store.clear()
+        return [bracket_to_left(bracket) for bracket in brackets]
+    return run
+
+
+def _braid(weight, letters, rng, kind):
+    if weight > 8:
+        return None
+    g = grading(weight, letters)
+    symbol = EilWord(random_word(g, rng)) if kind == "word" else symbolStar(_words(g)[0])
+    word = random_signed_word(letters, 2000, rng)
+    return lambda: symbol * word
+
+
+def _builder(function):
+    def case(weight, letters, rng):
+        words = _words(grading(weight, letters))
+        return lambda: [function(w) for w in words]
+    return case
+
+
+def _generator(function, limit):
+    def case(weight, letters, rng):
+        if letters ** weight > limit:
+            return None
+        g = grading(weight, letters)
+        return lambda: list(function(g))
+    return case
+
+
+CASES = { "genLS"                : _generator(genLS, float("inf")),
+          "genLS_old"            : _generator(genLS_old, 1 << 16),
+          "genLS_all"            : _generator(genLS_all, 1 << 18),
+          "bracketStd"           : _builder(bracketStd),
+          "bracketLeft"          : _builder(bracketLeft),
+          "bracketRight"         : _builder(bracketRight),
+          "bracketCfg"           : _builder(bracketCfg),
+          "bracketChib"          : _builder(bracketChib),
+          "symbolStar"           : _builder(symbolStar),
+          "pair_word"            : _pair_word,
+          "pair_tree"            : _pair_tree,
+          "bracket_to_left"      : _to_left,
+          "bracket_to_left_cold" : lambda weight, letters, rng: _to_left(weight, letters, rng, cold=True),
+          "braid_word"           : lambda weight, letters, rng: _braid(weight, letters, rng, "word"),
+          "braid_tree"           : lambda weight, letters, rng: _braid(weight, letters, rng, "tree") }
+
+
+
+#######################################################################
+#######################################################################
+# Measuring
+#######################################################################
+
+def measure(function, repeat=3):
+    """Best time per call (seconds) over repeat runs of timeit, and peak memory (bytes) of one call"""
+    timer = timeit.Timer(function)
+    number , _ = timer.autorange()
+    seconds = min(timer.repeat(repeat=repeat, number=number)) / number
+
+    tracemalloc.start()
+    function()
+    _ , peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return seconds, peak, number
+
+
+
+def run(cases, weights, letters, seed=0, repeat=3, log=None):
+    """Run benchmark cases across weights and alphabet sizes
+
+       Result:
+       -------
+        dictionary { "meta" : {...}, "results" : [ { case, weight, letters, seconds, peak_bytes, calls }, ... ] }
+    """
+    results = []
+    for name in cases:
+        for k in letters:
+            for n in weights:
+                if k > n:
+                    continue
+                function = CASES[name](n, k, random.Random(f'{seed}/{name}/{n}/{k}'))
+                if function is None:
+                    continue
+
+                seconds , peak , calls = measure(function, repeat)
+                results.append({ "case" : name, "weight" : n, "letters" : k,
+                                 "seconds" : seconds, "peak_bytes" : peak, "calls" : calls })
+                if log is not None:
+                    log(f'{name:22} weight {n:2} letters {k:2}  {seconds * 1e3:10.3f} ms  {peak / 1024:10.1f} KiB')
+
+    return { "meta" : { "python" : platform.python_version(), "platform" : platform.platform(),
+                        "seed" : seed, "time" : time.strftime("%Y-%m-%dT%H:%M:%S") },
+             "results" : results }
+
+
+
+def compare(results, baseline, threshold=1.25):
+    """Compare results with a baseline (both made by run), listing cases slower or larger than threshold times the baseline"""
+    old = {(r["case"], r["weight"], r["letters"]) : r for r in baseline["results"]}
+
+    regressions = []
+    for r in results["results"]:
+        key = (r["case"], r["weight"], r["letters"])
+        if key not in old:
+            continue
+        for field in ("seconds", "peak_bytes"):
+            ratio = r[field] / old[key][field] if old[key][field] else 1.0
+            if ratio > threshold:
+                regressions.append({ "case" : r["case"], "weight" : r["weight"], "letters" : r["letters"],
+                                     "measure" : field, "baseline" : old[key][field], "value" : r[field], "ratio" : ratio })
+
+    return regressions
+
+
+
+#######################################################################
+#######################################################################
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(description="Benchmarks for coLie")
+    parser.add_argument("--cases",     nargs="+", default=list(CASES), choices=list(CASES))
+    parser.add_argument("--weights",   nargs="+", type=int, default=[4, 5, 6, 7, 8])
+    parser.add_argument("--letters",   nargs="+", type=int, default=[2, 3, 4])
+    parser.add_argument("--seed",      type=int, default=0)
+    parser.add_argument("--repeat",    type=int, default=3)
+    parser.add_argument("--output", "-o", help="write JSON results to this file (default: stdout)")
+    parser.add_argument("--compare",   help="baseline JSON file to compare with")
+    parser.add_argument("--threshold", type=float, default=1.25, help="ratio to the baseline counted as a regression")
+    parser.add_argument("--quiet", "-q", action="store_true")
+    options = parser.parse_args(arguments)
+
+    log = None if options.quiet else lambda line: print(line, file=sys.stderr)
+    results = run(options.cases, options.weights, options.letters, options.seed, options.repeat, log)
+
+    if options.compare:
+        with open(options.compare) as file:
+            results["regressions"] = compare(results, json.load(file), options.threshold)
+        for r in results["regressions"]:
+            print(f'REGRESSION {r["case"]} weight {r["weight"]} letters {r["letters"]}: '
+                  f'{r["measure"]} {r["ratio"]:.2f}x baseline', file=sys.stderr)
+
+    if options.output:
+        with open(options.output, "w") as file:
+            json.dump(results, file, indent=1)
+    else:
+        json.dump(results, sys.stdout, indent=1)
+        print()
+
+    return 1 if results.get("regressions") else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,1076 @@
+##################################################################
+#
+# Letter braiding of coLie symbols on long group words
+#  © 2024 Benjamin Walter <benjamin.walter@uvi.edu>
+#
+# Included classes:
+#   BraidStream( symbols )
+#   BraidWindow( symbol )
+#   CountForest( symbols )
+#
+# Included functions:
+#   braid_file( path, symbols )
+#   braid_prefixes( symbol, word )
+#   braid_words( symbols, words )
+#   braid_windows( symbol, word, width )
+#   eil_expansion( symbol )
+#   lcs_depth( word, max_n )
+#   lie_expansion( bracket )
+#   word_to_lie( word, depth )
+#   words_to_lie( words, depth )
+#
+# See docstrings for more information on use
+#
+##################################################################
+
+import os     # checkpoint files are replaced atomically
+import re     # used for finding letters in chunks of text
+import json   # checkpoints are saved as json
+import mmap   # binary word files are read through memory maps
+import codecs # text word files are decoded incrementally
+import itertools
+import math
+import functools
+import collections
+
+from fractions import Fraction   # logarithms have rational coefficients
+
+from coLie import EilWord, EilTree, SignedLetter, SignedWord, CompactWord, BraidCounter, CountWord, CountTree
+from coLie import LieTree
+from basisCache import grading_basis, store
+
+
+#######################################################################
+#######################################################################
+# Streaming evaluation
+#
+# The braiding algorithm of [GOSW] passes once across a word from left to right,
+# keeping s and Δ values for each vertex of a symbol (CountWord and CountTree).
+# So a word can be read in chunks, and the counters can be saved and restored
+# between chunks to resume long jobs or to report running values.
+#######################################################################
+
+class BraidStream():
+    """BraidStream braids coLie symbols on a word which is read in chunks
+
+    Parameters
+    ----------
+    symbols  : EilWord, EilTree, string, or list of these
+         Symbols to braid.  Strings with parentheses are read as EilTrees, other strings as EilWords.
+    alphabet : string   (default: letters of the symbols)
+         Letters in order of their ids.  This is needed for binary input (signed codes ±(id+1)).
+         Letters of text input missing from the alphabet are appended to it.
+
+    Example
+    -------
+    stream = BraidStream(["ab", "(a)(a)b"])
+    stream.feed("aba-b-a")
+    stream.feed("ab^{-3}")
+    stream.close()
+    stream.values
+
+
+    Attributes
+    ----------
+    symbols  : list of EilWords and EilTrees
+         The symbols being braided
+    counters : list of CountWords and CountTrees
+         The s and Δ values of each symbol
+    values   : list of integers
+         Current braiding values of symbols on the letters read so far
+    position : integer
+         Number of letters read so far
+    offset   : integer
+         Amount of input consumed so far (bytes of utf-8 text, or codes of binary input).
+         A partial expression held back until more text arrives is kept with snapshots.
+    """
+
+    _letters = re.compile(r'[^\W\d_]')
+
+
+    def __init__(self, symbols, alphabet=None):
+        if not isinstance(symbols, (list, tuple)):
+            symbols = [symbols]
+
+        self.symbols = [_symbol(symbol) for symbol in symbols]
+
+        self.counters = [CountWord(symbol) if isinstance(symbol, EilWord) else CountTree(symbol) for symbol in self.symbols]
+
+        if alphabet is None:
+            alphabet = ''.join(sorted(set(''.join([symbol.letters() for symbol in self.symbols]))))
+
+        self.alphabet = alphabet
+        self.position = 0
+        self.offset   = 0
+        self._carry   = ""    # end of text which may continue in the next chunk (a^{1 ... 2})
+
+
+    @property
+    def values(self):
+        return [counter.total for counter in self.counters]
+
+
+    def feed(self, chunk):
+        """Read the next chunk of the word
+           A chunk may be text, a SignedWord or CompactWord, a buffer of signed codes (bytes, array, mmap, ...),
+           or any iterable of SignedLetters or (letter, sign) pairs.
+        """
+        if isinstance(chunk, str):
+            self.__feed_text(chunk)
+
+        elif isinstance(chunk, (SignedWord, CompactWord)):
+            self.__braid(chunk)
+
+        else:
+            try:
+                codes = memoryview(chunk)
+            except TypeError:                         # iterable of letters: read it in blocks
+                letters = iter(chunk)
+                while True:
+                    block = list(itertools.islice(letters, 1 << 16))
+                    if not block:
+                        return
+                    self.__braid(self.__word(SignedWord(block)))
+
+            self.__braid(CompactWord.frombuffer(codes, self.alphabet))
+            self.offset += len(codes)
+
+
+    def close(self):
+        """Finish reading text, braiding any expression held back for the next chunk"""
+        carry , self._carry = self._carry , ""
+
+        if carry:
+            self.__braid(self.__word(carry))
+
+
+    def __feed_text(self, text):
+        """feed_text is used internally to braid a chunk of text, holding back an expression that may not be finished"""
+        self.offset += len(text.encode("utf-8"))
+        text = self._carry + text
+
+        cut = len(text)                      # hold back from the last letter  (a^{1 ... 2})
+
+        if "(" in text:                      #  or from the last parenthesized subword (ab)^{ ... }
+            depth = 0
+            for i in range(len(text)):
+                if text[i] == "(":
+                    if depth == 0:
+                        cut = i
+                    depth += 1
+                elif text[i] == ")":
+                    depth = max(depth-1, 0)
+                elif depth == 0 and text[i].isalpha():
+                    cut = i
+        else:
+            for i in range(len(text)-1, -1, -1):
+                if text[i].isalpha():
+                    cut = i
+                    break
+
+        self._carry = text[cut:]
+
+        if cut > 0:
+            self.__braid(self.__word(text[:cut]))
+
+
+    def __word(self, word):
+        """word is used internally to make a SignedWord or CompactWord from text, extending the alphabet as needed"""
+        if isinstance(word, str):
+            new = set(BraidStream._letters.findall(word)) - set(self.alphabet)
+            powers = "^" in word or "(" in word
+        else:
+            new = set(word.letters()) - set(self.alphabet)
+            powers = any([isinstance(base, SignedWord) or abs(power) > 64 for base, power in word.runs])
+
+        if new:
+            self.alphabet += ''.join(sorted(new))   # append so that existing ids don't change
+
+        if powers:                                  # keep powers run-length encoded
+            return SignedWord(word)
+
+        return CompactWord(word, self.alphabet)
+
+
+    def __braid(self, word):
+        """braid is used internally to pass each counter across a word"""
+        for counter in self.counters:
+            counter.braid(word)
+
+        self.position += len(word)
+
+
+    #########################
+    #
+    # Checkpoints
+    #
+    def snapshot(self):
+        """Current state of the stream as a dictionary (of strings and integers, so it can be saved as json)"""
+        return { "symbols"  : [str(symbol) for symbol in self.symbols],
+                 "trees"    : [isinstance(symbol, EilTree) for symbol in self.symbols],
+                 "alphabet" : self.alphabet,
+                 "position" : self.position,
+                 "offset"   : self.offset,
+                 "carry"    : self._carry,
+                 "states"   : [counter.state() for counter in self.counters] }
+
+
+    @classmethod
+    def restore(cls, snapshot):
+        """Make a BraidStream continuing from a snapshot"""
+        symbols = [EilTree(symbol) if tree else EilWord(symbol) for symbol, tree in zip(snapshot["symbols"], snapshot["trees"])]
+
+        stream = cls(symbols, snapshot["alphabet"])
+        stream.position , stream.offset , stream._carry = snapshot["position"] , snapshot["offset"] , snapshot["carry"]
+
+        for counter, state in zip(stream.counters, snapshot["states"]):
+            counter.restore(state)
+
+        return stream
+
+
+    def save(self, path):
+        """Save a snapshot as json, replacing any earlier file only once the new one is written"""
+        with open(path + ".tmp", "w") as file:
+            json.dump(self.snapshot(), file)
+
+        os.replace(path + ".tmp", path)
+
+
+    @classmethod
+    def load(cls, path):
+        """Make a BraidStream continuing from a snapshot saved by save()"""
+        with open(path) as file:
+            return cls.restore(json.load(file))
+
+
+    def __repr__(self):
+        return f'BraidStream({[str(symbol) for symbol in self.symbols]}) at letter {self.position}'
+
+
+
+#######################################################################
+#######################################################################
+
+def _symbol(symbol):
+    """Read a string as an EilTree (if it has parentheses) or an EilWord"""
+    if isinstance(symbol, (EilWord, EilTree)):
+        return symbol
+    return EilTree(symbol) if "(" in symbol else EilWord(symbol)
+
+
+def braid_file(path, symbols, binary=False, alphabet=None, chunk=1 << 20, checkpoint=None, every=16, report=None):
+    """Braid symbols on a word stored in a file, reading it in chunks
+
+       Arguments:
+       ----------
+        path       : string
+           File holding the word: text (such as "aba-b-" or "a^{-1}b^{3}") or binary signed codes ±(id+1)
+        symbols    : EilWord, EilTree, string, or list of these
+           Symbols to braid
+        binary     : False or typecode  [False]
+           Read the file as binary codes of the given array typecode ('b' for signed bytes, 'i' for ints, ...)
+        alphabet   : string  [letters of symbols]
+           Letters in order of their ids (needed for binary files)
+        chunk      : integer  [2^20]
+           Size of chunks to read (in characters or codes)
+        checkpoint : string  [None]
+           File for saving progress.  If it exists, braiding resumes from it.
+        every      : integer  [16]
+           Save a checkpoint after this many chunks
+        report     : function  [None]
+           Called with the BraidStream after each chunk (for reporting running values)
+
+       Result:
+       -------
+        list of braiding values, one for each symbol
+    """
+    if checkpoint is not None and os.path.exists(checkpoint):
+        stream = BraidStream.load(checkpoint)
+    else:
+        stream = BraidStream(symbols, alphabet)
+
+    count = 0
+
+    if binary:
+        with open(path, "rb") as file:
+            if os.fstat(file.fileno()).st_size > 0:
+                with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                    codes = memoryview(buffer).cast(binary)
+
+                    for start in range(stream.offset, len(codes), chunk):
+                        stream.feed(codes[start : start + chunk])
+
+                        count += 1
+                        if checkpoint is not None and count % every == 0:
+                            stream.save(checkpoint)
+                        if report is not None:
+                            report(stream)
+
+                    codes.release()
+    else:
+        decoder = codecs.getincrementaldecoder("utf-8")()
+
+        with open(path, "rb") as file:
+            file.seek(stream.offset)
+
+            while True:
+                data = file.read(chunk)
+                stream.feed(decoder.decode(data, final=not data))
+
+                if not data:
+                    stream.close()
+                    break
+
+                count += 1
+                if checkpoint is not None and count % every == 0:
+                    stream.save(checkpoint)
+                if report is not None:
+                    report(stream)
+
+    if checkpoint is not None:
+        stream.save(checkpoint)
+
+    return stream.values
+
+#######################################################################
+#######################################################################
+
+
+
+#######################################################################
+#######################################################################
+# Prefix and window queries
+#
+# A single pass of the braiding algorithm gives the values of a symbol on every prefix of a word.
+#
+# For windows, note that braiding of EilWords satisfies Chen's identity: the value of s on a product uv is
+# the sum over splittings s = s's'' of (value of s' on u)(value of s'' on v).  So the values of all subwords
+# s[i:j] of an EilWord s on a word form a unitriangular matrix which is multiplied by an elementary matrix
+# on the right when a letter is appended to the word, and by the inverse of one on the left when a letter is
+# removed from its front.  Both updates only change the rows or columns at positions of s holding that letter.
+# The braiding of an EilTree is the braiding of a combination of EilWords (see eil_expansion).
+#
+# That combination has at least n!/prod(sizes of subtrees) words (the linear extensions of the tree), which grows
+# factorially with branching -- the star (a)(b)(c)(d)(e)(f)g has 720.  A Chen identity for trees would need the
+# values of the tree with every down-closed set of vertices removed (2^6 of them for that star), so there is no
+# window update costing O(|symbol|) per letter for general trees.  Instead, windows of a tree whose expansion is
+# larger than the window are braided by counting the whole window again (O(width |symbol|) per window).
+#######################################################################
+
+def braid_prefixes(symbol, word):
+    """Braiding values of a symbol on each prefix of a word (in one pass)
+
+       Arguments:
+       ----------
+        symbol : EilWord, EilTree, or string
+        word   : SignedWord, CompactWord, or string  (powers are expanded)
+
+       Result:
+       -------
+        list of integers, the value on the first n letters of the word at index n-1
+    """
+    symbol = _symbol(symbol)
+    word   = word if isinstance(word, CompactWord) else CompactWord(word)
+
+    counter = CountWord(symbol) if isinstance(symbol, EilWord) else CountTree(symbol)
+    values  = []
+    counter.braid_ids(word.ids, word.signs, word.alphabet, values)
+
+    return values
+
+
+
+def braid_windows(symbol, word, width):
+    """Braiding values of a symbol on each subword of a word of a given length
+
+       Arguments:
+       ----------
+        symbol : EilWord, EilTree, or string
+        word   : SignedWord, CompactWord, or string  (powers are expanded)
+        width  : integer
+           length of the windows
+
+       Result:
+       -------
+        list of integers, the value on word[i : i+width] at index i
+    """
+    word   = word if isinstance(word, CompactWord) else CompactWord(word)
+    window = BraidWindow(symbol, width)
+    values = []
+
+    for n in range(len(word)):
+        window.append(word.alphabet[word.ids[n]], word.signs[n])
+        if n >= width:
+            window.popleft()
+        if n >= width - 1:
+            values.append(window.value)
+
+    return values
+
+
+
+class BraidWindow():
+    """BraidWindow braids a symbol on a word which changes at both ends (such as a sliding window)
+
+    Parameters
+    ----------
+    symbol : EilWord, EilTree, or string
+    width  : integer   (default: None)
+         Usual length of the word.  Tree symbols whose EilWord expansion would have more words than this
+         are braided by counting the whole word again when value is read.
+
+    Costs per letter appended or removed are O(|symbol|^2) for an EilWord symbol, and that times the number of
+    words of its expansion (at least n!/prod(sizes of subtrees) for n vertices) for a tree symbol.  A tree which
+    is counted again costs O(len(word) |symbol|) each time value is read instead.
+
+    Example
+    -------
+    window = BraidWindow("(a)(a)b")
+    for letter in "aab":
+        window.append(letter)
+    window.append("a", -1)
+    window.popleft()
+    window.value
+
+    Attributes
+    ----------
+    symbol  : EilWord or EilTree
+        The symbol being braided
+    letters : deque of (letter, sign) pairs
+        The current word
+    value   : integer
+        Braiding value of the symbol on the current word
+    """
+
+    def __init__(self, symbol, width=None):
+        self.symbol  = _symbol(symbol)
+        self.letters = collections.deque()
+
+        self.__recount = isinstance(self.symbol, EilTree) and width is not None and _extensions(self.symbol) > width
+        if self.__recount:
+            expansion = dict()
+        elif isinstance(self.symbol, EilTree):
+            expansion = eil_expansion(self.symbol)
+        else:
+            expansion = {self.symbol.value : 1}
+
+        self.__words  = [(word, coefficient) for word, coefficient in expansion.items() if coefficient]
+        self.__chen   = [[[int(i == j) for j in range(len(word) + 1)] for i in range(len(word) + 1)] for word, _ in self.__words]
+        self.__where  = []                      # for each word, letter -> positions of word holding letter
+        for word, _ in self.__words:
+            where = dict()
+            for i in range(len(word)):
+                where.setdefault(word[i], []).append(i)
+            self.__where.append(where)
+
+
+    @property
+    def value(self):
+        if self.__recount:
+            counter = CountTree(self.symbol)
+            for letter, sign in self.letters:
+                counter.evaluate(SignedLetter(letter, sign))
+            return counter.total
+        return sum([coefficient * chen[0][-1] for (_, coefficient), chen in zip(self.__words, self.__chen)])
+
+
+    def append(self, letter, sign=1):
+        """Add a letter to the end of the word (letter may be a SignedLetter)"""
+        if isinstance(letter, SignedLetter):
+            letter, sign = letter.value, letter.sign
+        sign = 1 if sign > 0 else -1
+        self.letters.append((letter, sign))
+
+        for chen, where in zip(self.__chen, self.__where):
+            if letter not in where:
+                continue
+            if sign > 0:                              # column j += column j-1   (right to left)
+                for j in reversed(where[letter]):
+                    for i in range(j + 1):
+                        chen[i][j+1] += chen[i][j]
+            else:                                     # column j -= new column j-1   (left to right)
+                for j in where[letter]:
+                    for i in range(j + 1):
+                        chen[i][j+1] -= chen[i][j]
+
+
+    def popleft(self):
+        """Remove the first letter of the word, returning it as a (letter, sign) pair"""
+        letter, sign = self.letters.popleft()
+
+        for chen, where in zip(self.__chen, self.__where):
+            if letter not in where:
+                continue
+            if sign > 0:                              # row i -= new row i+1   (bottom to top)
+                for i in reversed(where[letter]):
+                    row , below = chen[i] , chen[i+1]
+                    for j in range(i + 1, len(row)):
+                        row[j] -= below[j]
+            else:                                     # row i += row i+1   (top to bottom)
+                for i in where[letter]:
+                    row , below = chen[i] , chen[i+1]
+                    for j in range(i + 1, len(row)):
+                        row[j] += below[j]
+
+        return letter, sign
+
+
+    def __len__(self):
+        return len(self.letters)
+
+
+    def __repr__(self):
+        return f'BraidWindow({str(self.symbol)}) on {"".join([letter if sign > 0 else letter + "-" for letter, sign in self.letters])}'
+
+
+
+def _extensions(symbol):
+    """Number of linear extensions of a tree symbol  n!/prod(sizes of subtrees)  (the fewest words of its expansion)"""
+    sizes = [len(node) for node in symbol]
+    return math.factorial(len(symbol)) // math.prod(sizes)
+
+
+
+def eil_expansion(symbol, top=False):
+    """Combination of EilWords whose braiding agrees with the braiding of a symbol on every word
+
+       The counter of a vertex is the product of the counters of its branches, integrated along its letter.
+       Products of EilWord braidings are braidings of quasi-shuffles (interleavings where equal letters may
+       also coincide), so a vertex expands to the quasi-shuffle of the expansions of its branches followed
+       by its decoration.  Keeping only the words of full length (shuffles of linear extensions of the tree)
+       gives the combination of EilWords which pairs with Lie brackets as the symbol does.
+
+       Arguments:
+       ----------
+        symbol : EilWord, EilTree, or string
+        top    : boolean  [False]
+           Only keep words of full length (use shuffles rather than quasi-shuffles)
+
+       Result:
+       -------
+        dictionary of strings (EilWords) and integer coefficients
+    """
+    symbol = _symbol(symbol)
+
+    if isinstance(symbol, EilWord):
+        return {symbol.value : 1}
+
+    def expand(node):
+        product = {"" : 1}
+        for branch in node.subsymbols:
+            factor , combined = expand(branch) , dict()
+            for u, c in product.items():
+                for v, d in factor.items():
+                    for w, k in _quasi_shuffle(u, v, not top).items():
+                        combined[w] = combined.get(w, 0) + c * d * k
+            product = combined
+        return {w + node.decoration : c for w, c in product.items()}
+
+    return expand(symbol)
+
+
+@functools.lru_cache(maxsize=1 << 16)
+def _quasi_shuffle(u, v, merge=True):
+    """Quasi-shuffle product of two words as a dictionary of words and multiplicities (shuffle product if not merge)"""
+    if not u or not v:
+        return {u + v : 1}
+
+    result = dict()
+    for w, k in _quasi_shuffle(u[1:], v, merge).items():
+        result[u[0] + w] = result.get(u[0] + w, 0) + k
+    for w, k in _quasi_shuffle(u, v[1:], merge).items():
+        result[v[0] + w] = result.get(v[0] + w, 0) + k
+    if merge and u[0] == v[0]:
+        for w, k in _quasi_shuffle(u[1:], v[1:], merge).items():
+            result[u[0] + w] = result.get(u[0] + w, 0) + k
+
+    return result
+
+#######################################################################
+#######################################################################
+
+
+
+#######################################################################
+#######################################################################
+# Many symbols at once
+#
+# The s and Δ values of a vertex only depend on the subsymbol below it, so symbols sharing subsymbols
+# (such as the star symbols of Lyndon words with a common grading) can share their counters.
+#######################################################################
+
+class CountForest(BraidCounter):
+    """CountForest braids many symbols in one pass, sharing the counters of equal subsymbols
+
+    Parameters
+    ----------
+    symbols : list of EilTrees, EilWords, or strings
+
+    Example
+    -------
+    forest = CountForest(["(a)(a)b", "((a)b)a", "(a)b"])
+    forest.braid(SignedWord("aab^{3}a-"))
+    forest.totals
+
+    Attributes
+    ----------
+    symbols  : list of EilTrees
+        The symbols being braided
+    decorations : list of strings
+        Decoration of each distinct subsymbol (leaf to root order)
+    branches : list of lists of integers
+        Positions of the branches of each distinct subsymbol
+    roots    : list of integers
+        Position of each symbol
+    sum      : list of integers
+        Current s values
+    delta    : list of integers
+        Current Δ values
+    """
+
+    def __init__(self, symbols):
+        self.symbols = [symbol if isinstance(symbol, EilTree) else EilTree(str(symbol)) for symbol in symbols]
+
+        self.decorations , self.branches = [] , []
+        index = dict()                                 # canonical key of subsymbol -> position
+
+        def add(node):
+            branches = sorted([add(branch) for branch in node.subsymbols])
+            key = (node.decoration, tuple(branches))
+            if key not in index:
+                index[key] = len(self.decorations)
+                self.decorations.append(node.decoration)
+                self.branches.append(branches)
+            return index[key]
+
+        self.roots = [add(symbol) for symbol in self.symbols]
+        self.sum   = [0] * len(self.decorations)
+        self.delta = [0] * len(self.decorations)
+        self.__size = max([len(symbol) for symbol in self.symbols], default=0)
+
+
+    @property
+    def totals(self):
+        return [self.sum[root] + self.delta[root] for root in self.roots]
+
+
+    def evaluate(self, letter):
+        """evaluate incorporates one SignedLetter into the counters"""
+        self.braid_ids([0], [1 if letter.sign else -1], letter.value)
+
+
+    def braid_ids(self, ids, signs, alphabet, record=None):
+        """braid_ids evaluates the counters across parallel arrays of letter ids and signs (see CompactWord)
+           If record is a list, the totals after each letter are appended to it.
+        """
+        sum , delta , branches = self.sum , self.delta , self.branches
+
+        where = dict()                                 # letter id -> subsymbols decorated by letter
+        for n in range(len(self.decorations)):
+            where.setdefault(alphabet.find(self.decorations[n]) if self.decorations[n] else -1, []).append(n)
+
+        pending = [n for n in range(len(delta)) if delta[n]]
+
+        for letter, sign in zip(ids, signs):
+            for n in pending:                  # 1. add Δ to s and set Δ = 0
+                sum[n] += delta[n]
+                delta[n] = 0
+            pending = ()
+
+            if letter in where:                # 2. incorporate values from branches (leaf to root)
+                if sign > 0:
+                    for n in where[letter]:
+                        delta[n] = math.prod([sum[b] for b in branches[n]])
+                    pending = where[letter]
+                else:
+                    for n in where[letter]:
+                        sum[n]  -= math.prod([sum[b] for b in branches[n]])
+
+            if record is not None:
+                record.append(self.totals)
+
+
+    def state(self):
+        return self.sum + self.delta
+
+
+    def restore(self, state):
+        self.sum , self.delta = list(state[:len(self.sum)]) , list(state[len(self.sum):])
+
+
+    def __len__(self):
+        """len is the largest number of vertices of the symbols"""
+        return self.__size
+
+
+
+def _letter_counts(word):
+    """Number of times each letter appears as a generator in a word, and the set of letters appearing as inverses"""
+    positive , inverted = dict(), set()
+
+    if isinstance(word, CompactWord):
+        for letter, sign in zip(word.ids, word.signs):
+            if sign > 0:
+                positive[word.alphabet[letter]] = positive.get(word.alphabet[letter], 0) + 1
+            else:
+                inverted.add(word.alphabet[letter])
+        return positive, inverted
+
+    for base, power in word.runs:
+        if isinstance(base, SignedWord):
+            counts , inverses = _letter_counts(base)
+            for letter in counts:
+                positive[letter] = positive.get(letter, 0) + counts[letter] * power
+            inverted |= inverses
+        elif power > 0:
+            positive[base] = positive.get(base, 0) + power
+        else:
+            inverted.add(base)
+
+    return positive, inverted
+
+
+
+def lcs_depth(word, max_n):
+    """Find how deep a word lies in the lower central series of the free group
+
+       A word lies in γ_n exactly when all symbols of weight below n-1 braid to zero on it.  Gradings are
+       checked by increasing weight, using the star symbols of Lyndon words (which detect γ_k / γ_(k+1) once
+       the word is known to lie in γ_k).  Gradings using a letter missing from the word, or using a letter more
+       often than it appears when it never appears inverted, are skipped.  All star symbols of a weight are
+       braided in one pass.
+
+       Arguments:
+       ----------
+        word  : SignedWord, CompactWord, or string
+        max_n : integer
+           Stop once the word is known to lie in γ_(max_n)
+
+       Result:
+       -------
+        (n, symbol) where the word lies in γ_n but not γ_(n+1), witnessed by a star symbol with nonzero braiding
+        (max_n, None) if the word lies in γ_(max_n)
+    """
+    if not isinstance(word, (SignedWord, CompactWord)):
+        word = SignedWord(word)
+
+    positive , inverted = _letter_counts(word)
+    alphabet = sorted(set(positive) | inverted)
+    bound = {letter : None if letter in inverted else positive[letter] for letter in alphabet}
+
+    def gradings(n, letters):                          # multisets of n letters the word can support
+        if not letters:
+            if n == 0:
+                yield ""
+            return
+        letter , most = letters[0] , n if bound[letters[0]] is None else min(n, bound[letters[0]])
+        for k in range(most, -1, -1):
+            for rest in gradings(n - k, letters[1:]):
+                yield letter * k + rest
+
+    for n in range(1, max_n):
+        symbols = [EilTree(symbol) for grading in gradings(n, alphabet) for symbol in grading_basis(grading).star]
+        if not symbols:
+            continue
+
+        forest = CountForest(symbols)
+        forest.braid(word)
+
+        for symbol, value in zip(symbols, forest.totals):
+            if value != 0:
+                return n, symbol
+
+    return max_n, None
+
+#######################################################################
+#######################################################################
+
+
+
+#######################################################################
+#######################################################################
+# Many words at once
+#
+# Words which share prefixes (balls in the free group, or mutations of one word) are put in a prefix trie of
+# runs, where a^{5}b and a^{7} share the run a^{5}.  The trie is walked depth first by one CountForest of all
+# the symbols, saving its state at each branch point and restoring it before each further branch.  So shared
+# prefixes are braided once, long runs are still extrapolated, and only the states along one path of the trie
+# are kept at a time.
+#######################################################################
+
+def braid_words(symbols, words):
+    """Braiding values of symbols on many words, sharing the work on common prefixes
+
+       Arguments:
+       ----------
+        symbols : EilWord, EilTree, string, or list of these
+        words   : list of SignedWords, CompactWords, or strings
+
+       Result:
+       -------
+        list (one entry for each word) of lists of integers (one value for each symbol)
+
+       Example:
+       --------
+        braid_words(["(a)b", "aab"], ["ab", "aba-", "abab", "a^{3}b", "a^{3}b^{-2}"])
+    """
+    if not isinstance(symbols, (list, tuple)):
+        symbols = [symbols]
+    symbols = [_symbol(symbol) for symbol in symbols]
+    forest  = CountForest([_chain(symbol.value) if isinstance(symbol, EilWord) else symbol for symbol in symbols])
+
+    root = [dict(), []]                                # node: [ { (key, sign) : edge }, indices of words ending here ]
+    for index, word in enumerate(words):               # edge: [count, base, sign, node]  (a run base^{sign*count})
+        if not isinstance(word, SignedWord):
+            word = SignedWord(word)
+
+        node = root
+        for base, power in word.runs:
+            key   = (base.short() if isinstance(base, SignedWord) else base, power > 0)
+            count = abs(power)
+            while count > 0:
+                edge = node[0].get(key)
+                if edge is None:                       # new branch
+                    edge = node[0][key] = [count, base, 1 if power > 0 else -1, [dict(), []]]
+                elif edge[0] > count:                  # split a run:  a^{7} --> a^{count} a^{7-count}
+                    middle = [{key : [edge[0] - count, base, edge[2], edge[3]]}, []]
+                    edge = node[0][key] = [count, base, edge[2], middle]
+                count -= edge[0]
+                node = edge[3]
+        node[1].append(index)
+
+    values = [None] * len(words)
+    stack  = [(None, None, root)]                      # (state to restore, edge to braid along, node it leads to)
+    while stack:
+        state , edge , node = stack.pop()
+        if state is not None:
+            forest.restore(state)
+
+        while True:
+            if edge is not None:
+                _advance(forest, edge[1], edge[2] * edge[0])
+
+            for index in node[1]:
+                values[index] = forest.totals
+
+            if not node[0]:
+                break
+
+            edges = list(node[0].values())
+            if len(edges) > 1:                         # branch point:  save the state for the other branches
+                saved = forest.state()
+                stack.extend([(saved, later, later[3]) for later in reversed(edges[1:])])
+            edge , node = edges[0], edges[0][3]
+
+    return values
+
+
+
+def _advance(counter, base, power):
+    """Braid a counter along one run base^{power} (as BraidCounter.braid does for each run)"""
+    if isinstance(base, SignedWord):
+        counter.repeat(lambda: counter.braid(base), power)
+    elif power == 1 or power == -1:
+        counter.evaluate(SignedLetter(base, power))
+    else:
+        letter = SignedLetter(base, 1 if power > 0 else -1)
+        counter.repeat(lambda: counter.evaluate(letter), abs(power))
+
+
+
+
+#######################################################################
+#######################################################################
+# Lie elements of words
+#
+# The braiding values of EilWords on a word g are the coefficients of its Magnus expansion, the product of
+# 1 + X_a (for generators) and 1 - X_a + X_a^2 - ... (for inverses) in noncommuting power series.
+# Substituting X_a = exp(Y_a) - 1 sends each generator to exp(Y_a), so the logarithm of the expansion is a
+# Lie series (by the Baker-Campbell-Hausdorff formula).  Its part of degree n is written in a Lie basis by
+# pairing with dual symbols.  It differs from the braiding values of degree n by products of lower degree
+# terms, so it is computed exactly with rational coefficients.
+#######################################################################
+
+def lie_expansion(bracket):
+    """Expand a Lie bracket into an associative polynomial ([x,y] = xy - yx)
+
+       Arguments:
+       ----------
+        bracket : string or LieTree
+
+       Result:
+       -------
+        dictionary of words and integer coefficients
+    """
+    if not isinstance(bracket, LieTree):
+        bracket = LieTree(bracket)
+
+    if bracket.weight == 0:
+        return {bracket.value : 1}
+
+    left , right , result = lie_expansion(bracket.left) , lie_expansion(bracket.right) , dict()
+    for u, c in left.items():
+        for v, d in right.items():
+            result[u+v] = result.get(u+v, 0) + c * d
+            result[v+u] = result.get(v+u, 0) - c * d
+
+    return {w : c for w, c in result.items() if c != 0}
+
+
+
+def word_to_lie(word, depth, basis="left", short=False):
+    """Lie element of a group word: the logarithm of its Magnus expansion, truncated at a given degree
+
+       Arguments:
+       ----------
+        word  : SignedWord, CompactWord, or string
+        depth : integer
+           Keep terms of degree at most depth
+        basis : string  ["left"]
+           "left"   -- left-greedy basis (bracketLeft), using star symbols as dual basis
+           "lyndon" -- standard Lyndon basis (bracketStd)
+           "star"   -- basis dual to the star symbols (keys are star symbols, values their pairings)
+        short : boolean  [False]
+           Write brackets in 'short form'
+
+       Result:
+       -------
+        dictionary { bracket : coefficient }  (coefficients are integers or Fractions)
+    """
+    return words_to_lie([word], depth, basis, short)[0]
+
+
+
+def words_to_lie(words, depth, basis="left", short=False):
+    """Lie elements of many group words (see word_to_lie)
+       The words are braided by one CountForest of all EilWords up to the given degree, and the basis
+       data of each grading is only computed once.
+    """
+    words = [word if isinstance(word, (SignedWord, CompactWord)) else SignedWord(word) for word in words]
+    alphabet = ''.join(sorted(set(''.join([word.letters() for word in words]))))
+
+    eils , level = [] , [""]                            # all EilWords of length at most depth
+    for _ in range(depth):
+        level = [eil + letter for eil in level for letter in alphabet]
+        eils += level
+
+    forest = CountForest([_chain(eil) for eil in eils])
+    zero   = forest.state()
+
+    results = []
+    for word in words:
+        forest.restore(zero)
+        forest.braid(word)
+
+        magnus = {eil : value for eil, value in zip(eils, forest.totals) if value != 0}
+        results.append(_lie_in_basis(_logarithm(_exponential(magnus, depth), depth), basis, short))
+
+    return results
+
+
+
+def _chain(eil):
+    """EilWord as a linear EilTree"""
+    symbol = eil[0]
+    for letter in eil[1:]:
+        symbol = f'({symbol}){letter}'
+    return EilTree(symbol)
+
+
+
+def _exponential(series, depth):
+    """Substitute X_a = exp(X_a) - 1 for each letter in a noncommuting power series truncated at degree depth
+       The coefficient of each word w in the result is scaled by len(w)! so that it is an integer.
+    """
+    result = dict()
+
+    for u, c in series.items():
+        terms = {"" : c}
+        for i, letter in enumerate(u):                  # X_a -> X_a + X_a^2/2 + X_a^3/6 + ...
+            expanded , rest = dict() , len(u) - i - 1   #  leaving room for the letters still to come
+            for w, d in terms.items():
+                for m in range(1, depth - len(w) - rest + 1):
+                    expanded[w + letter * m] = expanded.get(w + letter * m, 0) + d * math.comb(len(w) + m, m)
+            terms = expanded
+        for w, d in terms.items():
+            result[w] = result.get(w, 0) + d
+
+    return {w : c for w, c in result.items() if c != 0}
+
+
+
+def _logarithm(series, depth):
+    """Logarithm of 1 + series in noncommuting power series truncated at degree depth
+       The coefficient of each word w in series is scaled by len(w)! (as made by _exponential).  Products of
+       scaled series only need binomial coefficients, so the arithmetic is in integers until the division by
+       the power k in log(1 + x) = x - x^2/2 + x^3/3 - ...
+    """
+    common = math.lcm(*range(1, depth + 1))
+    result , power = dict(), {"" : 1}
+
+    for k in range(1, depth + 1):
+        product = dict()
+        for u, c in power.items():
+            for v, d in series.items():
+                if len(u) + len(v) <= depth:
+                    product[u+v] = product.get(u+v, 0) + c * d * math.comb(len(u) + len(v), len(u))
+        power = {w : c for w, c in product.items() if c != 0}
+        if not power:
+            break
+
+        for w, c in power.items():
+            result[w] = result.get(w, 0) + (c if k % 2 else -c) * (common // k)
+
+    return {w : Fraction(c, common * math.factorial(len(w))) for w, c in result.items() if c != 0}
+
+
+
+def _lie_in_basis(lie, basis, short):
+    """Write a Lie element (dictionary of words) in a Lie basis, one grading at a time"""
+    gradings = dict()
+    for w, c in lie.items():
+        gradings.setdefault(''.join(sorted(w)), dict())[w] = c
+
+    result = dict()
+    for grading in sorted(gradings, key=lambda grading: (len(grading), grading)):
+        part = gradings[grading]
+
+        if basis == "lyndon":                           # P_w = w + larger words, so reduce smallest words first
+            for lyndon, key, expansion in _grading_basis(grading, basis, short):
+                coeff = part.get(lyndon, 0)
+                if coeff != 0:
+                    result[key] = coeff
+                    for u, d in expansion.items():
+                        part[u] = part.get(u, 0) - coeff * d
+        else:
+            for key, expansion, diagonal in _grading_basis(grading, basis, short):
+                coeff = sum([d * part.get(u, 0) for u, d in expansion.items()])
+                if coeff != 0:
+                    result[key] = coeff if basis == "star" else coeff / diagonal
+
+    return {key : int(c) if c.denominator == 1 else c for key, c in result.items()}
+
+
+
+def _grading_basis(grading, basis, short):
+    """Basis data for one grading:  (Lyndon word, bracket, expansion) for "lyndon" in increasing order,
+       otherwise (key, expansion of star symbol, pairing of star symbol with its left-greedy bracket)
+    """
+    if basis not in ("lyndon", "left", "star"):
+        raise ValueError(f'Unknown basis {basis}')
+
+    def compute():
+        bases = grading_basis(grading)
+        if basis == "lyndon":
+            return sorted([(word, LieTree(bracket).short if short else bracket, lie_expansion(bracket))
+                           for word, bracket in zip(bases.words, bases.lyndon)])
+
+        return [(symbol if basis == "star" else LieTree(bracket).short if short else bracket,
+                 eil_expansion(symbol, top=True), diagonal)
+                for symbol, bracket, diagonal in zip(bases.star, bases.left, bases.diagonal)]
+
+    return store.get((grading, "expansions", basis, short), compute)
+
+#######################################################################
+#######################################################################
@@ -9,12 +9,16 @@
 #   EilTree( symbol string  )
 #   EilWord( assoc word     )
 #   SignedWord( signed word )
+#   CompactWord( signed word )
 #
 # See docstrings for more information on use
 #
 ##################################################################
 
-import re   # used for weakly comparing trees 
+import re     # used for weakly comparing trees and reading words
+import math   # math.prod() multiplies branch values when braiding
+
+from array import array   # CompactWord stores letter ids and signs in integer arrays
 
 
 class ValueTree():
@@ -327,31 +331,12 @@ class EilWord():
         # Counting configuration braidings in words using algorithm from [GOSW]
         #   (This algorithm is originally due to Aydin Ozbek)
         #
-        if isinstance(other, SignedWord):        # Algorithm in [GOSW]:
-            
-            sum   = [0] * len(self.value)        # s value for each eil position
-            delta = [0] * len(self.value)        # Δ value for each eil position
-            
-            for letter in other:                 # pass across the word
-                for i in range(len(self.value)): #  evaluating eil symbol from leaf to root
-                    
-                    sum[i]  += delta[i]          # 1. add Δ value to s value
-                    delta[i] = 0                 #    and set Δ to 0 
-                    
-                    value = 0                    # 2. get value of branches
-                    
-                    if self.value[i] == letter.value:   # check if update is needed
-                        if i == 0:               #    at first vertex there is no branch
-                            value = 1 
-                        else:                    #    otherwise look at value above
-                            value = sum[i-1]
-                            
-                    if not letter:               # 3. update s and Δ
-                        sum[i]  -= value         #    at inverses, immediately update s
-                    else:
-                        delta[i] = value         #    at generators, update Δ
-                        
-            return sum[-1] + delta[-1]           # Braiding value is s + Δ at root
+        if isinstance(other, (SignedWord, CompactWord)):   # Algorithm in [GOSW]:
+            counter = CountWord(self)            # s and Δ arrays for each eil position
+
+            counter.braid(other)                 # pass across the word (a whole run at a time)
+
+            return counter.total                 # Braiding value is s + Δ at root
         
         
         return NotImplemented
@@ -549,12 +534,11 @@ class EilTree(ValueTree):
         #
         # Counting configuration braidings in words using algorithm from [GOSW]
         #
-        if isinstance(other, SignedWord):
+        if isinstance(other, (SignedWord, CompactWord)):
             counter = CountTree(self)    # analog of sum and delta arrays for EilWord
-            
-            for letter in other.word:
-                counter.evaluate(letter) # evaluate the counter on each letter in the word
-                
+
+            counter.braid(other)         # evaluate the counter on each run of letters in the word
+
             return counter.total         # this is s + Δ at root
             
         
@@ -581,12 +565,12 @@ class EilTree(ValueTree):
         #    L(eil) is subsymbol
         #    R(eil) is result of excising subsymbol
         
-        for subsymbol in self:           # iterate through all subsymbols of symbol
+        for position, subsymbol in enumerate(self):   # iterate through all subsymbols of symbol
             if subsymbol & other.left:   #   weakpair with subsymbol first, since excised symbol requires computation
-                pairing += subsymbol.__pair(other.left) * self.__excise(subsymbol).__pair(other.right)
+                pairing += subsymbol.__pair(other.left) * self.__excise(position).__pair(other.right)
             
             if subsymbol & other.right:  #   weakpair with subsymbol first, since excised symbol requires computation
-                pairing -= subsymbol.__pair(other.right) * self.__excise(subsymbol).__pair(other.left)
+                pairing -= subsymbol.__pair(other.right) * self.__excise(position).__pair(other.left)
             
         return pairing
     
@@ -595,14 +579,13 @@ class EilTree(ValueTree):
                
         
        
-    def __excise(self, subsymbol):  
+    def __excise(self, position):  
         """excise is used internally to compute the symbol remaining after a subsymbol is removed
            It recursively copies a tree, skipping the excised subsymbol (and its supported subtree).
+           The subsymbol is given by its position in depth-first iteration rather than by identity, since star
+           symbols (see lieBasis.leftStar) share one subsymbol object between repetitions.
         """
         
-        #if self is subsymbol:  # This should never happen during internal recursive usage!
-        #    return EilTree()   
-        
         eil = EilTree()        # Begin with a blank node
         
         eil.decoration = self.decoration # copy the decoration
@@ -612,7 +595,12 @@ class EilTree(ValueTree):
             eil.value  = self.value
             
         else:    
-            eil.subsymbols = [symbol.__excise(subsymbol) for symbol in self.subsymbols if not symbol is subsymbol]          
+            branches , start = [], 1      # start is the position of the first node of each branch
+            for symbol in self.subsymbols:
+                if start != position:
+                    branches.append(symbol.__excise(position - start))
+                start += symbol.weight + 1
+            eil.subsymbols = branches
             
         return eil
     
@@ -727,16 +715,75 @@ class EilTree(ValueTree):
     
     def cobracket(self): 
         """returns a generator with tuples of cobracket elements"""
-        subsymbols = iter(self)
+        subsymbols = enumerate(self)
         next(subsymbols)    # the first term in the iterator is the entire symbol (skip it)
         
-        return ((subsymbol,self.__excise(subsymbol)) for subsymbol in subsymbols)
+        return ((subsymbol,self.__excise(position)) for position, subsymbol in subsymbols)
     
 ##################################################################
 ##################################################################
 
 
-class CountTree():
+class BraidCounter():
+    """BraidCounter holds the methods shared by the counters (CountTree and CountWord) used for braiding symbols on words.
+
+    Counters keep an s value and a Δ value for each vertex of a symbol.  Along a run of a single letter
+    (or along repeated copies of a block of letters) these values evolve polynomially, with degree at most
+    the number of vertices of the symbol.  So long runs are evaluated by stepping through just enough letters
+    to pin down the polynomials and then extrapolating.  Braiding costs time proportional to the number of
+    runs of a word rather than to its expanded length.
+
+    Objects of this class should only be used internally!
+    """
+
+
+    def braid(self, word):
+        """braid evaluates the counter across a SignedWord one run at a time (or across a CompactWord using letter ids)"""
+
+        if isinstance(word, CompactWord):
+            self.braid_ids(word.ids, word.signs, word.alphabet)
+            return
+
+        for base, power in word.runs:
+            if isinstance(base, SignedWord):              # power of a block (ab)^{k}
+                self.repeat(lambda: self.braid(base), power)
+
+            elif power == 1 or power == -1:               # single letter
+                self.evaluate(SignedLetter(base, power))
+
+            else:                                         # run of a single letter a^{n}
+                letter = SignedLetter(base, 1 if power > 0 else -1)
+                self.repeat(lambda: self.evaluate(letter), abs(power))
+
+
+    def repeat(self, step, n):
+        """repeat applies step() to the counter n times, extrapolating polynomially when n is large"""
+
+        degree = len(self)               # s and Δ values are polynomials of at most this degree in n
+
+        if n <= degree + 1:              # short runs: just step through them
+            for _ in range(n):
+                step()
+            return
+
+        samples = []                     # states after 1, 2, ..., degree+1 steps
+        for _ in range(degree + 1):
+            step()
+            samples.append(self.state())
+
+        # Newton's forward difference formula:   f(n) = sum_k  Δ^k f(1) * binomial(n-1,k)
+        #
+        state , binomial = [0] * len(samples[0]) , 1
+        for k in range(degree + 1):
+            state    = [x + binomial * y for x, y in zip(state, samples[0])]
+            samples  = [[y - x for x, y in zip(prev, next)] for prev, next in zip(samples, samples[1:])]
+            binomial = binomial * (n-1-k) // (k+1)
+
+        self.restore(state)
+
+
+
+class CountTree(BraidCounter):
     """CountTree is a helper class for combinatorial braiding of coLie symbols on words.
     This copies the structure of an EilTree and takes the place of the 'sum' and 'delta' arrays that were used in the __mul__ method of EilWord. 
     
@@ -792,8 +839,8 @@ class CountTree():
         if letter.value == self.eil.decoration: # check if update is needed
             if len(self.branches) == 0: #    at leaf just copy the value
                 value = 1
-            else:                       #    otherwise add values from branches
-                value = sum([branch.sum for branch in self.branches])
+            else:                       #    otherwise multiply values from branches
+                value = math.prod([branch.sum for branch in self.branches])
             
             
         if not letter:                  # 3. at inverses, immediately update s
@@ -802,12 +849,62 @@ class CountTree():
             self.delta  = value
         
  
+    def state(self):
+        """state lists the s and Δ values of all nodes (leaf to root)"""
+        return [value for node in self for value in (node.sum, node.delta)]
+    
+    
+    def restore(self, state):
+        """restore sets the s and Δ values of all nodes from a list made by state()"""
+        for n, node in enumerate(self):
+            node.sum, node.delta = state[2*n], state[2*n+1]
 
-    ###################
-    #
-    # Interesting things that aren't currently used
-    #
+
+    def braid_ids(self, ids, signs, alphabet, record=None):
+        """braid_ids evaluates the counter across parallel arrays of letter ids and signs (see CompactWord)
+           The tree is flattened into arrays (leaf to root), and at each letter only the nodes decorated by that letter
+           are updated -- the Δ values set at the previous letter are the only others that change.
+           If record is a list, the total after each letter is appended to it (braiding values of all prefixes).
+        """
+        nodes    = list(self)                                  # leaf to root
+        index    = {id(node) : n for n, node in enumerate(nodes)}
+        branches = [[index[id(branch)] for branch in node.branches] for node in nodes]
+
+        where = dict()                                         # letter id -> nodes decorated by letter
+        for n, node in enumerate(nodes):
+            where.setdefault(alphabet.find(node.eil.decoration) if node.eil.decoration else -1, []).append(n)
+
+        sum , delta = [node.sum for node in nodes] , [node.delta for node in nodes]
+        pending = [n for n in range(len(nodes)) if delta[n]]  # Δ values waiting to be added to s
+
+        for letter, sign in zip(ids, signs):
+            for n in pending:                  # 1. add Δ to s and set Δ = 0
+                sum[n] += delta[n]
+                delta[n] = 0
+            pending = ()
+
+            if letter in where:                # 2. incorporate values from branches (leaf to root)
+                if sign > 0:                   #    at generators, update Δ
+                    for n in where[letter]:
+                        delta[n] = math.prod([sum[b] for b in branches[n]])
+                    pending = where[letter]
+                else:                          #    at inverses, immediately update s
+                    for n in where[letter]:
+                        sum[n]  -= math.prod([sum[b] for b in branches[n]])
+
+            if record is not None:
+                record.append(sum[-1] + delta[-1])
+
+        self.restore([value for n in range(len(nodes)) for value in (sum[n], delta[n])])
+
+
+    def __len__(self):
+        """len is the number of vertices of the symbol"""
+        return len(self.eil)
+    
+    
     def __iter__(self):
+        """Iterate through nodes leaf to root"""
         for branch in self.branches:
             for twig in branch:
                 yield twig          
@@ -815,6 +912,115 @@ class CountTree():
 
 
 
+class CountWord(BraidCounter):
+    """CountWord is a helper class for combinatorial braiding of linear symbols (EilWords) on words.
+    This holds the 'sum' and 'delta' arrays used in the __mul__ method of EilWord, and is the linear analog of CountTree.
+    
+    Objects of this class should only be used internally!
+    
+    Parameters
+    ----------
+    eil : EilWord
+       the linear symbol to braid
+       
+    Attributes
+    ----------
+    sum   : list of integers
+       current s value for each eil position (initialized to 0)
+    delta : list of integers
+       current Δ value for each eil position (initialized to 0)
+    eil   : EilWord
+       the linear symbol
+    total : integer
+       sum + delta at the root (last position)
+    """
+    
+    
+    def __init__(self,eil):
+        self.eil   = eil
+        self.sum   = [0] * len(eil.value)     # s value for each eil position
+        self.delta = [0] * len(eil.value)     # Δ value for each eil position
+        
+        
+    @property 
+    def total(self):
+        return self.sum[-1] + self.delta[-1]
+    
+    
+    def evaluate(self,letter):
+        """evaluate updates the s and Δ arrays at the given letter following the algorithm outlined in [GOSW]"""
+        
+        word , sum , delta = self.eil.value , self.sum , self.delta
+        
+        for i in range(len(word)):       # evaluating eil symbol from leaf to root
+            
+            sum[i]  += delta[i]          # 1. add Δ value to s value
+            delta[i] = 0                 #    and set Δ to 0 
+            
+            value = 0                    # 2. get value of branches
+            
+            if word[i] == letter.value:  # check if update is needed
+                if i == 0:               #    at first vertex there is no branch
+                    value = 1 
+                else:                    #    otherwise look at value above
+                    value = sum[i-1]
+                    
+            if not letter:               # 3. update s and Δ
+                sum[i]  -= value         #    at inverses, immediately update s
+            else:
+                delta[i] = value         #    at generators, update Δ
+                
+                
+    def state(self):
+        """state lists the s values then the Δ values"""
+        return self.sum + self.delta
+    
+    
+    def restore(self, state):
+        """restore sets the s and Δ arrays from a list made by state()"""
+        n = len(self.sum)
+        self.sum , self.delta = list(state[:n]) , list(state[n:])
+
+
+    def braid_ids(self, ids, signs, alphabet, record=None):
+        """braid_ids evaluates the counter across parallel arrays of letter ids and signs (see CompactWord)
+           At each letter only the eil positions holding that letter are updated -- the Δ values set at the
+           previous letter are the only others that change.
+           If record is a list, the total after each letter is appended to it (braiding values of all prefixes).
+        """
+        word , sum , delta = self.eil.value , self.sum , self.delta
+
+        where = dict()                           # letter id -> eil positions holding letter
+        for i in range(len(word)):
+            where.setdefault(alphabet.find(word[i]), []).append(i)
+
+        pending = [i for i in range(len(word)) if delta[i]]   # Δ values waiting to be added to s
+
+        for letter, sign in zip(ids, signs):
+            for i in pending:                    # 1. add Δ value to s value and set Δ to 0
+                sum[i]  += delta[i]
+                delta[i] = 0
+            pending = ()
+
+            if letter in where:                  # 2. get value of branches (first vertex has none)
+                if sign > 0:                     # 3. at generators, update Δ
+                    for i in where[letter]:
+                        delta[i] = sum[i-1] if i else 1
+                    pending = where[letter]
+                else:                            #    at inverses, immediately update s
+                    for i in where[letter]:
+                        sum[i]  -= sum[i-1] if i else 1
+
+            if record is not None:
+                record.append(sum[-1] + delta[-1])
+
+
+    def __len__(self):
+        """len is the number of vertices of the symbol"""
+        return len(self.sum)
+
+
+
 ##################################################################
 ##################################################################
 
@@ -870,60 +1076,370 @@ class SignedLetter():
 
 
 class SignedWord():
-    """SignedWord is a list of SignedLetters
+    """SignedWord is a run-length encoded list of SignedLetters
     
     Parameters
     ----------
-    word : string or list
+    word : string, list, or SignedWord
+        Letters may be raised to integer powers, as may parenthesized subwords.
     
     Examples: 
      SignedWord("aba^{-1}b^{-1}")
      SignedWord("aba-b-")
+     SignedWord("a^{1000} b^{-3} (ab)^{50}")
      SignedWord( [ ("a",1), ("b",1), ("a",-1), ("b",-1) ] )
+     SignedWord( [ ("a",1000), ("b",-3) ] )
+     SignedWord( CompactWord("aba-b-") )
     
     Attributes
     ----------
+    runs : list of (base, power) pairs
+        base is a letter, or a SignedWord for powers of subwords such as (ab)^{50}
+        power is a nonzero integer (always positive when base is a SignedWord)
     word : list of SignedLetters
+        The expanded word.  Avoid this for words with large powers!
     """
+    
+    _power = re.compile(r'\^\s*\{?\s*([+-]?\d+)\s*\}?')   # exponents a^{-12}, a^12, a^{3}, ...
+    
+    
     def __init__(self,word):
-        self.word = []
+        self.runs = []
         
         if isinstance(word, str):
-            i = 0
-            while i < len(word):
-                if i+1 < len(word) and (word[i+1] == "-" or word[i+1] == "^"):
-                    self.word.append(SignedLetter(word[i],-1))
-                else:
-                    self.word.append(SignedLetter(word[i], 1))
-                i += 1
+            for base, power in self.__parse(word, 0)[0]:
+                self.__append(base, power)
                 
-                while i < len(word) and not word[i].isalpha():
-                    i += 1
+        elif isinstance(word, SignedWord):
+            self.runs = list(word.runs)
+            
+        elif isinstance(word, CompactWord):
+            for x in word:
+                self.__append(x.value, int(x))
+            
         elif isinstance(word, list):
-            if isinstance(word[0], SignedLetter):
-                self.word = word
-            else:    
-                self.word = [SignedLetter(x[0],x[1]) for x in word]
+            for x in word:
+                if isinstance(x, SignedLetter):
+                    self.__append(x.value, int(x))
+                elif isinstance(x[1], int) and not isinstance(x[1], bool):
+                    self.__append(x[0], x[1])                        # (letter, power)
+                else:    
+                    self.__append(x[0], int(SignedLetter(x[0],x[1]))) # (letter, sign)
         else:
             raise ValueError("Word format not recognized!")
             
+            
+    def __parse(self, word, i):
+        """parse is used internally to read (base, power) runs from a string, starting at position i
+           It stops at the end of the string or at a closing parenthesis, returning the runs and the stopping position.
+        """
+        runs = []
+        
+        while i < len(word) and word[i] != ")":
+            if word[i] == "(":                       # parenthesized subword
+                block = SignedWord([])
+                subruns , i = self.__parse(word, i+1)
+                for base, power in subruns:
+                    block.__append(base, power)
+                runs.append([block, 1])
+                i += 1                               # advance past )
+                
+            elif word[i].isalpha():                  # letter
+                runs.append([word[i], 1])
+                i += 1
+                
+            else:                                    # skip anything else
+                i += 1
+                continue
+                
+            while i < len(word) and word[i].isspace():
+                i += 1
+                
+            if i < len(word) and word[i] == "-":     # lazy inverse a-
+                runs[-1][1] = -1
+                i += 1
+                
+            elif i < len(word) and word[i] == "^":   # power a^{n}  (a^ alone is an inverse)
+                power = SignedWord._power.match(word, i)
+                if power:
+                    runs[-1][1] = int(power.group(1))
+                    i = power.end()
+                else:
+                    runs[-1][1] = -1
+                    i += 1
+                    
+        return runs , i
+    
+    
+    def __append(self, base, power):
+        """append is used internally to add a run to the end of the word, merging it with the last run if possible"""
+        
+        if power == 0:
+            return
+        
+        if isinstance(base, SignedWord):
+            if power < 0:                        # (ab)^{-k} = (b^{-1}a^{-1})^{k}
+                base , power = base.inverse() , -power
+                
+            if len(base.runs) == 0:
+                return
+            
+            if len(base.runs) == 1:              # (a^{m})^{k} = a^{mk}
+                self.__append(base.runs[0][0], base.runs[0][1] * power)
+                return
+            
+        elif self.runs and self.runs[-1][0] == base and (self.runs[-1][1] > 0) == (power > 0):
+            self.runs[-1] = (base, self.runs[-1][1] + power)   # a^{m}a^{n} = a^{m+n}
+            return
+        
+        self.runs.append((base, power))
+        
+        
+    def inverse(self):
+        """Inverse word, reversing the runs and negating their powers"""
+        inverse = SignedWord([])
+        
+        for base, power in reversed(self.runs):
+            if isinstance(base, SignedWord):
+                inverse.runs.append((base.inverse(), power))
+            else:
+                inverse.runs.append((base, -power))
+                
+        return inverse
+    
+    
+    @property
+    def word(self):
+        return list(self)
+    
 
     def __len__(self):
-        return len(self.word)
+        return sum([abs(power) * (len(base) if isinstance(base, SignedWord) else 1) for base, power in self.runs])
             
     def __str__(self):
-        return ''.join([str(x) for x in self.word])
+        superscript = str.maketrans("-0123456789", "\N{SUPERSCRIPT MINUS}⁰¹²³⁴⁵⁶⁷⁸⁹")
+        
+        return ''.join([(f'({base})' if isinstance(base, SignedWord) else base) + 
+                        ('' if power == 1 else str(power).translate(superscript)) for base, power in self.runs])
 
     def __repr__(self):
-        return 'SignedWord("' + ''.join([x.short() for x in self.word]) + '")'
+        return f'SignedWord("{self.short()}")'
+    
+    def short(self):
+        """Short version of word in the lazy notation, with powers as ^{n}"""
+        return ''.join([(f'({base.short()})' if isinstance(base, SignedWord) else base) +
+                        ('' if power == 1 else '-' if power == -1 else f'^{{{power}}}') for base, power in self.runs])
     
     def __hash__(self):
-        return hash(''.join([x.short() for x in self.word]))
+        return hash(self.short())
         
     def __iter__(self):
-        return iter(self.word)      
+        """Iterate through the (expanded) SignedLetters of the word"""
+        for base, power in self.runs:
+            for _ in range(abs(power)):
+                if isinstance(base, SignedWord):
+                    yield from base
+                else:
+                    yield SignedLetter(base, 1 if power > 0 else -1)
 
     def letters(self):
-        return ''.join(sorted(set([letter.value for letter in self.word])))
+        return ''.join(sorted(set(''.join([base.letters() if isinstance(base, SignedWord) else base for base, _ in self.runs]))))
+    
+##################################################################
+
+
+class CompactWord():
+    """CompactWord is a signed word stored as parallel integer arrays of letter ids and signs
+      This uses a few bytes per letter (rather than a SignedLetter object per letter) and EilWord and EilTree 
+      braiding runs directly on the arrays.  Slices and inverses share the arrays of the original word where possible.
+    
+    Parameters
+    ----------
+    word     : string, SignedWord, CompactWord, or list   (default "")
+        The word, in any format accepted by SignedWord.  Powers are expanded.
+    alphabet : string   (default: the sorted letters of the word)
+        The letters, in order of their ids
+    
+    Examples: 
+     CompactWord("aba-b-")
+     CompactWord("a^{-1}b^{3}")
+     CompactWord.frombuffer(array('i',[0,1,0,1]), "ab", array('b',[1,1,-1,-1]))
+     CompactWord.frombuffer(bytes([1,2,255,254]), "ab")
+    
+    Attributes
+    ----------
+    ids      : integer array or memoryview
+        Letter ids (positions of letters in the alphabet)
+    signs    : integer array or memoryview
+        1 for generators and -1 for inverses
+    alphabet : string
+        The letters, in order of their ids
+    """
+    
+    _letter = re.compile(r'([^\W\d_])\s*(\^\s*\{?\s*([+-]?\d+)\s*\}?|\^|-)?')  # letter with optional power
+    
+    
+    def __init__(self, word="", alphabet=None):
+        
+        if isinstance(word, CompactWord):
+            self.ids , self.signs = word.ids , word.signs
+            self.alphabet = word.alphabet
+            if alphabet is not None and alphabet != word.alphabet:
+                self.ids , self.alphabet = self.__relabel(alphabet) , alphabet
+            return
+        
+        if isinstance(word, str) and "(" not in word:      # fast path: scan letters and powers with one regex
+            runs = [(letter, -1 if power and not exponent else int(exponent) if exponent else 1) 
+                    for letter, power, exponent in CompactWord._letter.findall(word)]
+        else:
+            runs = SignedWord(word).runs
+            
+        letters = set()
+        for base, _ in runs:
+            letters.update(base.letters() if isinstance(base, SignedWord) else base)
+            
+        self.alphabet = ''.join(sorted(letters)) if alphabet is None else alphabet
+        index = {letter : n for n, letter in enumerate(self.alphabet)}
+        
+        if any([letter not in index for letter in letters]):
+            raise ValueError("Word uses letters missing from the alphabet!")
+        
+        if all([not isinstance(base, SignedWord) and (power == 1 or power == -1) for base, power in runs]):
+            self.ids   = array('i', [index[base] for base, _ in runs])
+            self.signs = array('b', [power for _, power in runs])
+            return
+        
+        self.ids , self.signs = array('i') , array('b')
+        for base, power in runs:
+            if isinstance(base, SignedWord):          # expand powers of subwords
+                block = CompactWord(base, self.alphabet)
+                self.ids.extend(array('i', block.ids) * power)
+                self.signs.extend(array('b', block.signs) * power)
+            elif power != 0:
+                self.ids.extend(array('i', [index[base]]) * abs(power))
+                self.signs.extend(array('b', [1 if power > 0 else -1]) * abs(power))
+                
+                
+    @classmethod
+    def frombuffer(cls, ids, alphabet, signs=None):
+        """Make a CompactWord from objects supporting the buffer protocol (arrays, bytes, mmap, ...)
+           With signs, ids are letter ids and signs are ±1 -- the buffers are used without copying.
+           Without signs, ids are signed codes ±(id+1) such as signed bytes.
+        """
+        word = cls.__new__(cls)
+        word.alphabet = alphabet
+        
+        ids = memoryview(ids)
+        if ids.format == 'B' and signs is None:     # unsigned bytes hold signed codes
+            ids = ids.cast('b')
+            
+        if signs is None:
+            word.ids   = array('i', [abs(code) - 1 for code in ids])
+            word.signs = array('b', [1 if code > 0 else -1 for code in ids])
+        else:
+            signs = memoryview(signs)
+            word.ids , word.signs = ids , signs.cast('b') if signs.format == 'B' else signs
+            
+        if len(word.ids) != len(word.signs):
+            raise ValueError("Letter ids and signs have different lengths!")
+            
+        return word
+    
+    
+    def __relabel(self, alphabet):
+        """relabel is used internally to get ids of letters in a different alphabet"""
+        index = {letter : n for n, letter in enumerate(alphabet)}
+        
+        if any([letter not in index for letter in self.letters()]):
+            raise ValueError("Word uses letters missing from the alphabet!")
+            
+        table = [index.get(letter, -1) for letter in self.alphabet]
+        return array('i', [table[n] for n in self.ids])
+    
+    
+    def reduce(self):
+        """Freely reduced word, cancelling adjacent generator/inverse pairs using a stack"""
+        ids , signs = array('i') , array('b')
+        
+        for letter, sign in zip(self.ids, self.signs):
+            if ids and ids[-1] == letter and signs[-1] == -sign:
+                ids.pop()
+                signs.pop()
+            else:
+                ids.append(letter)
+                signs.append(sign)
+                
+        return CompactWord.frombuffer(ids, self.alphabet, signs)
+    
+    
+    def inverse(self):
+        """Inverse word.  The ids are a reversed view of the original ids -- only the signs are copied."""
+        signs = array('b', memoryview(self.signs)[::-1])
+        for n in range(len(signs)):
+            signs[n] = -signs[n]
+            
+        return CompactWord.frombuffer(memoryview(self.ids)[::-1], self.alphabet, signs)
+    
+    
+    def __mul__(self, other):
+        """Multiplication is concatenation of words"""
+        if not isinstance(other, CompactWord):
+            return NotImplemented
+        
+        if len(other) == 0:
+            return self
+        if len(self) == 0:
+            return other
+        
+        if other.alphabet == self.alphabet:
+            ids , alphabet = array('i', self.ids) , self.alphabet
+            ids.extend(other.ids)
+        else:
+            alphabet = ''.join(sorted(set(self.alphabet + other.alphabet)))
+            ids = self.__relabel(alphabet) + other.__relabel(alphabet)
+            
+        signs = array('b', self.signs)
+        signs.extend(other.signs)
+        
+        return CompactWord.frombuffer(ids, alphabet, signs)
+    
+    
+    def __pow__(self, n):
+        """Powers of words, with negative powers using the inverse"""
+        if n < 0:
+            return self.inverse() ** -n
+        
+        return CompactWord.frombuffer(array('i', self.ids) * n, self.alphabet, array('b', self.signs) * n)
+    
+    
+    def __getitem__(self, key):
+        """Slices are views sharing the arrays of the word"""
+        if isinstance(key, slice):
+            return CompactWord.frombuffer(memoryview(self.ids)[key], self.alphabet, memoryview(self.signs)[key])
+        
+        return SignedLetter(self.alphabet[self.ids[key]], self.signs[key])
+    
+    
+    def __len__(self):
+        return len(self.ids)
+    
+    def __iter__(self):
+        """Iterate through SignedLetters of the word"""
+        return (SignedLetter(self.alphabet[letter], sign) for letter, sign in zip(self.ids, self.signs))
+    
+    def __str__(self):
+        return ''.join([str(x) for x in self])
+
+    def __repr__(self):
+        return f'CompactWord("{self.short()}")'
+    
+    def short(self):
+        return ''.join([x.short() for x in self])
+    
+    def __hash__(self):
+        return hash(self.short())
+    
+    def letters(self):
+        return ''.join([self.alphabet[n] for n in sorted(set(self.ids))])
     
 ##################################################################
@@ -0,0 +1,213 @@
+##################################################################
+#
+# Iterated cobrackets of coLie symbols as sparse tensors
+#  © 2024 Benjamin Walter <benjamin.walter@uvi.edu>
+#
+# Included classes:
+#   SymbolTensor( terms, alphabet )
+#
+# Included functions:
+#   cobracket( symbol )
+#   iterated_cobracket( symbol, k )
+#
+# See docstrings for more information on use
+#
+##################################################################
+
+import functools     # cobrackets of canonical symbols are memoized
+
+from coLie import EilTree, EilWord
+from intAlphabet import Alphabet, symbol_word, pair, _cuts
+
+
+#######################################################################
+#######################################################################
+# The cobracket of a symbol is the sum over its subsymbols L of  L ⊗ R - R ⊗ L,  where R is the symbol left
+# after excising L (dual to the Lie bracket:  < s , [X,Y] > = < ]s[ , X ⊗ Y >).  Iterating on the first factor
+#     ]s[^k = (]·[ ⊗ id ⊗ ... ⊗ id) ]s[^(k-1)
+# reaches full depth at k = weight, where every factor is a single letter and the coefficient of x1 ⊗ ... ⊗ xn
+# is the pairing of s with the left-normed bracket [[...[x1,x2],...],xn].
+#
+# Symbols are written with integer generators as canonical tuples (see intAlphabet), whose cuts are memoized,
+# and  ]s[^k = sum over terms c L ⊗ R of  c ]L[^(k-1) ⊗ R  is memoized for each canonical subsymbol L and depth.
+# Equal terms are combined at each depth, so the number of terms is at most the number of distinct tensors.
+#######################################################################
+
+_letters = Alphabet(52)        # symbols given as EilTrees, EilWords or strings use letters a..zA..Z
+
+
+class SymbolTensor():
+    """SymbolTensor is a sparse tensor of coLie symbols (canonical tuples, see intAlphabet) with integer coefficients
+
+    Parameters
+    ----------
+    terms    : dictionary { tuple of symbols : coefficient }
+    alphabet : Alphabet   (default: letters a..zA..Z)
+         Names of generators, for printing
+    order    : integer    (default: length of the tuples of terms)
+         Number of tensor factors (needed when there are no terms)
+
+    Example
+    -------
+    tensor = iterated_cobracket(EilTree("((a)b)(a)b"), 2)
+    len(tensor) , tensor.order
+    tensor.pair(LieTree("[a,b]"), LieTree("a"), LieTree("b"))
+
+    Attributes
+    ----------
+    symbols : list of symbols
+         Distinct symbols appearing in factors (the index table)
+    entries : dictionary { tuple of indices into symbols : coefficient }
+    order   : integer
+         Number of tensor factors
+    """
+
+    def __init__(self, terms, alphabet=None, order=None):
+        self.alphabet = _letters if alphabet is None else alphabet
+        self.entries  = dict()
+        self.order    = len(next(iter(terms))) if terms else order or 0
+
+        index = dict()
+        for factors, c in terms.items():
+            if c != 0:
+                key = tuple([index.setdefault(s, len(index)) for s in factors])
+                self.entries[key] = c
+        self.symbols = list(index)
+
+
+    def __getitem__(self, factors):
+        """Coefficient of a tensor of symbols"""
+        index = {s : n for n, s in enumerate(self.symbols)}
+        if any([s not in index for s in factors]):
+            return 0
+        return self.entries.get(tuple([index[s] for s in factors]), 0)
+
+
+    def items(self):
+        """Pairs (tuple of symbols, coefficient)"""
+        return ((tuple([self.symbols[i] for i in key]), c) for key, c in self.entries.items())
+
+
+    def __iter__(self):
+        return self.items()
+
+
+    def __len__(self):
+        return len(self.entries)
+
+
+    def pair(self, *brackets):
+        """Pairing with a tensor of Lie brackets (integer form, LieTree or string, one per factor)"""
+        if len(brackets) != self.order:
+            raise ValueError(f'Pairing a tensor of order {self.order} needs {self.order} brackets')
+
+        brackets = [b if isinstance(b, (int, tuple)) else self.alphabet.bracket(str(b)) for b in brackets]
+        values   = [dict() for _ in brackets]                 # pairings of each symbol with each bracket
+
+        total = 0
+        for key, c in self.entries.items():
+            product = c
+            for n, i in enumerate(key):
+                if i not in values[n]:
+                    values[n][i] = pair(self.symbols[i], brackets[n])
+                product *= values[n][i]
+                if product == 0:
+                    break
+            total += product
+        return total
+
+
+    def __str__(self):
+        if not self.entries:
+            return "0"
+        string = ""
+        for factors, c in self.items():
+            string += (" - " if c < 0 else " + ") if string else ("-" if c < 0 else "")
+            string += ("" if abs(c) == 1 else f'{abs(c)} ') + ' ⊗ '.join([self.alphabet.name(s) for s in factors])
+        return string
+
+
+    def __repr__(self):
+        return f'SymbolTensor of order {self.order} with {len(self)} terms'
+
+
+
+def _canonical(symbol, alphabet):
+    """Canonical tuple of an EilTree, EilWord, string, word (tuple of generators) or symbol tuple"""
+    if isinstance(symbol, EilTree):
+        return alphabet.symbol(symbol.value)
+    if isinstance(symbol, EilWord):
+        return symbol_word(alphabet.encode(symbol.value))
+    if isinstance(symbol, str):
+        return alphabet.symbol(symbol) if "(" in symbol else symbol_word(alphabet.encode(symbol))
+    if all([isinstance(x, int) for x in symbol]):
+        return symbol_word(tuple(symbol))
+    return symbol
+
+
+
+@functools.lru_cache(maxsize=1 << 16)
+def _cobracket(symbol, antisymmetric):
+    """Cobracket of a canonical symbol as a dictionary { (L, R) : coefficient }  (don't modify it!)"""
+    terms = dict()
+    for sub, excised, count in _cuts(symbol):
+        terms[(sub, excised)] = terms.get((sub, excised), 0) + count
+        if antisymmetric:
+            terms[(excised, sub)] = terms.get((excised, sub), 0) - count
+    return {key : c for key, c in terms.items() if c != 0}
+
+
+
+@functools.lru_cache(maxsize=1 << 16)
+def _iterated(symbol, k, antisymmetric):
+    """k-fold iterated cobracket of a canonical symbol as a dictionary { tuple of symbols : coefficient }  (don't modify it!)"""
+    if k == 0:
+        return {(symbol,) : 1}
+
+    terms = dict()
+    for (left, right), c in _cobracket(symbol, antisymmetric).items():
+        for factors, d in _iterated(left, k-1, antisymmetric).items():
+            key = factors + (right,)
+            terms[key] = terms.get(key, 0) + c * d
+    return {key : c for key, c in terms.items() if c != 0}
+
+
+
+def iterated_cobracket(symbol, k=None, antisymmetric=True, alphabet=None):
+    """k-fold iterated (reduced) cobracket of a coLie symbol, cutting the first tensor factor each time
+
+       Arguments:
+       ----------
+        symbol        : EilTree, EilWord, string, or integer form (see intAlphabet)
+        k             : integer  [weight of the symbol -- full depth]
+        antisymmetric : boolean  [True]
+           Use the cobracket L ⊗ R - R ⊗ L dual to the Lie bracket (False gives only the terms L ⊗ R,
+           like EilTree.cobracket())
+        alphabet      : Alphabet  [letters a..zA..Z]
+           Names of generators for symbols given as strings
+
+       Result:
+       -------
+        SymbolTensor of order k+1
+    """
+    alphabet = _letters if alphabet is None else alphabet
+    symbol   = _canonical(symbol, alphabet)
+
+    if k is None:
+        k = _weight(symbol)
+
+    return SymbolTensor(_iterated(symbol, k, antisymmetric), alphabet, k+1)
+
+
+
+def cobracket(symbol, antisymmetric=True, alphabet=None):
+    """Cobracket of a coLie symbol as a SymbolTensor of order 2 (see iterated_cobracket)"""
+    return iterated_cobracket(symbol, 1, antisymmetric, alphabet)
+
+
+
+def _weight(symbol):
+    return sum([_weight(subsymbol) + 1 for subsymbol in symbol[1:]])
+
+#######################################################################
+#######################################################################
@@ -0,0 +1,67 @@
+##################################################################
+#
+# The coLie modules as one package (names are imported when first used)
+#  © 2024 Benjamin Walter <benjamin.walter@uvi.edu>
+#
+# Use:
+#   import colie
+#   colie.EilTree("((a)b)a") * colie.LieTree("[[a,b],a]")
+#
+#   python -m colie --help            (command line interface, see colie/cli.py)
+#
+#   from colie import jobs as colie_jobs
+#   await colie_jobs.pairing_matrix("aaabbc")     (asyncio jobs run by background processes, see colie/jobs.py)
+#
+# See docstrings for more information on use
+#
+##################################################################
+
+import importlib     # modules are imported when one of their names is first used
+
+
+#######################################################################
+#######################################################################
+# The modules of this project live next to this package (they import each other by their own names), so
+# the package only lists where each name comes from.  A module is imported the first time one of its names
+# is used, so importing the package is cheap and runs none of the modules.
+#######################################################################
+
+_exports = { "coLie"        : ["LieTree", "EilTree", "EilWord", "SignedLetter", "SignedWord", "CompactWord",
+                               "CountTree", "CountWord"],
+             "lieBasis"     : ["genLS", "factorLS", "bracketStd", "bracketLeft", "bracketRight", "bracketCfg",
+                               "bracketChib", "symbolStar", "leftStar", "bracket_to_left"],
+             "basisCache"   : ["GradingBasis", "BasisCache", "LRUCache", "grading_basis"],
+             "basisStore"   : ["GradingFile", "CSRMatrix", "BasisStore", "write_grading", "encode_grading", "read_stream"],
+             "pairingPool"  : ["SharedMatrix", "pairing_matrix"],
+             "braiding"     : ["BraidStream", "CountForest", "braid_file", "braid_prefixes", "braid_windows",
+                               "braid_words", "eil_expansion", "lcs_depth", "lie_expansion", "word_to_lie", "words_to_lie"],
+             "liePoly"      : ["LiePolynomial", "pbw_expand", "pbw_product"],
+             "assocPoly"    : ["dynkin", "lie_projection", "is_lie", "homogeneous_parts"],
+             "intAlphabet"  : ["Alphabet"],
+             "lieGraph"     : ["LieGraph"],
+             "cobracket"    : ["SymbolTensor", "cobracket", "iterated_cobracket"],
+             "instrument"   : ["instrument"],
+             "lieQuotient"  : ["LieQuotient"],
+             "nilpotent"    : ["NilpotentElement", "nilpotent_basis"],
+             "symbolBasis"  : ["symbol_to_basis", "symbols_to_basis"] }
+
+_modules = {name : module for module, names in _exports.items() for name in names}
+
+__all__ = sorted(_modules)
+
+
+def __getattr__(name):
+    """Import the module of a name when it is first used"""
+    if name not in _modules:
+        raise AttributeError(f"module 'colie' has no attribute '{name}'")
+
+    value = getattr(importlib.import_module(_modules[name]), name)
+    globals()[name] = value              # later uses don't come back here
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_modules))
+
+#######################################################################
+#######################################################################
@@ -0,0 +1,12 @@
+##################################################################
+#
+# python -m colie  runs the command line interface (see colie/cli.py)
+#  © 2024 Benjamin Walter <benjamin.walter@uvi.edu>
+#
+##################################################################
+
+import sys
+
+from colie.cli import main
+
+sys.exit(main())
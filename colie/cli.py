@@ -0,0 +1,319 @@
+##################################################################
+#
+# Command line interface:  python -m colie <command> ...
+#  © 2024 Benjamin Walter <benjamin.walter@uvi.edu>
+#
+# Commands:
+#   words    Lyndon words of gradings
+#   basis    left-greedy, star and standard bases of gradings
+#   matrix   pairing matrices of gradings
+#   convert  Lie brackets in the left-greedy or standard (Lyndon) basis
+#   braid    braiding values of symbols on words stored in files
+#
+# Included functions:
+#   main( argv )
+#
+# See docstrings (and python -m colie <command> --help) for more information on use
+#
+##################################################################
+
+import os      # resumed output files are truncated to their last finished task
+import sys
+import json
+import argparse
+import functools
+import itertools
+
+
+#######################################################################
+#######################################################################
+# Each command is split into tasks (one for each grading, file, or chunk of brackets) which return their output
+# as bytes:  lines of JSON, or the binary format of basisStore (files of gradings written one after another, see
+# basisStore.read_stream).  With --jobs N the tasks are run by a pool of N processes, and their outputs are
+# written in order as they finish, so the output is the same for any number of jobs.
+#
+# With --output PATH, a journal PATH.done records each finished task and the length of the output after it.
+# A run with --resume truncates the output to the end of its last finished task and skips finished tasks, and
+# braiding a long file continues from its checkpoint (see braiding.braid_file).
+#
+# The modules doing the work are imported by the tasks, so the interface itself starts quickly.
+#######################################################################
+
+def main(argv=None):
+    """Run the command line interface (python -m colie --help)
+
+       Arguments:
+       ----------
+        argv : list of strings  [sys.argv[1:]]
+
+       Result:
+       -------
+        exit status
+    """
+    parser = _parser()
+    args   = parser.parse_args(argv)
+
+    if args.resume and args.output is None:
+        parser.error("--resume needs --output")
+
+    if args.command in ("words", "basis", "matrix"):
+        tasks = [(grading, grading) for grading in _gradings(parser, args)]
+    elif args.command == "convert":
+        tasks = _brackets(args)
+    else:
+        tasks = [(path, (n, path)) for n, path in enumerate(args.files)]
+
+    try:
+        _run(args, tasks, _tasks[args.command])
+    except BrokenPipeError:                      # output piped into head, etc.
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 1
+
+    return 0
+
+
+
+def _parser():
+    """The argument parser of all commands"""
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--jobs", "-j", type=int, default=1, metavar="N", help="number of worker processes [1]")
+    common.add_argument("--output", "-o", metavar="PATH", help="write to a file (with a journal PATH.done) instead of stdout")
+    common.add_argument("--resume", action="store_true", help="continue an interrupted run writing to --output")
+
+    gradings = argparse.ArgumentParser(add_help=False)
+    gradings.add_argument("gradings", nargs="*", help="gradings (letters with multiplicities), such as aabbc")
+    gradings.add_argument("--weight", type=int, metavar="N", help="all gradings of N letters (from --letters)")
+    gradings.add_argument("--letters", default="ab", help="letters of gradings given by --weight [ab]")
+
+    binary = argparse.ArgumentParser(add_help=False)
+    binary.add_argument("--format", choices=("jsonl", "binary"), default="jsonl",
+                        help="lines of JSON, or grading files of basisStore one after another [jsonl]")
+
+    parser = argparse.ArgumentParser(prog="python -m colie", description="Lie algebra and Lie coalgebra computations")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("words", parents=[common, gradings], help="Lyndon words of gradings")
+
+    commands.add_parser("basis", parents=[common, gradings, binary], help="left-greedy, star and standard bases of gradings")
+
+    matrix = commands.add_parser("matrix", parents=[common, gradings, binary], help="pairing matrices of gradings")
+    matrix.add_argument("--rows", choices=("star", "words"), default="star",
+                        help="star symbols or Lyndon EilWords [star]")
+    matrix.add_argument("--columns", choices=("left", "lyndon"), default="left",
+                        help="left-greedy or standard brackets [left]")
+
+    convert = commands.add_parser("convert", parents=[common], help="Lie brackets in the left-greedy or standard basis")
+    convert.add_argument("brackets", nargs="*", help="Lie brackets, such as [[a,b],[a,c]]")
+    convert.add_argument("--input", "-i", metavar="PATH", help="file of brackets, one on each line (- for stdin)")
+    convert.add_argument("--basis", choices=("left", "lyndon"), default="left", help="basis to write brackets in [left]")
+    convert.add_argument("--short", action="store_true", help="write brackets without commas")
+    convert.add_argument("--chunk", type=int, default=1000, help="brackets in each task [1000]")
+
+    braid = commands.add_parser("braid", parents=[common], help="braiding values of symbols on words stored in files")
+    braid.add_argument("files", nargs="+", help="files of words")
+    braid.add_argument("--symbol", "-s", action="append", required=True, dest="symbols",
+                       help="symbol (EilTree or EilWord) to braid, may be repeated")
+    braid.add_argument("--lines", action="store_true",
+                       help="each line of a file is a word (words are braided together, sharing prefixes)")
+    braid.add_argument("--binary", metavar="TYPECODE", help="files hold binary codes of this array typecode")
+    braid.add_argument("--alphabet", help="letters in order of their ids (for --binary)")
+
+    return parser
+
+
+
+def _gradings(parser, args):
+    """Gradings given as arguments and by --weight"""
+    gradings = [''.join(sorted(grading)) for grading in args.gradings]
+
+    if args.weight is not None:
+        letters = sorted(set(args.letters))
+        gradings += [''.join(grading) for grading in itertools.combinations_with_replacement(letters, args.weight)]
+
+    if not gradings:
+        parser.error("give gradings or --weight")
+
+    return list(dict.fromkeys(gradings))       # drop repetitions, keeping the order
+
+
+
+def _brackets(args):
+    """Tasks of chunks of brackets (keyed by the position of their first bracket)"""
+    brackets = list(args.brackets)
+
+    if args.input is not None:
+        file = sys.stdin if args.input == "-" else open(args.input)
+        brackets += [line.strip() for line in file if line.strip()]
+        if file is not sys.stdin:
+            file.close()
+
+    return [(str(start), brackets[start : start + args.chunk]) for start in range(0, len(brackets), args.chunk)]
+
+
+
+#######################################################################
+#######################################################################
+# Running tasks and writing (or resuming) output
+#######################################################################
+
+def _run(args, tasks, task):
+    """Run tasks (pairs of a key and an argument of the task function) and write their outputs in order"""
+    output , journal , done = _open(args)
+    todo = [(key, argument) for key, argument in tasks if key not in done]
+
+    try:
+        if args.jobs > 1 and len(todo) > 1:
+            import concurrent.futures
+            with concurrent.futures.ProcessPoolExecutor(args.jobs) as pool:
+                _write(output, journal, todo, pool.map(functools.partial(task, args=args), [a for _, a in todo]))
+        else:
+            _write(output, journal, todo, (task(argument, args=args) for _, argument in todo))
+    finally:
+        if journal is not None:
+            output.close()
+            journal.close()
+
+
+
+def _write(output, journal, todo, results):
+    for (key, _), data in zip(todo, results):
+        output.write(data)
+        output.flush()
+
+        if journal is not None:                 # the task is finished once its output is on disk
+            os.fsync(output.fileno())
+            journal.write(json.dumps({"task" : key, "end" : output.tell()}) + "\n")
+            journal.flush()
+
+
+
+def _open(args):
+    """Output stream, journal (or None for stdout), and keys of tasks finished by an earlier run"""
+    if args.output is None:
+        return sys.stdout.buffer, None, set()
+
+    entries = []
+    if args.resume and os.path.exists(args.output + ".done"):
+        with open(args.output + ".done") as file:
+            for line in file:
+                try:
+                    entries.append(json.loads(line))
+                except ValueError:              # a line cut off by the interruption
+                    break
+
+    done , end = {entry["task"] for entry in entries}, entries[-1]["end"] if entries else 0
+
+    if args.resume and os.path.exists(args.output):
+        output = open(args.output, "r+b")
+        output.truncate(end)                    # drop the output of an unfinished task
+        output.seek(end)
+    else:
+        output = open(args.output, "wb")
+        done = set()
+
+    journal = open(args.output + ".done", "w")     # rewritten without a cut off line
+    for entry in entries if done else []:
+        journal.write(json.dumps(entry) + "\n")
+    journal.flush()
+
+    return output, journal, done
+
+
+
+def _lines(records):
+    """Lines of JSON as bytes (Fractions are written as strings)"""
+    return ''.join([json.dumps(record, default=str) + "\n" for record in records]).encode("utf-8")
+
+
+
+#######################################################################
+#######################################################################
+# Tasks  (run in worker processes, so they import what they use)
+#######################################################################
+
+def _words(grading, args):
+    from lieBasis import genLS
+
+    return _lines([{"grading" : grading, "word" : word} for word in genLS(grading)])
+
+
+
+def _basis(grading, args):
+    if args.format == "binary":
+        from basisStore import encode_grading
+        return encode_grading(grading)
+
+    from basisCache import grading_basis
+    basis = grading_basis(grading)
+
+    return _lines([{"grading" : grading, "index" : n, "word" : word, "left" : left, "star" : star, "lyndon" : lyndon,
+                    "diagonal" : diagonal}
+                   for n, (word, left, star, lyndon, diagonal)
+                   in enumerate(zip(basis.words, basis.left, basis.star, basis.lyndon, basis.diagonal))])
+
+
+
+def _matrix(grading, args):
+    from coLie import LieTree, EilTree, EilWord
+    from basisCache import grading_basis
+    basis = grading_basis(grading)
+
+    symbols  = [EilTree(symbol) for symbol in basis.star] if args.rows == "star" else [EilWord(word) for word in basis.words]
+    brackets = [LieTree(bracket) for bracket in (basis.left if args.columns == "left" else basis.lyndon)]
+    rows     = [[symbol * bracket for bracket in brackets] for symbol in symbols]
+
+    if args.format == "binary":
+        from basisStore import encode_grading
+        return encode_grading(grading, {"pairing" : rows})
+
+    return _lines([{"grading" : grading, "row" : n, "indices" : [j for j, value in enumerate(row) if value != 0],
+                    "data" : [value for value in row if value != 0]} for n, row in enumerate(rows)])
+
+
+
+def _convert(brackets, args):
+    if args.basis == "left":
+        from lieBasis import bracket_to_left
+        convert = lambda bracket: bracket_to_left(bracket, args.short)
+    else:
+        from liePoly import LiePolynomial
+        convert = lambda bracket: LiePolynomial(bracket).brackets(args.short)
+
+    return _lines([{"bracket" : bracket, "basis" : args.basis, "terms" : convert(bracket)} for bracket in brackets])
+
+
+
+def _braid(task, args):
+    n , path = task
+    binary   = args.binary or False
+
+    if args.lines:
+        from braiding import braid_words
+        with open(path) as file:
+            words = [line.strip() for line in file]
+        lines  = [line for line, word in enumerate(words) if word]
+        values = braid_words(args.symbols, [words[line] for line in lines])
+
+        return _lines([{"file" : path, "line" : line, "values" : value} for line, value in zip(lines, values)])
+
+    from braiding import braid_file
+
+    checkpoint = None                          # long files are checkpointed next to the output
+    if args.output is not None:
+        checkpoint = f'{args.output}.{n}.checkpoint'
+        if not args.resume and os.path.exists(checkpoint):
+            os.remove(checkpoint)
+
+    values = braid_file(path, args.symbols, binary, args.alphabet, checkpoint=checkpoint)
+
+    if checkpoint is not None and os.path.exists(checkpoint):
+        os.remove(checkpoint)
+
+    return _lines([{"file" : path, "symbols" : args.symbols, "values" : values}])
+
+
+
+_tasks = {"words" : _words, "basis" : _basis, "matrix" : _matrix, "convert" : _convert, "braid" : _braid}
+
+#######################################################################
+#######################################################################
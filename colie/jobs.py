@@ -0,0 +1,520 @@
+##################################################################
+#
+# Asyncio jobs for long basis and pairing computations (for notebooks)
+#  © 2024 Benjamin Walter <benjamin.walter@uvi.edu>
+#
+# Included classes:
+#   Job( key, plan, workers, timeout, memory )
+#   Reader( job )
+#
+# Included functions:
+#   pairing_matrix( grading )
+#   stream_pairing( grading )
+#   stream_basis( gradings )
+#   running( )
+#
+# See docstrings for more information on use
+#
+# python -m colie.jobs  checks that readers of the same request share its job
+#
+##################################################################
+
+import os            # the default number of workers is the number of processors
+import time
+import asyncio
+import itertools
+import multiprocessing
+
+try:
+    import resource  # memory budgets limit the address space of workers (only on Unix)
+except ImportError:
+    resource = None
+
+
+#######################################################################
+#######################################################################
+# A job splits a computation into tasks (chunks of rows of a pairing matrix, or gradings of a basis sweep) which
+# are run by its own pool of processes, so the notebook kernel stays free while it runs.  Results are handed back
+# in order as their tasks finish, to any number of readers (async iterators) of the job.
+#
+# Jobs are keyed by their request, and a request made while the same job is running gets a reader of the running
+# job (from its first result) instead of starting another.  A reader counts from when its request is made until it
+# finishes, is closed (aclose), or is garbage collected, and the job's processes start when a reader first asks for
+# a result -- so a stream which is never read runs nothing.  A job is stopped -- by terminating its processes --
+# when it is cancelled, when it runs out of time, or when no reader is left.  Memory budgets limit the address
+# space of each worker process beyond its size at start, so a worker going over its budget fails with MemoryError.
+#######################################################################
+
+_running = dict()       # running (or waiting) jobs by key
+
+
+class Job():
+    """Job is a computation run by a pool of processes, whose results are read by async iterators
+
+    Jobs are made by pairing_matrix, stream_pairing and stream_basis -- don't make them directly.
+
+    Parameters
+    ----------
+    key     : tuple
+         The request (jobs with the same key are shared while they run)
+    plan    : coroutine function
+         plan(job) submits the tasks of the job and emits their results
+    workers : integer   (default: number of processors)
+    timeout : number    (default: None)
+         Seconds before the job is stopped with TimeoutError (from when it starts)
+    memory  : integer   (default: None)
+         Bytes of memory each worker process may use (beyond its size at start)
+
+    Example
+    -------
+    [job.progress() for job in running()]
+    running()[0].cancel()
+
+    Attributes
+    ----------
+    results  : list
+         Results so far (in order)
+    tasks    : integer
+         Number of tasks submitted
+    finished : integer
+         Number of tasks done
+    error    : exception or None
+         Why the job stopped early
+    """
+
+    def __init__(self, key, plan, workers=None, timeout=None, memory=None):
+        self.key      = key
+        self.results  = []
+        self.tasks    = 0
+        self.finished = 0
+        self.error    = None
+        self.done     = False
+
+        self.__plan    = plan
+        self.__workers , self.__timeout , self.__memory = workers, timeout, memory
+        self.__began   = None
+        self.__readers = 0
+        self.__changed = asyncio.Event()
+        self.__loop    = None
+        self.__pool    = None
+        self.__driver  = None
+        self.__timer   = None
+
+
+    def start(self):
+        """Start the processes of the job and run its plan (readers start the job when first read)"""
+        if self.done or self.__pool is not None:
+            return self
+
+        self.__began  = time.time()
+        self.__loop   = asyncio.get_running_loop()
+        self.__pool   = multiprocessing.Pool(self.__workers or os.cpu_count() or 1, initializer=_limit,
+                                             initargs=(self.__memory,))
+        self.__driver = self.__loop.create_task(self.__drive(self.__plan))
+        if self.__timeout is not None:
+            self.__timer = self.__loop.call_later(self.__timeout, self.cancel,
+                                                  TimeoutError(f'Job ran for over {self.__timeout} seconds'))
+        return self
+
+
+    async def __drive(self, plan):
+        """drive is used internally to run the plan of the job, and stop the job when it ends"""
+        try:
+            await plan(self)
+        except asyncio.CancelledError:
+            pass
+        except BaseException as error:
+            self.error = error
+        finally:
+            self.__stop()
+
+
+    def submit(self, function, *arguments):
+        """Run function(*arguments) in a worker process, as an asyncio Future"""
+        future = self.__loop.create_future()
+        self.tasks += 1
+
+        def settle(value=None, error=None):
+            if not future.done():
+                if error is None:
+                    future.set_result(value)
+                else:
+                    future.set_exception(error)
+            self.finished += 1
+
+        self.__pool.apply_async(function, arguments,
+                                callback=lambda value: self.__loop.call_soon_threadsafe(settle, value),
+                                error_callback=lambda error: self.__loop.call_soon_threadsafe(settle, None, error))
+        return future
+
+
+    def emit(self, results):
+        """Hand a list of results to readers of the job"""
+        self.results.extend(results)
+        self.__wake()
+
+
+    def cancel(self, error=None):
+        """Stop the job (readers get error, or asyncio.CancelledError)"""
+        if self.done:
+            return
+        self.error = error if error is not None else asyncio.CancelledError(f'Job {self.key} was cancelled')
+        if self.__driver is not None:
+            self.__driver.cancel()
+        self.__stop()
+
+
+    def __stop(self):
+        """stop is used internally to terminate the processes of the job and wake its readers"""
+        if self.done:
+            return
+        self.done = True
+
+        if self.__timer is not None:
+            self.__timer.cancel()
+        if self.__pool is not None:
+            self.__pool.terminate()
+        if _running.get(self.key) is self:
+            del _running[self.key]
+        self.__wake()
+
+
+    def __wake(self):
+        self.__changed.set()
+        self.__changed = asyncio.Event()
+
+
+    def read(self):
+        """Reader of the results of the job (from the first), counted as reading the job until it is closed"""
+        return Reader(self)
+
+
+    def attach(self):
+        """Count a reader of the job (used by Reader)"""
+        self.__readers += 1
+
+
+    def detach(self):
+        """Stop counting a reader of the job (used by Reader).  The job stops when no reader is left."""
+        self.__readers -= 1
+        if self.__readers == 0:
+            self.cancel()
+
+
+    async def changed(self):
+        """Wait until the job has new results or is done (used by Reader)"""
+        await self.__changed.wait()
+
+
+    def progress(self):
+        """Dictionary of tasks finished, results so far, and seconds running"""
+        seconds = 0 if self.__began is None else time.time() - self.__began
+        return {"key" : self.key, "tasks" : self.tasks, "finished" : self.finished, "results" : len(self.results),
+                "seconds" : seconds, "done" : self.done}
+
+
+    def __repr__(self):
+        state = "done" if self.done else "running" if self.__pool is not None else "waiting"
+        return f'Job {self.key} ({state}: {self.finished} of {self.tasks} tasks, {len(self.results)} results)'
+
+
+
+class Reader():
+    """Reader is an async iterator of the results of a job (from the first)
+
+    Readers are made by Job.read (so by stream_pairing and stream_basis).  A reader counts as reading its job from
+    when it is made until it finishes, is closed, or is garbage collected, and it starts the job when first read.
+
+    Parameters
+    ----------
+    job : Job
+
+    Example
+    -------
+    rows = stream_pairing("aaabbbcc")
+    async for row in rows:
+        ...
+    await rows.aclose()        # (or just drop the reader) stops the job if nothing else reads it
+
+    Attributes
+    ----------
+    job : Job
+    """
+
+    def __init__(self, job):
+        self.job    = job
+        self.__next = 0
+        self.__open = True
+        job.attach()
+
+
+    def __aiter__(self):
+        return self
+
+
+    async def __anext__(self):
+        job = self.job
+        if not self.__open:
+            raise StopAsyncIteration
+
+        job.start()
+        while self.__next >= len(job.results):
+            if job.done:
+                self.__close()
+                if job.error is not None:
+                    raise job.error
+                raise StopAsyncIteration
+
+            try:
+                await job.changed()
+            except BaseException:          # the reading task was cancelled
+                self.__close()
+                raise
+
+        self.__next += 1
+        return job.results[self.__next - 1]
+
+
+    async def aclose(self):
+        """Stop reading the job"""
+        self.__close()
+
+
+    def __close(self):
+        """close is used internally to stop counting this reader of the job (once)"""
+        if self.__open:
+            self.__open = False
+            self.job.detach()
+
+
+    def __del__(self):
+        self.__close()
+
+
+    def __repr__(self):
+        return f'Reader of {self.job!r}'
+
+
+
+def running():
+    """List of running jobs (to watch or cancel them)"""
+    return list(_running.values())
+
+
+
+def _job(key, plan, workers, timeout, memory):
+    """The running job with a key, or a new job running plan (started by its first reader)"""
+    if key not in _running:
+        _running[key] = Job(key, plan, workers, timeout, memory)
+    return _running[key]
+
+
+
+def _limit(memory):
+    """Initialize a worker:  limit its address space to its size at start plus memory (bytes)"""
+    if memory is None or resource is None:
+        return
+
+    try:
+        with open("/proc/self/statm") as file:
+            size = int(file.read().split()[0]) * resource.getpagesize()
+    except OSError:
+        size = 0
+
+    soft , hard = resource.getrlimit(resource.RLIMIT_AS)
+    limit = size + memory if hard == resource.RLIM_INFINITY else min(size + memory, hard)
+    resource.setrlimit(resource.RLIMIT_AS, (limit, hard))
+
+
+
+#######################################################################
+#######################################################################
+# Pairing matrices
+#######################################################################
+
+async def pairing_matrix(grading=None, symbols=None, brackets=None, rows="star", columns="left",
+                         workers=None, chunk=None, timeout=None, memory=None):
+    """Matrix of pairings of symbols (rows) with Lie brackets (columns), computed by a pool of processes
+
+       Arguments:
+       ----------
+        grading  : string  [None]
+           Pair the bases of a grading
+        symbols  : list of EilWords, EilTrees, or strings  [None]
+        brackets : list of LieTrees or strings  [None]
+           Instead of a grading, pair these symbols and brackets
+        rows     : string  ["star"]
+           Symbols of the grading:  "star" (star symbols) or "words" (Lyndon EilWords)
+        columns  : string  ["left"]
+           Brackets of the grading:  "left" (left-greedy) or "lyndon" (standard)
+        workers  : integer  [number of processors]
+        chunk    : integer  [rows / (4 * workers)]
+           Number of rows computed by a worker at a time
+        timeout  : number  [None]
+           Seconds before the job is stopped with TimeoutError
+        memory   : integer  [None]
+           Bytes of memory each worker may use (beyond its size at start), or the job fails with MemoryError
+
+       Result:
+       -------
+        list of rows (lists of integers)
+
+       Example:
+       --------
+        from colie import jobs as colie_jobs
+        matrix = await colie_jobs.pairing_matrix("aaabbbcc", timeout=600)
+    """
+    return [row async for row in stream_pairing(grading, symbols, brackets, rows, columns, workers, chunk, timeout, memory)]
+
+
+
+def stream_pairing(grading=None, symbols=None, brackets=None, rows="star", columns="left",
+                   workers=None, chunk=None, timeout=None, memory=None):
+    """Async iterator of the rows of a pairing matrix, as chunks of rows are finished (see pairing_matrix)
+
+       Example:
+       --------
+        async for row in colie_jobs.stream_pairing("aaabbbcc"):
+            ...
+    """
+    if grading is not None:
+        grading = ''.join(sorted(grading))
+        key     = ("pairing", grading, rows, columns)
+    else:
+        symbols , brackets = [str(symbol) for symbol in symbols], [str(bracket) for bracket in brackets]
+        key     = ("pairing", tuple(symbols), tuple(brackets))
+
+    workers = workers or os.cpu_count() or 1
+
+    async def plan(job):
+        if grading is not None:
+            count = await job.submit(_count, grading)
+        else:
+            count = len(symbols)
+
+        size    = chunk or max(1, count // (4 * workers))
+        futures = []
+        for start in range(0, count, size):
+            if grading is not None:
+                futures.append(job.submit(_grading_rows, grading, rows, columns, start, min(start + size, count)))
+            else:
+                futures.append(job.submit(_rows, symbols[start : start + size], brackets))
+
+        for future in futures:
+            job.emit(await future)
+
+    return _job(key, plan, workers, timeout, memory).read()
+
+
+
+def _count(grading):
+    from basisCache import grading_basis
+    return len(grading_basis(grading))
+
+
+
+def _grading_rows(grading, rows, columns, start, end):
+    """Rows start:end of the pairing matrix of a grading (the bases are cached in each worker)"""
+    from coLie import EilWord, EilTree, LieTree
+    from basisCache import grading_basis
+    basis = grading_basis(grading)
+
+    symbols  = [EilTree(symbol) for symbol in basis.star[start:end]] if rows == "star" else [EilWord(word) for word in basis.words[start:end]]
+    brackets = [LieTree(bracket) for bracket in (basis.left if columns == "left" else basis.lyndon)]
+
+    return [[symbol * bracket for bracket in brackets] for symbol in symbols]
+
+
+
+def _rows(symbols, brackets):
+    from coLie import EilWord, EilTree, LieTree
+
+    brackets = [LieTree(bracket) for bracket in brackets]
+    return [[(EilTree(symbol) if "(" in symbol else EilWord(symbol)) * bracket for bracket in brackets] for symbol in symbols]
+
+
+
+#######################################################################
+#######################################################################
+# Bases
+#######################################################################
+
+def stream_basis(gradings=None, weight=None, letters="ab", workers=None, timeout=None, memory=None):
+    """Async iterator of the basis elements of gradings, as each grading is finished
+
+       Arguments:
+       ----------
+        gradings : string or list of strings  [None]
+        weight   : integer  [None]
+           Also all gradings of this many letters (from letters)
+        letters  : string  ["ab"]
+        workers , timeout , memory
+           As for pairing_matrix
+
+       Result:
+       -------
+        async iterator of dictionaries with keys grading, index, word, left, star, lyndon and diagonal
+
+       Example:
+       --------
+        async for element in colie_jobs.stream_basis(weight=9, letters="abc"):
+            print(element["word"], element["star"])
+    """
+    if isinstance(gradings, str):
+        gradings = [gradings]
+    gradings = [''.join(sorted(grading)) for grading in gradings or []]
+
+    if weight is not None:
+        gradings += [''.join(grading) for grading in itertools.combinations_with_replacement(sorted(set(letters)), weight)]
+    gradings = list(dict.fromkeys(gradings))
+
+    async def plan(job):
+        futures = [job.submit(_basis, grading) for grading in gradings]
+        for future in futures:
+            job.emit(await future)
+
+    return _job(("basis", tuple(gradings)), plan, workers, timeout, memory).read()
+
+
+
+def _basis(grading):
+    from basisCache import grading_basis
+    basis = grading_basis(grading)
+
+    return [{"grading" : grading, "index" : n, "word" : word, "left" : left, "star" : star, "lyndon" : lyndon,
+             "diagonal" : diagonal}
+            for n, (word, left, star, lyndon, diagonal)
+            in enumerate(zip(basis.words, basis.left, basis.star, basis.lyndon, basis.diagonal))]
+
+#######################################################################
+#######################################################################
+# Check  (python -m colie.jobs)
+#######################################################################
+
+async def _check(grading="aaabbbcc"):
+    """Check that two streams of the same request share one job, that the second gets every row after the first
+       stops reading, and that a stream which is never read starts nothing"""
+    rows = await pairing_matrix(grading, chunk=1)
+
+    first , second = stream_pairing(grading, chunk=1), stream_pairing(grading, chunk=1)
+    assert first.job is second.job, "identical requests don't share a job"
+    async for row in first:
+        break
+    del first                                  # the first reader is dropped after one row
+    assert [row async for row in second] == rows, "the second stream lost rows when the first stopped reading"
+
+    unread = stream_pairing(grading)
+    await asyncio.sleep(0.1)
+    assert unread.job.tasks == 0, "a stream which was never read started its job"
+    del unread
+    assert running() == [], "a dropped stream left its job running"
+
+    print(f'{grading}: {len(rows)} rows read by two streams sharing one job')
+
+
+
+if __name__ == "__main__":
+    asyncio.run(_check())
+
+#######################################################################
+#######################################################################
@@ -0,0 +1,251 @@
+##################################################################
+#
+# Counting the work done by pairing, braiding and enumerating Lyndon words
+#  © 2024 Benjamin Walter <benjamin.walter@uvi.edu>
+#
+# Included classes:
+#   Stats( hook, every )
+#
+# Included functions:
+#   instrument( hook, every )
+#
+# See docstrings for more information on use
+#
+##################################################################
+
+import sys          # genLS is counted in every loaded module which imported it
+import time
+import contextlib
+
+import lieBasis
+from coLie import ValueTree, EilTree, EilWord, CountTree, CountWord
+from braiding import CountForest
+
+
+#######################################################################
+#######################################################################
+# Counters are installed by wrapping methods of the classes in coLie and braiding (and genLS) when instrument() is
+# entered, and the original methods are put back when it exits.  So nothing is counted, and nothing is slowed down,
+# outside of an instrument() block.
+#
+# Counters (keys of Stats.counts):
+#   pair_tree     : calls of EilTree.__pair           pair_word    : calls of EilWord.__pair
+#   weak_pass     : weak pairings which pass          weak_prune   : weak pairings which rule out a pairing
+#                   (ValueTree.__and__ and EilWord.__weakPair)
+#   excise        : symbols made by EilTree.__excise  excise_nodes : nodes copied while excising
+#   evaluate      : nodes visited by CountTree.evaluate (and eil positions visited by CountWord.evaluate)
+#   braid_letters : letters braided by braid_ids of CountTree, CountWord and CountForest (the paths of CompactWord,
+#                   braid_words, lcs_depth and word_to_lie, and of CountForest.evaluate) -- these update only the
+#                   counters decorated by each letter, so they count letters rather than nodes
+#   genls_nodes   : recursive calls of genLS          genls_words  : words yielded by genLS
+#######################################################################
+
+class Stats():
+    """Stats holds the counters and timings collected inside an instrument() block
+
+    Parameters
+    ----------
+    hook  : function   (default: None)
+         Called as hook(stats, counter) after every `every` counted events (for sampling)
+    every : integer    (default: 10000)
+
+    Example
+    -------
+    with instrument() as stats:
+        for grading in ["aabbc", "aaabbc", "aabbcc"]:
+            with stats.timing(grading):
+                bracket_to_left(...)
+    stats.counts["pair_tree"] , stats.slowest(1)
+
+    Attributes
+    ----------
+    counts  : dictionary { counter : integer }
+    timings : dictionary { label : { "seconds" : float, counter : integer, ... } }
+         Time and counts of each timing() block (counts are the work done within the block)
+    events  : integer
+         Total number of counted events
+    """
+
+    keys = ("pair_tree", "pair_word", "weak_pass", "weak_prune", "excise", "excise_nodes",
+            "evaluate", "braid_letters", "genls_nodes", "genls_words")
+
+
+    def __init__(self, hook=None, every=10000):
+        self.counts  = dict.fromkeys(Stats.keys, 0)
+        self.timings = dict()
+        self.events  = 0
+        self.hook , self.every = hook, every
+        self.__next  = every
+
+
+    def count(self, key, n=1):
+        """Add n to a counter (calling the hook when due)"""
+        self.counts[key] += n
+        self.events      += n
+
+        if self.hook is not None and self.events >= self.__next:
+            self.__next += self.every * ((self.events - self.__next) // self.every + 1)
+            self.hook(self, key)
+
+
+    @contextlib.contextmanager
+    def timing(self, label):
+        """Time a block (e.g. the work for one grading), recording the counts of work done in it"""
+        before , start = dict(self.counts), time.perf_counter()
+        try:
+            yield self
+        finally:
+            seconds = time.perf_counter() - start
+            entry = self.timings.setdefault(label, dict.fromkeys(("seconds",) + Stats.keys, 0))
+            entry["seconds"] += seconds
+            for key in Stats.keys:
+                entry[key] += self.counts[key] - before[key]
+
+
+    def slowest(self, n=10, key="seconds"):
+        """Labels of the n timed blocks with the most time (or the largest count of key)"""
+        return sorted(self.timings, key=lambda label: -self.timings[label][key])[:n]
+
+
+    def __getitem__(self, key):
+        return self.counts[key]
+
+
+    def __str__(self):
+        lines = [f'{key:14} {value:>14,}' for key, value in self.counts.items()]
+        weak  = self.counts["weak_pass"] + self.counts["weak_prune"]
+        if weak:
+            lines.append(f'{"prune rate":14} {self.counts["weak_prune"] / weak:>14.1%}')
+        for label in self.slowest(len(self.timings)):
+            lines.append(f'{label:14} {self.timings[label]["seconds"]:>13.4f}s')
+        return '\n'.join(lines)
+
+
+    def __repr__(self):
+        return f'Stats({self.counts})'
+
+
+
+_active = None        # Stats of the running instrument() block
+
+
+def _wrappers(stats):
+    """Instrumented versions of the counted methods as a list of (owner, name, replacement)"""
+    pair_tree , pair_word = EilTree._EilTree__pair, EilWord._EilWord__pair
+    weak_tree , weak_word = ValueTree.__and__, EilWord._EilWord__weakPair
+    excise    , genLS     = EilTree._EilTree__excise, lieBasis.genLS
+    evaluate_tree , evaluate_word = CountTree.evaluate, CountWord.evaluate
+    braid_tree , braid_word , braid_forest = CountTree.braid_ids, CountWord.braid_ids, CountForest.braid_ids
+    depth = [0]
+
+    def pair_tree_(self, other):
+        stats.count("pair_tree")
+        return pair_tree(self, other)
+
+    def pair_word_(self, word, other):
+        stats.count("pair_word")
+        return pair_word(self, word, other)
+
+    def weak_tree_(self, other):
+        result = weak_tree(self, other)
+        stats.count("weak_pass" if result else "weak_prune")
+        return result
+
+    def weak_word_(self, word, lie):
+        result = weak_word(self, word, lie)
+        stats.count("weak_pass" if result else "weak_prune")
+        return result
+
+    def excise_(self, position):
+        if depth[0] == 0:
+            stats.count("excise")
+        stats.count("excise_nodes")
+        depth[0] += 1
+        try:
+            return excise(self, position)
+        finally:
+            depth[0] -= 1
+
+    def evaluate_tree_(self, letter):
+        stats.count("evaluate")
+        return evaluate_tree(self, letter)
+
+    def evaluate_word_(self, letter):
+        stats.count("evaluate", len(self.eil.value))
+        return evaluate_word(self, letter)
+
+    def braid_tree_(self, ids, signs, alphabet, record=None):
+        stats.count("braid_letters", len(ids))
+        return braid_tree(self, ids, signs, alphabet, record)
+
+    def braid_word_(self, ids, signs, alphabet, record=None):
+        stats.count("braid_letters", len(ids))
+        return braid_word(self, ids, signs, alphabet, record)
+
+    def braid_forest_(self, ids, signs, alphabet, record=None):
+        stats.count("braid_letters", len(ids))
+        return braid_forest(self, ids, signs, alphabet, record)
+
+    def genLS_(*args, **kwargs):
+        stats.count("genls_nodes")
+        root = kwargs.get("root", args[6] if len(args) > 6 else True)
+        for word in genLS(*args, **kwargs):
+            if root:
+                stats.count("genls_words")
+            yield word
+
+    replacements = [(EilTree, "_EilTree__pair", pair_tree_), (EilWord, "_EilWord__pair", pair_word_),
+                    (ValueTree, "__and__", weak_tree_), (EilWord, "_EilWord__weakPair", weak_word_),
+                    (EilTree, "_EilTree__excise", excise_),
+                    (CountTree, "evaluate", evaluate_tree_), (CountWord, "evaluate", evaluate_word_),
+                    (CountTree, "braid_ids", braid_tree_), (CountWord, "braid_ids", braid_word_),
+                    (CountForest, "braid_ids", braid_forest_)]
+
+    for module in list(sys.modules.values()):          # genLS recurses through the lieBasis module global
+        if getattr(module, "genLS", None) is genLS:
+            replacements.append((module, "genLS", genLS_))
+
+    return replacements
+
+
+
+@contextlib.contextmanager
+def instrument(hook=None, every=10000):
+    """Count the work of pairing, braiding and enumeration inside a with block
+
+       Arguments:
+       ----------
+        hook  : function  [None]
+           Called as hook(stats, counter) every `every` counted events
+        every : integer  [10000]
+
+       Result:
+       -------
+        Stats (as the target of the with statement)
+
+       Example:
+       --------
+        with instrument() as stats:
+            symbolStar("aabab") * bracketLeft("aabab")
+        print(stats)
+    """
+    global _active
+    if _active is not None:
+        raise RuntimeError("instrument() blocks can't be nested -- use Stats.timing() for parts of a block")
+
+    stats = Stats(hook, every)
+    replacements = _wrappers(stats)
+    originals    = [(owner, name, getattr(owner, name)) for owner, name, _ in replacements]
+
+    _active = stats
+    for owner, name, replacement in replacements:
+        setattr(owner, name, replacement)
+    try:
+        yield stats
+    finally:
+        for owner, name, original in originals:
+            setattr(owner, name, original)
+        _active = None
+
+#######################################################################
+#######################################################################
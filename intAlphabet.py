@@ -0,0 +1,542 @@
+##################################################################
+#
+# Integer generators: Lyndon words, Lie brackets, coLie symbols, pairing and braiding on alphabets of any size
+#  © 2024 Benjamin Walter <benjamin.walter@uvi.edu>
+#
+# Included classes:
+#   Alphabet( size, symbols )
+#   CountInt( symbol )
+#
+# Included functions:
+#   lyndon_words( grading )
+#   bracket_std(  LS-word )
+#   bracket_left( LS-word )
+#   symbol_star(  LS-word )
+#   symbol_word(  word )
+#   pair( symbol, bracket )
+#   braid( symbol, word )
+#
+# See docstrings for more information on use
+#
+##################################################################
+
+import re          # names of generators are read with a regex
+import math        # math.prod() multiplies branch values when braiding
+import string      # small alphabets are named by letters
+import functools   # pairings, contents and cobrackets are memoized
+from array import array
+
+from coLie import BraidCounter, CompactWord, SignedWord, LieTree, EilTree, EilWord
+from lieBasis import genLS
+
+
+#######################################################################
+#######################################################################
+# Generators are the integers 0, 1, ..., k-1 (ordered as integers), so there is no limit on their number,
+# and everything below works on small integers and tuples rather than strings:
+#
+#   words    : tuples of generators                    (0, 0, 1, 2)
+#   brackets : generators, or pairs of brackets        ((0, 1), 2)          <=> [[a,b],c]
+#   symbols  : tuples (decoration, *subsymbols)        (2, (1, (0,)), (0,)) <=> ((a)b)(a)c
+#
+# Subsymbols of a symbol are kept sorted, so equal symbols are equal tuples, and pairings of symbols with
+# brackets are memoized.  An Alphabet is a table of names of generators used to read and print these.
+#######################################################################
+
+class Alphabet():
+    """Alphabet is a table of names for the integer generators 0, 1, ..., size-1
+
+    An Alphabet can be used wherever a CompactWord expects a string of letters.
+
+    Parameters
+    ----------
+    size    : integer
+    symbols : list of strings   (default: letters a..zA..Z for at most 52 generators, otherwise x0, x1, ...)
+         Names of the generators
+
+    Example
+    -------
+    alphabet = Alphabet(300)
+    bracket  = alphabet.bracket("[x12,[x7,x299]]")        # (12, (7, 299))
+    symbol   = alphabet.symbol("((x12)x7)x299")
+    pair(symbol, bracket) , alphabet.bracket_name(bracket)
+    braid(symbol, alphabet.word("x12 x7 x299^{3} x12-"))
+
+    Attributes
+    ----------
+    size    : integer
+    symbols : list of strings
+    single  : boolean
+         All names are single characters (so names may be written without separators)
+    """
+
+    _token = re.compile(r'\[|\]|\(|\)|[^\s\[\](),^-]+|\^\s*\{?\s*[+-]?\d+\s*\}?|\^|-')
+
+
+    def __init__(self, size, symbols=None):
+        if symbols is None:
+            symbols = list(string.ascii_letters[:size]) if size <= len(string.ascii_letters) else [f'x{n}' for n in range(size)]
+
+        if len(symbols) != size or len(set(symbols)) != size:
+            raise ValueError("Alphabet needs one distinct name for each generator!")
+
+        self.size    = size
+        self.symbols = list(symbols)
+        self.single  = all([len(symbol) == 1 for symbol in symbols])
+        self.__index = {symbol : n for n, symbol in enumerate(symbols)}
+
+
+    def __tokens(self, text):
+        """tokens is used internally to split text into brackets, parentheses, powers and generators"""
+        for token in Alphabet._token.findall(text):
+            if token[0] in "[]()^-" or not self.single:
+                yield token
+            else:
+                yield from token            # names are single characters, so "ab" is two generators
+
+
+    def find(self, name):
+        """Generator with a given name (or -1)"""
+        return self.__index.get(name, -1)
+
+
+    def id(self, name):
+        if name not in self.__index:
+            raise ValueError(f'{name} is not in the alphabet!')
+        return self.__index[name]
+
+
+    #########################
+    #
+    # Reading
+    #
+    def bracket(self, text):
+        """Read a Lie bracket such as "[x1,[x2,x3]]" (commas are needed between names longer than one character)"""
+        tokens = list(self.__tokens(text))
+        bracket , n = self.__bracket(tokens, 0)
+        return bracket
+
+
+    def __bracket(self, tokens, n):
+        """bracket is used internally to read a bracket from tokens starting at position n"""
+        if tokens[n] == "[":
+            left  , n = self.__bracket(tokens, n+1)
+            right , n = self.__bracket(tokens, n)
+            return (left, right), n+1                   # skip ]
+        return self.id(tokens[n]), n+1
+
+
+    def symbol(self, text):
+        """Read a coLie symbol such as "((x1)x2)(x1)x3" """
+        tokens = list(self.__tokens(text))
+        symbol , n = self.__symbol(tokens, 0)
+        return symbol
+
+
+    def __symbol(self, tokens, n):
+        """symbol is used internally to read a symbol from tokens starting at position n (up to a closing parenthesis)"""
+        decoration , subsymbols = None, []
+        while n < len(tokens) and tokens[n] != ")":
+            if tokens[n] == "(":
+                subsymbol , n = self.__symbol(tokens, n+1)
+                subsymbols.append(subsymbol)
+            else:
+                decoration = self.id(tokens[n])
+            n += 1
+        return (decoration, *sorted(subsymbols)), n
+
+
+    def word(self, text):
+        """Read a signed word such as "x1 x2^{-3} x1-" as a CompactWord (whose alphabet is this Alphabet)"""
+        ids , signs = array('i'), array('b')
+        for token in self.__tokens(text):
+            if token == "-" or token == "^":
+                signs[-1] = -1
+            elif token[0] == "^":                      # power x^{n} replaces the letter x
+                power , letter = int(token.strip("^{} ")), ids.pop()
+                signs.pop()
+                ids.extend(array('i', [letter]) * abs(power))
+                signs.extend(array('b', [1 if power > 0 else -1]) * abs(power))
+            elif token not in "[]()":
+                ids.append(self.id(token))
+                signs.append(1)
+        return CompactWord.frombuffer(ids, self, signs)
+
+
+    def encode(self, value):
+        """Integer form of a LieTree, EilTree, EilWord or string word (named with this alphabet)"""
+        if isinstance(value, LieTree):
+            return self.bracket(value.value)
+        if isinstance(value, EilTree):
+            return self.symbol(value.value)
+        if isinstance(value, EilWord):
+            value = value.value
+        return tuple([self.id(token) for token in self.__tokens(value)])
+
+
+    #########################
+    #
+    # Writing
+    #
+    def name(self, value):
+        """Name a generator, word (tuple of generators), or symbol using this alphabet"""
+        if isinstance(value, int):
+            return self.symbols[value]
+
+        if all([isinstance(x, int) for x in value]):   # a word
+            return ('' if self.single else ' ').join([self.symbols[x] for x in value])
+
+        return ''.join([f'({self.name(subsymbol)})' for subsymbol in value[1:]]) + self.symbols[value[0]]
+
+
+    def bracket_name(self, bracket):
+        """Name a bracket using this alphabet"""
+        if isinstance(bracket, int):
+            return self.symbols[bracket]
+        return f'[{self.bracket_name(bracket[0])},{self.bracket_name(bracket[1])}]'
+
+
+    def decode(self, value, bracket=False):
+        """EilTree or string word (or LieTree, if bracket) of an integer form (only for alphabets of single characters)"""
+        if not self.single:
+            raise ValueError("Only alphabets of single characters can be written as strings for LieTree and EilTree!")
+
+        if bracket:
+            return LieTree(self.bracket_name(value))
+        if all([isinstance(x, int) for x in value]):
+            return self.name(value)
+        return EilTree(self.name(value))
+
+
+    #########################
+    #
+    # Acting like a string of letters (for CompactWord)
+    #
+    def __getitem__(self, n):
+        return self.symbols[n]
+
+
+    def __iter__(self):
+        return iter(self.symbols)
+
+
+    def __len__(self):
+        return self.size
+
+
+    def __eq__(self, other):
+        if isinstance(other, Alphabet):
+            return self.symbols == other.symbols
+        if isinstance(other, str):
+            return self.single and ''.join(self.symbols) == other
+        return NotImplemented
+
+
+    def __hash__(self):
+        return hash(tuple(self.symbols))
+
+
+    def __repr__(self):
+        return f'Alphabet({self.size})'
+
+
+
+#######################################################################
+#######################################################################
+# Bases
+#######################################################################
+
+def lyndon_words(grading):
+    """Lyndon words (tuples) with the multiplicities of generators in grading
+       grading is a tuple of generators, or a dictionary { generator : multiplicity }
+       Words are generated in reverse lexicographic order (see lieBasis.genLS)
+    """
+    if isinstance(grading, dict):
+        grading = tuple([x for x in sorted(grading) for _ in range(grading[x])])
+    return genLS(tuple(sorted(grading)))
+
+
+
+@functools.lru_cache(maxsize=1 << 16)
+def bracket_std(word):
+    """Standard bracketing of a Lyndon word:  B(w) = [ B(a) , B(b) ] where w=ab and b is the maximal proper LS suffix"""
+    if len(word) == 1:
+        return word[0]
+
+    split = min(range(1, len(word)), key=lambda j: word[j:])
+    return (bracket_std(word[:split]), bracket_std(word[split:]))
+
+
+
+def bracket_left(word):
+    """Left-greedy bracketing of a Lyndon word (see lieBasis.bracketLeft)"""
+    if len(word) == 1:
+        return word[0]
+
+    i , j = 0 , 1
+    while j < len(word)-1:
+        if word[i] == word[j]:
+            i += 1
+        else:
+            i = 0
+        j += 1
+
+    return (bracket_left(word[:j-i]), bracket_left(word[j-i:]))
+
+
+
+def symbol_star(word):
+    """Star symbol of a Lyndon word, dual to the left-greedy bracket (see lieBasis.symbolStar)"""
+    if len(word) == 1:
+        return (word[0],)
+
+    i , j = 0 , 1
+    N = len(word)
+    while j != N-1:
+        if word[i] == word[j]:
+            i += 1
+        else:
+            i = 0
+        j += 1
+
+    k = j - i                         # width of subword w in top partition ww..wx
+    n = k * ((N-1) // k)              # the w's are followed by the suffix word x
+
+    root = symbol_star(word[n:])
+    return (root[0], *sorted(root[1:] + (symbol_star(word[:k]),) * (n // k)))
+
+
+
+def symbol_word(word):
+    """Symbol of a linear word:  abaa <=> (((a)b)a)a"""
+    symbol = (word[0],)
+    for x in word[1:]:
+        symbol = (x, symbol)
+    return symbol
+
+
+
+#######################################################################
+#######################################################################
+# Pairing
+#
+# This is the bracket-cobracket recursion of EilTree.__pair:
+#       < eil , lie > =  sum over cuts of  < L(eil) , L(lie) > * < R(eil) , R(lie) >  -  < L(eil) , R(lie) > * < R(eil) , L(lie) >
+# where the cuts of a symbol remove one subsymbol L(eil) leaving R(eil).  Cuts, contents (the sorted generators
+# of a symbol or bracket) and pairings are all memoized, so repeated subsymbols and subbrackets are only paired once.
+#######################################################################
+
+@functools.lru_cache(maxsize=1 << 20)
+def _content(symbol):
+    """Sorted generators of a symbol (used to quickly rule out pairings that will be 0)"""
+    return tuple(sorted(sum([_content(subsymbol) for subsymbol in symbol[1:]], (symbol[0],))))
+
+
+
+@functools.lru_cache(maxsize=1 << 20)
+def _bracket_content(bracket):
+    """Sorted generators of a bracket"""
+    if isinstance(bracket, int):
+        return (bracket,)
+    return tuple(sorted(_bracket_content(bracket[0]) + _bracket_content(bracket[1])))
+
+
+
+@functools.lru_cache(maxsize=1 << 18)
+def _cuts(symbol):
+    """Cobracket of a symbol as a tuple of (subsymbol, excised symbol, multiplicity)"""
+    cuts = dict()
+    for n, subsymbol in enumerate(symbol[1:], 1):
+        rest = symbol[1:n] + symbol[n+1:]
+        cut  = (subsymbol, (symbol[0], *rest))
+        cuts[cut] = cuts.get(cut, 0) + 1
+
+        for sub, excised, count in _cuts(subsymbol):
+            cut = (sub, (symbol[0], *sorted(rest + (excised,))))
+            cuts[cut] = cuts.get(cut, 0) + count
+
+    return tuple([(sub, excised, count) for (sub, excised), count in cuts.items()])
+
+
+
+@functools.lru_cache(maxsize=1 << 20)
+def _pair(symbol, bracket):
+    """Pairing of a symbol and a bracket with the same content"""
+    if isinstance(bracket, int):
+        return 1                                     # contents match, so symbol is (bracket,)
+
+    left , right = bracket
+    content , pairing = _bracket_content(left), 0
+
+    for sub, excised, count in _cuts(symbol):
+        if _content(sub) == content:
+            pairing += count * _pair(sub, left) * _pair(excised, right)
+        if _content(excised) == content:
+            pairing -= count * _pair(sub, right) * _pair(excised, left)
+
+    return pairing
+
+
+
+def pair(symbol, bracket):
+    """Pairing of a coLie symbol (or linear word) with a Lie bracket, using integer generators
+
+       Arguments:
+       ----------
+        symbol  : tuple (decoration, *subsymbols), or word (tuple of generators)
+        bracket : generator or pair (left, right)
+
+       Result:
+       -------
+        integer
+    """
+    if all([isinstance(x, int) for x in symbol]) and len(symbol) > 1:
+        symbol = symbol_word(symbol)
+
+    if _content(symbol) != _bracket_content(bracket):
+        return 0
+
+    return _pair(symbol, bracket)
+
+
+
+#######################################################################
+#######################################################################
+# Braiding
+#######################################################################
+
+class CountInt(BraidCounter):
+    """CountInt is a helper class for combinatorial braiding of symbols with integer generators on words.
+    It flattens the symbol into arrays (leaf to root) and keeps the s and Δ values of CountTree in lists.
+
+    Objects of this class should only be used internally!  (use braid())
+
+    Parameters
+    ----------
+    symbol : tuple (decoration, *subsymbols), or word (tuple of generators)
+
+    Attributes
+    ----------
+    decorations : list of integers
+       generator at each vertex (leaf to root)
+    branches    : list of lists of integers
+       vertices of the branches at each vertex
+    sum , delta : lists of integers
+       current s and Δ values at each vertex
+    total       : integer
+       sum + delta at the root
+    """
+
+    def __init__(self, symbol):
+        self.decorations , self.branches = [], []
+
+        if all([isinstance(x, int) for x in symbol]):     # a linear word is a chain
+            self.decorations = list(symbol)
+            self.branches    = [[n-1] if n else [] for n in range(len(symbol))]
+        else:
+            self.__flatten(symbol)
+
+        self.sum   = [0] * len(self.decorations)
+        self.delta = [0] * len(self.decorations)
+
+
+    def __flatten(self, symbol):
+        """flatten is used internally to list vertices leaf to root"""
+        branches = [self.__flatten(subsymbol) for subsymbol in symbol[1:]]
+        self.decorations.append(symbol[0])
+        self.branches.append(branches)
+        return len(self.decorations) - 1
+
+
+    @property
+    def total(self):
+        return self.sum[-1] + self.delta[-1]
+
+
+    def evaluate(self, letter):
+        """evaluate updates the s and Δ values at a SignedLetter (whose value is a generator)"""
+        sum , delta = self.sum , self.delta
+
+        for n, decoration in enumerate(self.decorations):
+            sum[n] += delta[n]
+            delta[n] = 0
+
+            value = math.prod([sum[b] for b in self.branches[n]]) if decoration == letter.value else 0
+
+            if not letter:
+                sum[n]  -= value
+            else:
+                delta[n] = value
+
+
+    def state(self):
+        return self.sum + self.delta
+
+
+    def restore(self, state):
+        n = len(self.sum)
+        self.sum , self.delta = list(state[:n]) , list(state[n:])
+
+
+    def braid_ids(self, ids, signs, alphabet=None, record=None):
+        """braid_ids evaluates the counter across parallel arrays of generators and signs (alphabet is not needed)
+           If record is a list, the total after each letter is appended to it (braiding values of all prefixes).
+        """
+        sum , delta , branches = self.sum , self.delta , self.branches
+
+        where = dict()                                     # generator -> vertices decorated by it
+        for n, decoration in enumerate(self.decorations):
+            where.setdefault(decoration, []).append(n)
+
+        pending = [n for n in range(len(sum)) if delta[n]]
+
+        for letter, sign in zip(ids, signs):
+            for n in pending:
+                sum[n] += delta[n]
+                delta[n] = 0
+            pending = ()
+
+            if letter in where:
+                if sign > 0:
+                    for n in where[letter]:
+                        delta[n] = math.prod([sum[b] for b in branches[n]])
+                    pending = where[letter]
+                else:
+                    for n in where[letter]:
+                        sum[n]  -= math.prod([sum[b] for b in branches[n]])
+
+            if record is not None:
+                record.append(sum[-1] + delta[-1])
+
+
+    def __len__(self):
+        """len is the number of vertices of the symbol"""
+        return len(self.sum)
+
+
+
+def braid(symbol, word, signs=None):
+    """Braiding of a symbol (or linear word) with integer generators on a signed word
+
+       Arguments:
+       ----------
+        symbol : tuple (decoration, *subsymbols), or word (tuple of generators)
+        word   : CompactWord (e.g. from Alphabet.word), SignedWord whose letters are generators, or array of generators
+        signs  : array of ±1  [all 1]
+           signs of the letters when word is an array of generators
+
+       Result:
+       -------
+        integer
+    """
+    counter = CountInt(symbol)
+
+    if isinstance(word, (CompactWord, SignedWord)):
+        counter.braid(word)
+    else:
+        counter.braid_ids(word, signs if signs is not None else [1] * len(word))
+
+    return counter.total
+
+#######################################################################
+#######################################################################
@@ -5,6 +5,7 @@
 #
 # Included functions:
 #   gen_LS( word )
+#   factorLS( word )
 #
 #   bracketStd(  LS-word )
 #   bracketLeft( LS-word )
@@ -12,14 +13,17 @@
 #   bracketCfg(  LS-word )
 #   bracketChib( LS-word )
 #
-#   symbolsStar( LS-word )
+#   symbolStar( LS-word )
+#   leftStar( LS-word )
 #
 # See docstrings for more information on use
 #
 ##################################################################
 
 
-import math   # Duval's algorithm genLS_old() uses math.ceil()
+import math   # Duval's algorithm genLS_old() uses math.ceil(), leftStar() uses math.factorial()
+
+from coLie import EilTree, LieTree
 
 #######################################################################
 #######################################################################
@@ -75,6 +79,9 @@ def genLS_all(word, t=1, p=1, N=None, K=None, root=True, LSWord=None):
         N = len(word)
         if N < 2:
             yield word
+            return
+        if len(set(word)) < 2:    # powers of a single letter are not Lyndon words
+            return
         
         LSWord = [0] * (N + 1)    # Cattell's algorithm uses 1-indexing... ugh
         word   = sorted(list(set(word)))  # later iterations need alphabet
@@ -174,6 +181,12 @@ class ValuedLList:
             return self._nodes[n]._next.index
         return -1
     
+def _join(alphabet, LSWord):
+    """Spell out a word of letter indices (as a string of letters, or a tuple of integer generators)"""
+    if isinstance(alphabet[0], str):
+        return ''.join(alphabet[num] for num in LSWord[1:])
+    return tuple(alphabet[num] for num in LSWord[1:])
+
 ###########################################################
 # TODO:  allow alphabet with multiplicity to be specified in other ways
 #
@@ -188,11 +201,17 @@ def genLS(word, t=2, p=1, s=2, N=None, K=None, root=True, LSWord=None, count=Non
        
        Example: genLS("aaabbc") will generate all LS words with 3x 'a', 2x 'b', and 1x 'c'
         --> 'ababac', 'aacbab', 'aacabb', 'aabcab', 'aabbac', 'aabacb', 'aababc', 'aaacbb', 'aaabcb', 'aaabbc'
+        
+       Integer generators (see intAlphabet) are graded by a tuple of ids, and words are generated as tuples:
+        genLS((0,0,1)) --> (0, 0, 1)
     """
     if root:
         N = len(word)
         if N < 2:
             yield word
+            return
+        if len(set(word)) < 2:    # powers of a single letter are not Lyndon words
+            return
         
         tmp    = sorted(list(set(word)))
         count  = ValuedLList([word.count(letter) for letter in tmp])
@@ -206,9 +225,9 @@ def genLS(word, t=2, p=1, s=2, N=None, K=None, root=True, LSWord=None, count=Non
         
     if count.mult(-1) == N-t+1:
         if count.mult(-1) == tmp[t-p] and N == p:
-            yield(''.join(word[num] for num in LSWord[1:]))
+            yield(_join(word, LSWord))
         elif count.mult(-1) > tmp[t-p]:
-            yield(''.join(word[num] for num in LSWord[1:]))
+            yield(_join(word, LSWord))
             
     elif count.mult(0) != N-t+1:
         j = count.head.index
@@ -234,6 +253,36 @@ def genLS(word, t=2, p=1, s=2, N=None, K=None, root=True, LSWord=None, count=Non
 
 
 
+#######################################################
+#######################################################
+#  Every word factors uniquely as a product of nonincreasing Lyndon words
+#   (Chen-Fox-Lyndon).  Duval's algorithm finds the factors in linear time.
+###########################################################
+def factorLS(word):
+    """Factor a word into a nonincreasing product of Lyndon(-Shirshov) words, using Duval's algorithm (1983)
+    
+       Example: factorLS("abbaabab") --> ['abb', 'aabab']
+    """
+    factors = []
+    i , N = 0 , len(word)
+    
+    while i < N:
+        j , k = i+1 , i                 # word[i:j] is a power of a Lyndon word (of length j-k) and a prefix
+        while j < N and word[k] <= word[j]:
+            if word[k] < word[j]:       #  the prefix extends to a longer Lyndon word
+                k = i
+            else:                       #  the prefix continues the periodic pattern
+                k += 1
+            j += 1
+            
+        while i <= k:                   # output the copies of the Lyndon word
+            factors.append(word[i:i+j-k])
+            i += j-k
+            
+    return factors
+
+
+
 #######################################################
 #######################################################
 #  Lyndon words are minimal in their cyclic ordering class
@@ -268,7 +317,7 @@ def genDL():
 #   Outside->in (recursive): finding outer-most bracket first
 #                                (look for largest Lyndon suffix)
 #
-#  ... the code below is outside-in... this looks unnecessarily complex??? oh well.
+#  ... the code below is outside-in.
 ###########################################################
 def bracketStd(word):
     """Convert Lyndon word to standard Lie bracketing.
@@ -277,44 +326,8 @@ def bracketStd(word):
     if len(word) == 1:
         return LieTree(word)
     
-    end = len(word)-1
-    newprefix , myprefix = 1 , 0     # number of times initial letter is repeated
-    split = end
-    
-    repeat = True
-    
-    for j in range(end-1, 0, -1):
-        if repeat:                     # if current word is repeating suffix
-            if word[j] == word[end]:   # if repeat continues
-                end -= 1               #   move repeat pointer 
-            else:
-                repeat = False         # no longer repeating suffix
-                end = len(word) - 1    #   reset repeat pointer
-                
-        if word[j] < word[split]:       # found new low -- better suffix start!
-            newprefix , myprefix = 1 , 1
-            split = j
-            repeat = True               # start checking for repeats again
-            
-        elif word[j] > word[split]:     # not a possible Lyndon suffix start!
-            myprefix = 0                # reset repeats to 0
-            
-        else:                        # possible cutpoint! (word[j] == word[split])
-            myprefix += 1            #  count # repeating letters at cutpoint
-                
-            if not repeat:
-                if myprefix == newprefix: # compare new cutpoint to old cutpoint
-                    i = 1
-                    while split+i < len(word) and word[j+i] == word[split+i]:
-                        i += 1
-                    if split+i < len(word) and word[j+i] < word[split+i]:
-                        split  = j
-                        repeat = True
-                elif myprefix > newprefix: # found longer prefix -- new cutpoint
-                    newprefix = myprefix
-                    split = j
-                    repeat = True                             
-                
+    # the maximal proper Lyndon suffix is the lexicographically smallest proper suffix
+    split = min(range(1, len(word)), key=lambda j: word[j:])
     
     bracket = LieTree()
     bracket.bracket = [ bracketStd(word[:split]) , bracketStd(word[split:]) ]
@@ -534,6 +547,57 @@ def symbolStar(word):
     
     return symbol
     
+###########################################################
+# The left-greedy bracket and star symbol of a Lyndon word ww..wx both come from the same "ww..wx" split:
+#   bracketLeft(ww..wx) = [ bracketLeft(w) , [ bracketLeft(w) , ... [ bracketLeft(w) , bracketLeft(x) ]...]]
+#   symbolStar(ww..wx)  = symbolStar(x) with m copies of symbolStar(w) attached to its root
+# and their pairing is  m! * <star(w),left(w)>^m * <star(x),left(x)>  (only the m ways of cutting off a w survive).
+# So all three are built in one pass of the split, with one w bracket and one w symbol shared by the repetitions.
+###########################################################
+def leftStar(word):
+    """Left-greedy bracket, star symbol, and their (diagonal) pairing of a Lyndon word in one pass
+       The subbracket and subsymbol of a repeated subword are one object shared by all of its repetitions,
+       so don't modify the results (use copy() first).
+       
+       Arguments:
+       ----------
+        word : string
+           Lyndon word
+           
+       Result:
+       -------
+        (LieTree, EilTree, integer)  -- equal to  (bracketLeft(word), symbolStar(word), symbolStar(word) * bracketLeft(word))
+    """
+    if len(word) <= 1:
+        return LieTree(word), EilTree(word), 1
+    
+    i , j = 0 , 1
+    N = len(word)
+    
+    while j != N-1:       # look for repeated subword in topmost partition  ww..wx  (as in bracketLeft)
+        if word[i] == word[j]:
+            i += 1
+        else:
+            i = 0
+        j += 1
+    
+    k = j - i             # width of subword w
+    n = k * ((N-1)//k)    # the m = n/k copies of w are followed by the suffix word x
+    
+    left , star , pairing = leftStar(word[:k])
+    bracket , root , diagonal = leftStar(word[n:])
+    
+    for _ in range(n//k):                 # bracket w onto the left m times
+        tmp = LieTree()
+        tmp.bracket = [left, bracket]
+        bracket = tmp
+    
+    symbol = EilTree()                    # attach m copies of w to the root of x
+    symbol.decoration = root.decoration
+    symbol.subsymbols = [star] * (n//k) + root.subsymbols
+    
+    return bracket, symbol, math.factorial(n//k) * pairing**(n//k) * diagonal
+    
 #######################################################################
 #######################################################################    
 
@@ -552,23 +616,12 @@ def bracket_to_left(bracket,short=False):
         dictionary { bracket : coefficient }
            
     """
+    from basisCache import grading_basis     # bases are cached (basisCache imports this module)
+    
     if not isinstance(bracket,LieTree):
         bracket = LieTree(bracket)
     
-    result = dict()
-    
-    for word in genLS(bracket.letters()):
-        eil, lie = symbolStar(word) , bracketLeft(word)
-        
-        coeff = (eil * bracket) / (eil * lie)
-        
-        if coeff != 0:
-            if short:
-                result[lie.short] = int(coeff)
-            else: 
-                result[str(lie)] = int(coeff)
-            
-    return result
+    return grading_basis(bracket.letters()).coordinates(bracket, short)
 
 #######################################################################
 #######################################################################  
\ No newline at end of file
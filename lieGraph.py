@@ -0,0 +1,274 @@
+##################################################################
+#
+# Graph coalgebra symbols and the configuration pairing with Lie brackets
+#  © 2024 Benjamin Walter <benjamin.walter@uvi.edu>
+#
+# Included classes:
+#   LieGraph( vertices, edges, coefficient )
+#
+# See docstrings for more information on use
+#
+##################################################################
+
+from coLie import LieTree, EilTree, EilWord
+
+
+#######################################################################
+#######################################################################
+# Sinha-Walter graph coalgebras:  Lie coalgebra elements are vertex-labeled directed graphs, modulo
+#   * arrow reversal:    reversing an edge negates the graph
+#   * Arnold relations:  (a->b)(b->c) + (b->c)(c->a) + (c->a)(a->b) = 0   (all other edges fixed)
+#
+# The configuration pairing of a graph G with a Lie bracket T is a signed count of bijections σ from vertices
+# of G to leaves of T (matching labels) such that each edge a->b is sent to a different bracket of T separating
+# σ(a) and σ(b):  the sign of the edge is +1 if σ(a) is in the left part of its bracket and -1 otherwise.
+#
+# Such a bijection splits the vertices below each bracket along exactly one edge, and the vertices below each
+# part must again span a tree.  So pairings are computed top down on sets of vertices (stored as bitmasks):
+# at a bracket [L,R] holding the vertices S, each edge of S splits it into two components, one of which is
+# sent to L and the other to R.  Pairings of (subbracket, set of vertices) are memoized.
+#######################################################################
+
+class LieGraph():
+    """LieGraph is a directed graph with vertices labeled by letters, as an element of a graph coalgebra
+      LieGraph objects have multiplication overloaded to compute the configuration pairing with Lie brackets
+
+    Parameters
+    ----------
+    vertices    : string or list
+         Labels of the vertices 0, 1, 2, ...
+    edges       : list of pairs (i,j)   (default: [])
+         Arrows i -> j between vertices
+    coefficient : integer               (default: 1)
+
+    Example
+    -------
+    graph = LieGraph("abc", [(0,2), (1,2)])          # the tree (a)(b)c
+    graph * LieTree("[a,[b,c]]")
+    LieGraph.fromsymbol(EilTree("((a)b)a"))
+    graph.reverse(0) , graph.arnold(0, 1)            # equal elements of the graph coalgebra
+
+    Attributes
+    ----------
+    vertices    : list of strings
+    edges       : list of pairs of integers
+    coefficient : integer
+    weight      : integer
+         Number of edges
+
+    Don't change vertices or edges after pairing a graph -- its pairing search is memoized.
+    """
+
+    def __init__(self, vertices, edges=None, coefficient=1):
+        self.vertices    = list(vertices)
+        self.edges       = [tuple(edge) for edge in edges] if edges is not None else []
+        self.coefficient = coefficient
+        self.__search    = None                         # memoized pairing search (made when first needed)
+
+        if any([i == j or not (0 <= i < len(self.vertices) and 0 <= j < len(self.vertices)) for i, j in self.edges]):
+            raise ValueError("Edges must join two different vertices of the graph!")
+
+
+    @classmethod
+    def fromsymbol(cls, symbol):
+        """Tree-shaped graph of a coLie symbol (EilTree, EilWord, or string):  each subsymbol has an arrow to its parent"""
+        if isinstance(symbol, EilWord):
+            word = symbol.value
+            return cls(word, [(n, n+1) for n in range(len(word) - 1)])
+
+        if not isinstance(symbol, EilTree):
+            symbol = EilTree(symbol)
+
+        vertices , edges = [], []
+        def visit(node):
+            vertices.append(node.decoration)
+            n = len(vertices) - 1
+            for subsymbol in node.subsymbols:
+                edges.append((visit(subsymbol), n))
+            return n
+        visit(symbol)
+
+        return cls(vertices, edges)
+
+
+    #########################
+    #
+    # Relations of the graph coalgebra
+    #
+    def reverse(self, k):
+        """The equal graph with edge k reversed (and the coefficient negated)"""
+        edges = list(self.edges)
+        edges[k] = edges[k][::-1]
+        return LieGraph(self.vertices, edges, -self.coefficient)
+
+
+    def arnold(self, k, l):
+        """The two graphs whose sum is minus this graph, by the Arnold relation on edges k and l
+           (which must share exactly one vertex)
+        """
+        (a, b) , (c, d) = self.edges[k], self.edges[l]
+        sign = self.coefficient
+
+        if len({a, b} & {c, d}) != 1:
+            raise ValueError("Arnold relations need two edges sharing exactly one vertex!")
+
+        if b not in (c, d):                      # orient as a->b, b->c
+            a , b , sign = b, a, -sign
+        if d == b:
+            c , d , sign = d, c, -sign
+        c = d
+
+        rest = [edge for n, edge in enumerate(self.edges) if n != k and n != l]
+
+        return [LieGraph(self.vertices, rest + [(b, c), (c, a)], sign),
+                LieGraph(self.vertices, rest + [(c, a), (a, b)], sign)]
+
+
+    def __neg__(self):
+        return LieGraph(self.vertices, self.edges, -self.coefficient)
+
+
+    #########################
+    #
+    # Configuration pairing
+    #
+    def __mul__(self, other):
+        """Multiplication is overloaded to compute the configuration pairing with Lie brackets"""
+        if isinstance(other, LieTree):
+            return self.coefficient * self.__pair(other)
+
+        return NotImplemented
+
+
+    def __call__(self, other):
+        return self * other
+
+
+    def __pair(self, bracket):
+        """pair is used internally to compute the configuration pairing by a memoized search on sets of vertices
+           The search (and its memos) is made once for each graph, and shared by pairings with different brackets.
+        """
+        n = len(self.vertices)
+
+        if len(self.edges) != n - 1 or sorted(self.vertices) != sorted(bracket.letters()):
+            return 0
+
+        if self.__search is None:
+            self.__search = self.__searcher()
+
+        return self.__search(bracket, (1 << n) - 1)
+
+
+    def __searcher(self):
+        """searcher is used internally to make the memoized search function pair(bracket, set of vertices)"""
+        n = len(self.vertices)
+
+        adjacent = [[] for _ in range(n)]                 # vertex -> [(neighbour, edge)]
+        for e, (i, j) in enumerate(self.edges):
+            adjacent[i].append((j, e))
+            adjacent[j].append((i, e))
+
+        masks = dict()                                    # letter -> bitmask of vertices with that label
+        for v, label in enumerate(self.vertices):
+            masks[label] = masks.get(label, 0) | (1 << v)
+
+        contents = dict()
+        def content(mask):                                # multiplicity of each letter in a set of vertices
+            if mask not in contents:
+                contents[mask] = tuple([bin(mask & m).count("1") for m in masks.values()])
+            return contents[mask]
+
+        labels = dict()
+        def bracket_content(node):
+            if node.value not in labels:
+                labels[node.value] = tuple([node.value.count(label) for label in masks])
+            return labels[node.value]
+
+        trees = dict()
+        def splits(mask):
+            """For vertices spanning a tree: the vertices on the tail side of each of its edges (otherwise None)"""
+            if mask in trees:
+                return trees[mask]
+
+            start = (mask & -mask).bit_length() - 1       # depth first search from the first vertex
+            order , parent , seen , stack = [], {start : (None, None)}, 1 << start, [start]
+            while stack:
+                v = stack.pop()
+                order.append(v)
+                for w, e in adjacent[v]:
+                    if mask >> w & 1:
+                        if not seen >> w & 1:
+                            seen |= 1 << w
+                            parent[w] = (v, e)
+                            stack.append(w)
+                        elif parent[v][1] != e:           # an edge outside the search tree closes a cycle
+                            trees[mask] = None
+                            return None
+
+            if seen != mask:                              # not connected
+                trees[mask] = None
+                return None
+
+            below , result = {v : 1 << v for v in order}, []
+            for v in reversed(order):                     # vertices below each vertex of the search tree
+                p , e = parent[v]
+                if p is not None:
+                    below[p] |= below[v]
+                    result.append(below[v] if self.edges[e][0] == v else mask & ~below[v])
+
+            trees[mask] = result
+            return result
+
+        memo = dict()
+        def pair(node, mask):
+            if node.weight == 0:                          # a single vertex with a matching label
+                return int(self.vertices[mask.bit_length() - 1] == node.value)
+
+            key = (node.value, mask)
+            if key in memo:
+                return memo[key]
+
+            left , right = node.left, node.right
+            target , total = bracket_content(left), 0
+
+            for side in splits(mask) or ():               # each edge splits the vertices (tail side first)
+                for part, sign in ((side, 1), (mask & ~side, -1)):    # tail side sent left or right
+                    if content(part) == target:
+                        value = pair(left, part)
+                        if value:
+                            total += sign * value * pair(right, mask & ~part)
+
+            memo[key] = total
+            return total
+
+        return pair
+
+
+    #########################
+    #
+    # Other things
+    #
+    def letters(self):
+        return ''.join(sorted(self.vertices))
+
+
+    @property
+    def weight(self):
+        return len(self.edges)
+
+
+    def __len__(self):
+        """len is the number of vertices"""
+        return len(self.vertices)
+
+
+    def __str__(self):
+        coefficient = "" if self.coefficient == 1 else "-" if self.coefficient == -1 else f'{self.coefficient}*'
+        return coefficient + ' '.join([f'{self.vertices[i]}{i}->{self.vertices[j]}{j}' for i, j in self.edges] or self.vertices)
+
+
+    def __repr__(self):
+        return f'LieGraph({self.vertices}, {self.edges}, {self.coefficient})'
+
+#######################################################################
+#######################################################################
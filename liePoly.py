@@ -0,0 +1,372 @@
+##################################################################
+#
+# Lie polynomials in the standard Lyndon basis of a free Lie algebra
+#  © 2024 Benjamin Walter <benjamin.walter@uvi.edu>
+#
+# Included classes:
+#   LiePolynomial( terms )
+#
+# Included functions:
+#   pbw_expand( words )
+#   pbw_product( word )
+#
+# See docstrings for more information on use
+#
+##################################################################
+
+import heapq         # PBW expansion reduces the smallest remaining word first
+import functools     # brackets of basis elements are memoized
+from fractions import Fraction
+
+from coLie import LieTree
+from lieBasis import bracketStd, factorLS
+from basisCache import grading_basis
+from braiding import lie_expansion
+
+
+#######################################################################
+#######################################################################
+# Normal form rewriting
+#
+# The standard bracketing P_w of Lyndon words w is a basis of the free Lie algebra.  For Lyndon words u < v
+# the word uv is Lyndon, and P_uv = [P_u, P_v] exactly when u is a letter or the right factor u2 of the
+# standard factorization u = u1u2 satisfies u2 >= v.  Otherwise the Jacobi identity
+#     [P_u, P_v] = [[P_u1, P_u2], P_v] = [P_u1, [P_u2, P_v]] - [P_u2, [P_u1, P_v]]
+# rewrites the bracket in terms of brackets which are closer to standard, and antisymmetry handles u > v.
+# Brackets of pairs of Lyndon words are memoized, so each is only rewritten once.
+#######################################################################
+
+@functools.lru_cache(maxsize=None)
+def _split(word):
+    """Standard factorization of a Lyndon word (its right factor is the smallest proper suffix)"""
+    split = min(range(1, len(word)), key=lambda j: word[j:])
+    return word[:split], word[split:]
+
+
+
+@functools.lru_cache(maxsize=None)
+def _bracket(u, v):
+    """Bracket [P_u, P_v] of basis elements as a dictionary {Lyndon word : coefficient} (don't modify it!)"""
+    if u == v:
+        return {}
+
+    if u > v:
+        return {w : -c for w, c in _bracket(v, u).items()}
+
+    if len(u) == 1 or _split(u)[1] >= v:
+        return {u + v : 1}
+
+    u1 , u2 = _split(u)
+    result = dict()
+
+    for w, c in _bracket(u2, v).items():             # [P_u1, [P_u2, P_v]]
+        for x, d in _bracket(u1, w).items():
+            result[x] = result.get(x, 0) + c * d
+
+    for w, c in _bracket(u1, v).items():             # - [P_u2, [P_u1, P_v]]
+        for x, d in _bracket(u2, w).items():
+            result[x] = result.get(x, 0) - c * d
+
+    return {w : c for w, c in result.items() if c != 0}
+
+
+
+#######################################################################
+#######################################################################
+
+class LiePolynomial():
+    """LiePolynomial is an element of a free Lie algebra written in the standard Lyndon basis
+
+    Parameters
+    ----------
+    terms : dictionary, string, LieTree, or LiePolynomial   (default: zero)
+         A dictionary { Lyndon word : coefficient } gives coefficients of standard brackets.
+         A Lie bracket expression (string or LieTree) is rewritten into the Lyndon basis.
+
+    Example
+    -------
+    x = LiePolynomial("[a,b]")
+    y = LiePolynomial("[[a,c],b]") + 2 * LiePolynomial("c")
+    x * y                                 # Lie bracket
+    (x * y).brackets()
+
+    Attributes
+    ----------
+    terms  : dictionary
+         Nonzero coefficients (integers or Fractions) keyed by Lyndon words
+    """
+
+    def __init__(self, terms=None):
+        if terms is None:
+            self.terms = dict()
+
+        elif isinstance(terms, LiePolynomial):
+            self.terms = dict(terms.terms)
+
+        elif isinstance(terms, dict):
+            self.terms = {word : c for word, c in terms.items() if c != 0}
+
+        else:
+            if not isinstance(terms, LieTree):
+                terms = LieTree(terms)
+            self.terms = LiePolynomial.__normal(terms).terms
+
+
+    @staticmethod
+    def __normal(bracket):
+        """normal is used internally to rewrite a LieTree in the Lyndon basis"""
+        if bracket.weight == 0:
+            return LiePolynomial({bracket.value : 1})
+        return LiePolynomial.__normal(bracket.left).bracket(LiePolynomial.__normal(bracket.right))
+
+
+    def bracket(self, other):
+        """Lie bracket [self, other]"""
+        if not isinstance(other, LiePolynomial):
+            other = LiePolynomial(other)
+
+        result = dict()
+        for u, c in self.terms.items():
+            for v, d in other.terms.items():
+                for w, k in _bracket(u, v).items():
+                    result[w] = result.get(w, 0) + c * d * k
+
+        return LiePolynomial(result)
+
+
+    #########################
+    #
+    # Arithmetic
+    #
+    def __add__(self, other):
+        if not isinstance(other, LiePolynomial):
+            return NotImplemented
+
+        result = dict(self.terms)
+        for w, c in other.terms.items():
+            result[w] = result.get(w, 0) + c
+
+        return LiePolynomial(result)
+
+
+    def __neg__(self):
+        return LiePolynomial({w : -c for w, c in self.terms.items()})
+
+
+    def __sub__(self, other):
+        if not isinstance(other, LiePolynomial):
+            return NotImplemented
+        return self + (-other)
+
+
+    def __mul__(self, other):
+        """Overload multiplication to be Lie bracket (or scaling by a number)"""
+        if isinstance(other, (LiePolynomial, LieTree)):
+            return self.bracket(other)
+
+        if isinstance(other, (int, Fraction)):
+            return LiePolynomial({w : c * other for w, c in self.terms.items()})
+
+        return NotImplemented
+
+
+    def __rmul__(self, other):
+        if isinstance(other, LieTree):
+            return LiePolynomial(other).bracket(self)
+
+        if isinstance(other, (int, Fraction)):
+            return self * other
+
+        return NotImplemented
+
+
+    def __truediv__(self, other):
+        if isinstance(other, (int, Fraction)):
+            return LiePolynomial({w : Fraction(c) / other for w, c in self.terms.items()})
+        return NotImplemented
+
+
+    def __eq__(self, other):
+        if not isinstance(other, LiePolynomial):
+            return NotImplemented
+        return self.terms == other.terms
+
+
+    def __bool__(self):
+        return bool(self.terms)
+
+
+    #########################
+    #
+    # Other forms
+    #
+    def brackets(self, short=False):
+        """Dictionary { standard bracket : coefficient }"""
+        return {bracketStd(w).short if short else str(bracketStd(w)) : c for w, c in self.terms.items()}
+
+
+    def left(self, short=False):
+        """Dictionary { left-greedy bracket : coefficient }"""
+        result = dict()
+        for w, c in self.terms.items():
+            for bracket, d in _left(w, short).items():
+                result[bracket] = result.get(bracket, 0) + c * d
+
+        return {bracket : c for bracket, c in result.items() if c != 0}
+
+
+    def expand(self):
+        """Associative polynomial of the Lie element as a dictionary { word : coefficient }"""
+        result = dict()
+        for w, c in self.terms.items():
+            for u, d in _expansion(w).items():
+                result[u] = result.get(u, 0) + c * d
+
+        return {u : c for u, c in result.items() if c != 0}
+
+
+    def letters(self):
+        return ''.join(sorted(set(''.join(self.terms))))
+
+
+    @property
+    def weight(self):
+        """Largest weight (number of brackets) of a term"""
+        return max([len(w) for w in self.terms], default=0) - 1
+
+
+    def __iter__(self):
+        return iter(self.terms.items())
+
+
+    def __len__(self):
+        return len(self.terms)
+
+
+    def __hash__(self):
+        return hash(frozenset(self.terms.items()))
+
+
+    def __str__(self):
+        if not self.terms:
+            return "0"
+
+        string = ""
+        for w in sorted(self.terms, key=lambda w: (len(w), w)):
+            c = self.terms[w]
+            string += (" - " if c < 0 else " + ") if string else ("-" if c < 0 else "")
+            string += ("" if abs(c) == 1 else f'{abs(c)}*') + str(bracketStd(w))
+
+        return string
+
+
+    def __repr__(self):
+        return f'LiePolynomial({self.terms})'
+
+
+
+def _left(word, short):
+    """Standard bracket of a Lyndon word in the left-greedy basis (from the cached bases of its grading)"""
+    basis  = grading_basis(word)
+    matrix = grading_basis(word, "lyndon")
+    j = basis.words.index(word)
+
+    return {LieTree(bracket).short if short else bracket : row[j] for bracket, row in zip(basis.left, matrix) if row[j] != 0}
+
+
+
+@functools.lru_cache(maxsize=1 << 12)
+def _expansion(word):
+    """Associative expansion of the standard bracket of a Lyndon word"""
+    return lie_expansion(bracketStd(word))
+
+
+
+#######################################################################
+#######################################################################
+# PBW expansion
+#
+# Products P_w = P_l1 P_l2 ... P_lk of standard brackets over the Lyndon factorization w = l1 l2 ... lk
+# (l1 >= l2 >= ... >= lk) form a basis of the free associative algebra (Poincaré-Birkhoff-Witt).
+# P_w is w plus a combination of larger words of the same grading, so a polynomial is written in this basis
+# by repeatedly removing its smallest word.
+#######################################################################
+
+@functools.lru_cache(maxsize=1 << 16)
+def pbw_product(word):
+    """Associative expansion of the PBW basis element P_w = P_l1 ... P_lk of a word (a dictionary {word : coefficient})"""
+    if not word:
+        return {"" : 1}
+
+    first = factorLS(word)[0]                   # P_w = P_l1 * P_(l2 ... lk)
+    result = dict()
+    for u, c in _expansion(first).items():
+        for v, d in pbw_product(word[len(first):]).items():
+            result[u+v] = result.get(u+v, 0) + c * d
+
+    return {u : c for u, c in result.items() if c != 0}
+
+
+
+@functools.lru_cache(maxsize=1 << 16)
+def _pbw_word(word):
+    """PBW coordinates of a single word (memoized, don't modify!)"""
+    return _pbw_reduce({word : 1})
+
+
+
+def _pbw_reduce(polynomial):
+    """Triangular reduction of a polynomial (dictionary of words) to PBW coordinates"""
+    polynomial = dict(polynomial)
+    heap   = list(polynomial)
+    heapq.heapify(heap)
+    result = dict()
+
+    while heap:
+        w = heapq.heappop(heap)
+        c = polynomial.pop(w, 0)
+        if c == 0:
+            continue
+
+        result[w] = c
+        for u, d in pbw_product(w).items():
+            if u != w:
+                if u not in polynomial:
+                    heapq.heappush(heap, u)
+                polynomial[u] = polynomial.get(u, 0) - c * d
+
+    return result
+
+
+
+def pbw_expand(words):
+    """Write words, or combinations of words, in the PBW basis of products of standard brackets
+
+       Arguments:
+       ----------
+        words : string, dictionary { word : coefficient }, LiePolynomial, or list of these
+           a list is expanded term by term, sharing the memoized expansions of single words
+
+       Result:
+       -------
+        dictionary { word w : coefficient } where w stands for P_l1 ... P_lk over the Lyndon factorization of w
+        (or a list of these for a list)
+    """
+    if isinstance(words, list):
+        return [pbw_expand(word) for word in words]
+
+    if isinstance(words, str):
+        return dict(_pbw_word(words))
+
+    if isinstance(words, LiePolynomial):                # standard brackets are their own PBW elements
+        return dict(words.terms)
+
+    result = dict()
+    for u, c in words.items():
+        for w, d in _pbw_word(u).items():
+            result[w] = result.get(w, 0) + c * d
+
+    return {w : c for w, c in result.items() if c != 0}
+
+#######################################################################
+#######################################################################
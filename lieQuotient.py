@@ -0,0 +1,385 @@
+##################################################################
+#
+# Quotients of free Lie algebras by relations, using Gröbner-Shirshov bases
+#  © 2024 Benjamin Walter <benjamin.walter@uvi.edu>
+#
+# Included classes:
+#   LieQuotient( relations, generators, degree )
+#
+# See docstrings for more information on use
+#
+##################################################################
+
+import heapq           # the completion works through relations and compositions in order of degree
+from fractions import Fraction
+
+from lieBasis import genLS, factorLS
+from liePoly import LiePolynomial, _split
+
+
+#######################################################################
+#######################################################################
+# Lie polynomials are written in the Lyndon basis of standard brackets P_w (see liePoly).  P_w is w plus larger
+# words, so the most significant word of a Lie polynomial is its longest Lyndon word, and among those the
+# smallest -- this is Shirshov's ordering with the order of letters reversed.
+#
+# Reduction:  if a Lyndon word w contains the leading word u of a relation s, there is a special bracketing
+#     [w]_u = [a [u [c1] ... [ck]] d]        (w = a u c d, with [uc] a subbracket of the standard bracketing of w,
+#                                             and c = c1 ... ck the Lyndon factorization of c)
+# whose most significant word is w.  Putting s in place of [u] gives an element of the ideal which removes w.
+#
+# Completion (Shirshov):  the relations form a Gröbner-Shirshov basis when all compositions of intersection
+#     [uvw]_uv(s1) - [uvw]_vw(s2)        (for leading words uv of s1 and vw of s2)
+# reduce to 0.  Compositions are added in order of degree, stopping at a degree bound.  Then the Lyndon words
+# containing no leading word are a basis of the quotient (up to the bound).
+#
+# Leading words are kept in a prefix trie, and occurrences in a word are found by walking the trie from each
+# position of the word (rather than testing each leading word).  Special bracketings are memoized for each
+# basis element.  When the relations are homogeneous and the quotient is 0 in some degree n, all brackets of
+# degree n (and so all larger degrees) are in the ideal, and the completion stops there.
+#######################################################################
+
+class _Trie():
+    """Prefix trie of leading words (helper class for LieQuotient)"""
+
+    def __init__(self):
+        self.root = dict()
+        self.size = 0
+
+
+    def add(self, word):
+        node = self.root
+        for letter in word:
+            node = node.setdefault(letter, dict())
+        node[None] = word                            # end of a leading word
+        self.size += 1
+
+
+    def remove(self, word):
+        node , path = self.root, []
+        for letter in word:
+            path.append((node, letter))
+            node = node[letter]
+        del node[None]
+        self.size -= 1
+
+        for parent, letter in reversed(path):         # prune empty branches
+            if parent[letter]:
+                break
+            del parent[letter]
+
+
+    def find(self, word):
+        """First occurrence (position, leading word) of a leading word in word (or None)"""
+        for i in range(len(word)):
+            node = self.root
+            for letter in word[i:]:
+                if letter not in node:
+                    break
+                node = node[letter]
+                if None in node:
+                    return i, node[None]
+        return None
+
+
+
+def _key(word):
+    """Significance of Lyndon words (smaller keys are more significant)"""
+    return (-len(word), word)
+
+
+
+def _lead(polynomial):
+    return min(polynomial.terms, key=_key)
+
+
+
+def _scale(terms, c, prime):
+    """Coefficients of terms divided by c (rationals, or integers modulo a prime)"""
+    if prime:
+        inverse = pow(_residue(c, prime), -1, prime)
+        return {w : _residue(d, prime) * inverse % prime for w, d in terms.items() if _residue(d, prime)}
+    c = Fraction(c)
+    return {w : _integer(d / c) for w, d in terms.items() if d}
+
+
+
+def _residue(c, prime):
+    return c % prime if isinstance(c, int) else c.numerator * pow(c.denominator, -1, prime) % prime
+
+
+
+def _integer(c):
+    return int(c) if isinstance(c, int) or c.denominator == 1 else c
+
+
+
+def _standard(word, start=0):
+    """Standard bracketing of a Lyndon word as nested (start, end, left, right) spans"""
+    if len(word) == 1:
+        return (start, start + 1, None, None)
+    left , right = _split(word)
+    return (start, start + len(word), _standard(left, start), _standard(right, start + len(left)))
+
+
+
+class LieQuotient():
+    """LieQuotient is the quotient of a free Lie algebra by the ideal generated by relations
+
+    A Gröbner-Shirshov basis of the ideal is computed (up to a degree bound) when the quotient is made.
+
+    Parameters
+    ----------
+    relations  : list of strings, LieTrees, or LiePolynomials
+         Relations (set equal to 0)
+    generators : string   (default: the letters of the relations)
+    degree     : integer  (default: 12)
+         Degree bound -- compositions of larger degree are not computed, so normal forms and dimensions
+         are only reliable up to this degree
+    characteristic : integer  (default: 0)
+         0 computes over the rationals.  A prime p computes with integers modulo p, which is much faster for
+         large presentations (and gives the same dimensions for all but finitely many primes)
+
+    Example
+    -------
+    Q = LieQuotient(["[a,[a,b]]", "[b,[b,a]]"], "ab", 8)
+    Q.dimensions()                        # [2, 1, 0, 0, 0, 0, 0, 0]   (Heisenberg Lie algebra)
+    Q.normal_form("[[a,b],[a,[a,b]]]")
+    Q.words(2)
+
+    Attributes
+    ----------
+    generators : string
+    degree     : integer
+    characteristic : integer
+    basis      : list of LiePolynomials
+         The (reduced, monic) Gröbner-Shirshov basis, in order of leading words
+    leads      : list of strings
+         Leading words of the basis
+    """
+
+    def __init__(self, relations, generators=None, degree=12, characteristic=0):
+        relations = [r if isinstance(r, LiePolynomial) else LiePolynomial(r) for r in relations]
+
+        self.generators = ''.join(sorted(set(generators if generators is not None else ''.join([r.letters() for r in relations]))))
+        self.degree     = degree
+        self.characteristic = characteristic
+
+        self.__basis    = dict()                     # leading word -> monic Lie polynomial
+        self.__trie     = _Trie()
+        self.__specials = dict()                     # leading word -> { word : special bracketing }
+        self.__vanish   = float("inf")               # degree from which the quotient is 0 (for homogeneous relations)
+
+        self.__complete(relations)
+
+
+    #########################
+    #
+    # Special bracketings and reduction
+    #
+    def __special(self, word, position, lead):
+        """special is used internally to make the element [a s c1 ... ck d] of the ideal whose most significant word is word
+           (for the basis element s with leading word lead at the given position in word), scaled so word has coefficient 1
+        """
+        cache = self.__specials.setdefault(lead, dict())
+        if (word, position) in cache:
+            return cache[(word, position)]
+
+        s = self.__basis[lead]
+        end = position + len(lead)
+
+        def build(span, replace):
+            """Lie polynomial of a span of the standard bracketing, with the subbracket starting at position replaced"""
+            start , stop , left , right = span
+            if span is replace:                          # [u c]  -->  [[ [s, P_c1], P_c2 ], ... ]
+                result = s
+                for factor in factorLS(word[end:stop]):
+                    result = result.bracket(LiePolynomial({factor : 1}))
+                return result
+            if start > position or stop <= position or left is None:
+                return LiePolynomial({word[start:stop] : 1})
+            return build(left, replace).bracket(build(right, replace))
+
+        tree , candidates = _standard(word), []
+        span = tree                                      # subbrackets starting at position and covering the lead
+        while span is not None:
+            start , stop , left , right = span
+            if start == position and stop >= end:
+                candidates.append(span)
+            span = left if left is not None and left[0] <= position < left[1] else right if right is not None and right[0] <= position < right[1] else None
+
+        for replace in reversed(candidates):             # smallest first
+            result = build(replace, replace) if replace is tree else build(tree, replace)
+            if result and _lead(result) == word:
+                result = _scale(result.terms, result.terms[word], self.characteristic)
+                cache[(word, position)] = result
+                return result
+
+        raise ArithmeticError(f'No special bracketing of {word} with {lead} at {position}')
+
+
+    def __reduce(self, polynomial):
+        """reduce is used internally to rewrite a Lie polynomial using only words which contain no leading word"""
+        prime  = self.characteristic
+        terms  = _scale(polynomial.terms, 1, prime) if prime else dict(polynomial.terms)
+        heap   = [_key(w) for w in terms]
+        heapq.heapify(heap)
+        result = dict()
+
+        while heap:
+            _ , w = heapq.heappop(heap)
+            c = terms.pop(w, 0)
+            if c == 0 or len(w) >= self.__vanish:
+                continue
+
+            found = self.__trie.find(w)
+            if found is None:
+                result[w] = c
+                continue
+
+            for u, d in self.__special(w, *found).items():
+                if u != w:
+                    if u not in terms:
+                        heapq.heappush(heap, _key(u))
+                    terms[u] = (terms.get(u, 0) - c * d) % prime if prime else terms.get(u, 0) - c * d
+
+        return LiePolynomial({w : _integer(c) for w, c in result.items()})
+
+
+    #########################
+    #
+    # Completion
+    #
+    def __complete(self, relations):
+        """complete is used internally to make a Gröbner-Shirshov basis by adding compositions (in order of degree)"""
+        pending , count = [], 0
+        for r in relations:
+            if r:
+                heapq.heappush(pending, (len(_lead(r)), count, r))
+                count += 1
+
+        homogeneous , checked = all([len({len(w) for w in r.terms}) <= 1 for r in relations]), 0
+
+        while pending:
+            n , _ , f = heapq.heappop(pending)
+
+            if homogeneous and n > checked + 1:               # degrees below n are complete
+                for m in range(checked + 1, n):
+                    if not any(self.is_normal(w) for w in _lyndon(self.generators, m)):
+                        self.__vanish = m
+                        break
+                checked = n - 1
+                if self.__vanish <= checked:
+                    break
+
+            r = self.__reduce(f)
+            if not r:
+                continue
+
+            lead = _lead(r)
+            r    = LiePolynomial(_scale(r.terms, r.terms[lead], self.characteristic))
+            if len(lead) > self.degree:
+                continue
+
+            for old in [u for u in self.__basis if lead in u]:     # basis elements which are now reducible
+                heapq.heappush(pending, (len(old), count, self.__basis.pop(old)))
+                count += 1
+                self.__trie.remove(old)
+                self.__specials.pop(old, None)
+
+            self.__basis[lead] = r
+            self.__trie.add(lead)
+
+            for other in list(self.__basis):                      # compositions of intersection
+                for u, v in ((lead, other), (other, lead)):
+                    for k in range(1, min(len(u), len(v))):
+                        if u[-k:] == v[:k] and len(u) + len(v) - k <= self.degree:
+                            w = u + v[k:]
+                            composition = (LiePolynomial(self.__special(w, 0, u)) -
+                                           LiePolynomial(self.__special(w, len(u) - k, v)))
+                            if composition:
+                                heapq.heappush(pending, (len(_lead(composition)), count, composition))
+                                count += 1
+
+        for lead in sorted(self.__basis, key=_key, reverse=True):  # reduce the tails of the basis
+            s = self.__basis[lead]
+            tail = self.__reduce(LiePolynomial({w : c for w, c in s.terms.items() if w != lead}))
+            self.__basis[lead] = tail + LiePolynomial({lead : 1})
+            self.__specials.pop(lead, None)
+
+
+    #########################
+    #
+    # Using the quotient
+    #
+    @property
+    def basis(self):
+        return [self.__basis[lead] for lead in self.leads]
+
+
+    @property
+    def leads(self):
+        return sorted(self.__basis, key=lambda w: (len(w), w))
+
+
+    def normal_form(self, polynomial):
+        """Normal form of a Lie polynomial (string, LieTree or LiePolynomial) in the quotient:
+           a combination of standard brackets of Lyndon words containing no leading word
+        """
+        if not isinstance(polynomial, LiePolynomial):
+            polynomial = LiePolynomial(polynomial)
+        return self.__reduce(polynomial)
+
+
+    def is_zero(self, polynomial):
+        """Test whether a Lie polynomial lies in the ideal of relations"""
+        return not self.normal_form(polynomial)
+
+
+    def is_normal(self, word):
+        """Test whether a Lyndon word contains no leading word (so its standard bracket is a basis element of the quotient)"""
+        return len(word) < self.__vanish and self.__trie.find(word) is None
+
+
+    def words(self, n):
+        """Lyndon words of the quotient basis of degree n (or of a grading given as a string such as "aabbc")"""
+        if isinstance(n, str):
+            return [w for w in genLS(n) if self.is_normal(w)]
+        return [w for w in _lyndon(self.generators, n) if self.is_normal(w)]
+
+
+    def dimensions(self, n=None):
+        """Dimensions of the quotient in degrees 1, 2, ..., n  (default: the degree bound)"""
+        n = self.degree if n is None else n
+        counts = [0] * n
+        for w in _lyndon(self.generators, n, all=True):
+            if self.is_normal(w):
+                counts[len(w) - 1] += 1
+        return counts
+
+
+    def __len__(self):
+        return len(self.__basis)
+
+
+    def __repr__(self):
+        return f'LieQuotient on {self.generators} with {len(self)} Gröbner-Shirshov relations up to degree {self.degree}'
+
+
+
+def _lyndon(alphabet, n, all=False):
+    """Lyndon words of length n in the letters of alphabet (or of length at most n, if all), by Duval's algorithm"""
+    if not alphabet:
+        return
+    word = [alphabet[0]]
+    while word:
+        if len(word) == n or (all and len(word) <= n):
+            yield ''.join(word)
+        word = (word * (n // len(word) + 1))[:n]
+        while word and word[-1] == alphabet[-1]:
+            word.pop()
+        if word:
+            word[-1] = alphabet[alphabet.index(word[-1]) + 1]
+
+#######################################################################
+#######################################################################
@@ -0,0 +1,408 @@
+##################################################################
+#
+# Free nilpotent groups in Mal'cev coordinates (Deep Thought polynomials)
+#  © 2024 Benjamin Walter <benjamin.walter@uvi.edu>
+#
+# Included classes:
+#   NilpotentElement( coordinates, generators, c )
+#
+# Included functions:
+#   nilpotent_basis( generators, c )
+#
+# See docstrings for more information on use
+#
+##################################################################
+
+import math
+import itertools
+import functools     # collection polynomials are computed once for each set of generators and class
+from fractions import Fraction
+
+from coLie import SignedWord, CompactWord
+from lieBasis import genLS, bracketStd
+from liePoly import _split
+from braiding import CountForest, lie_expansion, _chain
+
+
+#######################################################################
+#######################################################################
+# Mal'cev coordinates
+#
+# The free nilpotent group N of class c has a Mal'cev basis of basic commutators indexed by Lyndon words of
+# length at most c (ordered by length, then alphabetically):  x_a = a for letters, and x_w = [x_u, x_v]
+# = x_u^-1 x_v^-1 x_u x_v for the standard factorization w = uv.  Every element of N is uniquely
+#     x_w1^e1 x_w2^e2 ... x_wm^em        with integer coordinates e1, ..., em.
+#
+# Magnus expansion:  sending a to 1 + a embeds N in noncommuting power series truncated at degree c.  The
+# expansion of x_w is 1 + P_w + (higher terms), where P_w = w + larger words is the standard bracket, and
+# powers are  T^e = sum of binomial(e,k) (T - 1)^k.  So the coordinates of a series are found weight by weight:
+# the lowest terms of the series are a combination of the P_w (solved in the Lyndon basis), and these factors
+# are divided off before going on.
+#
+# Deep Thought:  the coordinates of a product gh are polynomials  z_i = x_i + y_i + q_i(x_1..x_i-1, y_1..y_i-1)
+# in the coordinates of g and h, and those of a power g^n are polynomials in the coordinates of g and n.  These
+# are found once (for each set of generators and class) by running the Magnus computation with polynomial
+# coefficients, so multiplying elements afterwards is only evaluating integer valued polynomials -- the cost
+# does not depend on the lengths of any words.
+#######################################################################
+
+class _Polynomial():
+    """Polynomial with rational coefficients in numbered variables (helper class for the collection polynomials)
+       Monomials are sorted tuples of variable numbers (with repeats for powers).
+    """
+
+    __slots__ = ("terms",)
+
+    def __init__(self, terms):
+        self.terms = terms
+
+    @staticmethod
+    def variable(i):
+        return _Polynomial({(i,) : 1})
+
+    @staticmethod
+    def constant(c):
+        return _Polynomial({() : c} if c else {})
+
+    def __add__(self, other):
+        other  = other if isinstance(other, _Polynomial) else _Polynomial.constant(other)
+        result = dict(self.terms)
+        for m, c in other.terms.items():
+            result[m] = result.get(m, 0) + c
+        return _Polynomial({m : c for m, c in result.items() if c != 0})
+
+    __radd__ = __add__
+
+    def __neg__(self):
+        return _Polynomial({m : -c for m, c in self.terms.items()})
+
+    def __sub__(self, other):
+        return self + (-other)
+
+    def __rsub__(self, other):
+        return (-self) + other
+
+    def __mul__(self, other):
+        if not isinstance(other, _Polynomial):
+            return _Polynomial({m : c * other for m, c in self.terms.items()} if other else {})
+        result = dict()
+        for m, c in self.terms.items():
+            for n, d in other.terms.items():
+                mn = tuple(sorted(m + n))
+                result[mn] = result.get(mn, 0) + c * d
+        return _Polynomial({m : c for m, c in result.items() if c != 0})
+
+    __rmul__ = __mul__
+
+    def __bool__(self):
+        return bool(self.terms)
+
+
+
+def _binomial(e, k):
+    """binomial(e, k) for an integer or a _Polynomial e"""
+    result = 1
+    for i in range(k):
+        result = result * (e - i)
+    return result // math.factorial(k) if isinstance(result, int) else result * Fraction(1, math.factorial(k))
+
+
+
+def _product(A, B, c):
+    """Product of series (dictionaries { word : coefficient }) truncated at degree c"""
+    result = dict()
+    for u, a in A.items():
+        for v, b in B.items():
+            if len(u) + len(v) <= c:
+                result[u+v] = result.get(u+v, 0) + a * b
+    return {w : a for w, a in result.items() if a}
+
+
+
+def nilpotent_basis(generators, c):
+    """Lyndon words indexing the Mal'cev basis of the free nilpotent group of class c, ordered by length then alphabetically
+
+       Arguments:
+       ----------
+        generators : string
+        c          : integer
+
+       Result:
+       -------
+        list of Lyndon words (made by genLS for each grading)
+    """
+    generators = ''.join(sorted(set(generators)))
+    basis = []
+    for n in range(1, c+1):
+        basis += sorted([w for grading in itertools.combinations_with_replacement(generators, n)
+                           for w in genLS(''.join(grading))])
+    return basis
+
+
+
+class _Collector():
+    """Mal'cev basis data and Deep Thought polynomials for the free nilpotent group on generators of class c
+       (helper class for NilpotentElement -- get these from _collector, which makes each only once)
+    """
+
+    def __init__(self, generators, c):
+        self.generators , self.c = generators, c
+        self.basis = nilpotent_basis(generators, c)
+        self.index = {w : i for i, w in enumerate(self.basis)}
+
+        commutators = dict()                              # Magnus expansions of basic commutators
+        for w in self.basis:
+            if len(w) == 1:
+                commutators[w] = ({"" : 1, w : 1}, {"" : 1, w : -1}, w)
+                for k in range(2, c+1):
+                    commutators[w][1][w * k] = (-1) ** k
+            else:
+                u , v = _split(w)
+                (U, Ui, _), (V, Vi, _) = commutators[u], commutators[v]
+                T  = _product(_product(_product(Ui, Vi, c), U, c), V, c)
+                Ti = _product(_product(_product(Vi, Ui, c), V, c), U, c)
+                commutators[w] = (T, Ti, f'[{commutators[u][2]},{commutators[v][2]}]')
+
+        self.powers = dict()                              # (T_w - 1)^k for k = 1, ..., c / |w|
+        for w in self.basis:
+            D = {u : a for u, a in commutators[w][0].items() if u}
+            self.powers[w] = [D]
+            for _ in range(c // len(w) - 1):
+                self.powers[w].append(_product(self.powers[w][-1], D, c))
+
+        self.expansions = {w : lie_expansion(bracketStd(w)) for w in self.basis}
+        self.names      = {w : commutators[w][2] for w in self.basis}
+
+        m = len(self.basis)
+        x , y , n = ([_Polynomial.variable(i) for i in range(m)], [_Polynomial.variable(m + i) for i in range(m)],
+                     _Polynomial.variable(m))
+
+        G = self.series(x)
+        self.multiply = [_compile(z) for z in self.coordinates(_product(G, self.series(y), c))]
+
+        power , D = {"" : 1}, {u : a for u, a in G.items() if u}          # G^n = sum of binomial(n,k) (G - 1)^k
+        Dk = {"" : 1}
+        for k in range(1, c+1):
+            Dk = _product(Dk, D, c)
+            for u, a in Dk.items():
+                power[u] = power.get(u, 0) + _binomial(n, k) * a
+        self.power = [_compile(z) for z in self.coordinates(power)]
+
+
+    def factor(self, w, e):
+        """Magnus expansion of x_w^e  (e an integer or a _Polynomial)"""
+        result = {"" : 1}
+        for k, D in enumerate(self.powers[w], 1):
+            b = _binomial(e, k)
+            for u, a in D.items():
+                result[u] = result.get(u, 0) + b * a
+        return {u : a for u, a in result.items() if a}
+
+
+    def series(self, coordinates):
+        """Magnus expansion of x_w1^e1 ... x_wm^em"""
+        result = {"" : 1}
+        for w, e in zip(self.basis, coordinates):
+            if e:
+                result = _product(result, self.factor(w, e), self.c)
+        return result
+
+
+    def coordinates(self, series):
+        """Mal'cev coordinates of a Magnus expansion (peeling off one length of basis words at a time)"""
+        z = [0] * len(self.basis)
+        for n in range(1, self.c + 1):
+            words = [w for w in self.basis if len(w) == n]
+            for w in words:                               # P_w = w + larger words
+                e = series.get(w, 0)
+                for u in words:
+                    if u >= w:
+                        break
+                    if z[self.index[u]]:
+                        e = e - z[self.index[u]] * self.expansions[u].get(w, 0)
+                z[self.index[w]] = e
+            for w in words:                               # divide off x_w^e from the left
+                e = z[self.index[w]]
+                if e:
+                    series = _product(self.factor(w, -e), series, self.c)
+        return z
+
+
+
+def _compile(z):
+    """Integer valued polynomial as (common denominator, [(integer coefficient, monomial)])"""
+    if not isinstance(z, _Polynomial):
+        z = _Polynomial.constant(z)
+    common = math.lcm(*[Fraction(c).denominator for c in z.terms.values()]) if z.terms else 1
+    return common, [(int(c * common), m) for m, c in z.terms.items()]
+
+
+
+def _evaluate(compiled, values):
+    common , terms = compiled
+    total = 0
+    for c, monomial in terms:
+        for i in monomial:
+            c *= values[i]
+            if not c:
+                break
+        total += c
+    return total // common
+
+
+
+@functools.lru_cache(maxsize=None)
+def _collector(generators, c):
+    return _Collector(generators, c)
+
+
+
+class NilpotentElement():
+    """NilpotentElement is an element of the free nilpotent group of class c, in Mal'cev coordinates
+      NilpotentElement objects have multiplication and powers overloaded (using Deep Thought polynomials)
+
+    Parameters
+    ----------
+    coordinates : list of integers
+         Exponents of the basic commutators (in the order of nilpotent_basis)
+    generators  : string
+    c           : integer
+         Nilpotency class
+
+    Example
+    -------
+    g = NilpotentElement.fromword("a-b-ab", 3)            # the commutator [a,b] = a^-1 b^-1 a b
+    h = NilpotentElement.fromword(SignedWord("a^{1000} b^{-3} (ab)^{50}"), 3, "ab")
+    g * h , h ** 5 , h.inverse() , h ** -2
+    h["aab"]                                              # coordinate of [a,[a,b]]  (see nilpotent_basis)
+    NilpotentElement.fromword(h.word(), 3) == h
+
+    Attributes
+    ----------
+    coordinates : tuple of integers
+    generators  : string
+    c           : integer
+    basis       : list of Lyndon words
+         Index of the coordinates
+
+    The collection polynomials of each set of generators and class are made when first needed (this can take
+    a little while for large classes), and shared by all elements.
+    """
+
+    def __init__(self, coordinates, generators, c):
+        self.generators = ''.join(sorted(set(generators)))
+        self.c          = c
+        self.__collector = _collector(self.generators, c)
+        self.coordinates = tuple(coordinates)
+
+        if len(self.coordinates) != len(self.__collector.basis):
+            raise ValueError(f'The free nilpotent group of class {c} on {self.generators} needs {len(self.__collector.basis)} coordinates')
+
+
+    @classmethod
+    def fromword(cls, word, c, generators=None):
+        """Element of a group word (SignedWord, CompactWord, or string), from the braiding values of its Magnus expansion"""
+        if not isinstance(word, (SignedWord, CompactWord)):
+            word = SignedWord(word)
+        generators = ''.join(sorted(set(generators if generators is not None else word.letters())))
+        collector  = _collector(generators, c)
+
+        eils , level = [], [""]                            # all EilWords of length at most c
+        for _ in range(c):
+            level = [eil + letter for eil in level for letter in generators]
+            eils += level
+
+        forest = CountForest([_chain(eil) for eil in eils])
+        forest.braid(word)
+
+        magnus = {"" : 1}
+        magnus.update({eil : value for eil, value in zip(eils, forest.totals) if value != 0})
+        return cls(collector.coordinates(magnus), generators, c)
+
+
+    @classmethod
+    def identity(cls, generators, c):
+        return cls([0] * len(_collector(''.join(sorted(set(generators))), c).basis), generators, c)
+
+
+    @property
+    def basis(self):
+        return self.__collector.basis
+
+
+    #########################
+    #
+    # Group operations
+    #
+    def __mul__(self, other):
+        """Multiplication by evaluating the Deep Thought polynomials"""
+        if not isinstance(other, NilpotentElement):
+            return NotImplemented
+        if (other.generators, other.c) != (self.generators, self.c):
+            raise ValueError("Elements must be in the same free nilpotent group!")
+
+        values = self.coordinates + other.coordinates
+        return NilpotentElement([_evaluate(z, values) for z in self.__collector.multiply], self.generators, self.c)
+
+
+    def __pow__(self, n):
+        """Integer powers by evaluating the Deep Thought polynomials of powers"""
+        if not isinstance(n, int):
+            return NotImplemented
+
+        values = self.coordinates + (n,)
+        return NilpotentElement([_evaluate(z, values) for z in self.__collector.power], self.generators, self.c)
+
+
+    def inverse(self):
+        return self ** -1
+
+
+    def commutator(self, other):
+        """Group commutator  self^-1 other^-1 self other"""
+        return self.inverse() * other.inverse() * self * other
+
+
+    def __eq__(self, other):
+        if not isinstance(other, NilpotentElement):
+            return NotImplemented
+        return (self.generators, self.c, self.coordinates) == (other.generators, other.c, other.coordinates)
+
+
+    def __hash__(self):
+        return hash((self.generators, self.c, self.coordinates))
+
+
+    def __getitem__(self, word):
+        """Coordinate of the basic commutator of a Lyndon word"""
+        return self.coordinates[self.__collector.index[word]]
+
+
+    #########################
+    #
+    # Other forms
+    #
+    def word(self):
+        """SignedWord of the element as a product of powers of basic commutators"""
+        words = dict()
+        for w in self.basis:
+            if len(w) == 1:
+                words[w] = w
+            else:
+                u , v = _split(w)
+                words[w] = f'({words[u]})-({words[v]})-({words[u]})({words[v]})'
+
+        return SignedWord(''.join([f'({words[w]})^{{{e}}}' for w, e in zip(self.basis, self.coordinates) if e]))
+
+
+    def __str__(self):
+        factors = [self.__collector.names[w] + ('' if e == 1 else f'^{{{e}}}')
+                   for w, e in zip(self.basis, self.coordinates) if e]
+        return ' '.join(factors) if factors else "1"
+
+
+    def __repr__(self):
+        return f'NilpotentElement({list(self.coordinates)}, "{self.generators}", {self.c})'
+
+#######################################################################
+#######################################################################
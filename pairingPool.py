@@ -0,0 +1,269 @@
+##################################################################
+#
+# Building pairing matrices with a pool of processes
+#  © 2024 Benjamin Walter <benjamin.walter@uvi.edu>
+#
+# Included classes:
+#   SharedMatrix( rows, columns )
+#
+# Included functions:
+#   pairing_matrix( symbols, brackets )
+#
+# See docstrings for more information on use
+#
+##################################################################
+
+import os      # spill files are written by workers and merged
+import json
+import time    # progress reports include rows per second
+import struct
+import concurrent.futures
+from array import array
+from multiprocessing import shared_memory
+
+from coLie import LieTree, EilTree, EilWord
+from basisStore import GradingFile, _magic
+
+
+#######################################################################
+#######################################################################
+# Rows of a pairing matrix are split into chunks which are computed by worker processes.  Each worker is
+# sent the symbols and brackets once (when it starts), or reads them from a grading file made by basisStore
+# (so only its path is sent), closing the file once its trees are read.  Rows are written straight into shared
+# memory (a dense matrix of 64 bit integers) or into sparse spill files, so results never pass back through the
+# parent.
+#######################################################################
+
+_worker = dict()      # state of a worker process (set by _start)
+
+
+def _start(symbols, brackets, grading_file, columns, shared, shape, spill):
+    """Initialize a worker: read the basis, and attach to the shared output"""
+    if grading_file is not None:
+        with GradingFile(grading_file) as basis:       # read the trees once, then close the file and its map
+            symbols  = [basis.star(i) for i in range(len(basis))]
+            brackets = [basis.left(i) if columns == "left" else basis.lyndon(i) for i in range(len(basis))]
+    else:
+        symbols  = [EilTree(symbol) if "(" in symbol else EilWord(symbol) for symbol in symbols]
+        brackets = [LieTree(bracket) for bracket in brackets]
+
+    _worker.update(symbols=symbols, brackets=brackets, shape=shape, spill=spill)
+
+    if shared is not None:
+        _worker["memory"] = shared_memory.SharedMemory(name=shared)
+        _worker["matrix"] = _worker["memory"].buf.cast('q')
+
+
+def _rows(start, end):
+    """Compute rows start:end of the pairing matrix, returning the number of nonzero entries"""
+    symbols , brackets = _worker["symbols"], _worker["brackets"]
+    columns = len(brackets)
+    nonzero = 0
+
+    if _worker["spill"] is None:
+        matrix = _worker["matrix"]
+        for i in range(start, end):
+            for j in range(columns):
+                value = symbols[i] * brackets[j]
+                matrix[i * columns + j] = value
+                nonzero += value != 0
+        return nonzero
+
+    counts , indices , data = array('q'), array('i'), array('q')
+    for i in range(start, end):
+        for j in range(columns):
+            value = symbols[i] * brackets[j]
+            if value != 0:
+                indices.append(j)
+                data.append(value)
+        counts.append(len(indices))
+
+    with open(f'{_worker["spill"]}.{start}', "wb") as file:
+        for part in (counts, indices, data):
+            file.write(struct.pack("<Q", len(part)) + part.tobytes())
+
+    return len(data)
+
+
+
+class SharedMatrix():
+    """SharedMatrix is a dense matrix of 64 bit integers in shared memory
+
+    Parameters
+    ----------
+    rows , columns : integers
+    name : string  (default: new shared memory)
+         Attach to existing shared memory instead
+
+    Example
+    -------
+    with pairing_matrix(symbols, brackets) as matrix:
+        matrix[2, 3] , matrix.row(2)
+
+    Attributes
+    ----------
+    shape  : (rows, columns)
+    name   : string
+         Name of the shared memory block (other processes can attach to it)
+    values : memoryview
+         Entries in row order
+    """
+
+    def __init__(self, rows, columns, name=None):
+        self.shape  = (rows, columns)
+        self.memory = shared_memory.SharedMemory(name=name, create=name is None, size=max(rows * columns * 8, 8))
+        self.name   = self.memory.name
+        self.values = self.memory.buf.cast('q')
+
+        if name is None:
+            self.values[:] = array('q', bytes(len(self.values) * 8))
+
+
+    def row(self, i):
+        return self.values[i * self.shape[1] : (i+1) * self.shape[1]].tolist()
+
+
+    def __getitem__(self, position):
+        i , j = position
+        return self.values[i * self.shape[1] + j]
+
+
+    def tolist(self):
+        return [self.row(i) for i in range(self.shape[0])]
+
+
+    def close(self, unlink=True):
+        """Release the shared memory (and free it, if unlink)"""
+        self.values.release()
+        self.memory.close()
+        if unlink:
+            self.memory.unlink()
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, *exception):
+        self.close()
+
+
+    def __repr__(self):
+        return f'SharedMatrix {self.shape[0]} x {self.shape[1]} in {self.name}'
+
+
+
+def pairing_matrix(symbols=None, brackets=None, grading_file=None, columns="left",
+                   workers=None, chunk=None, spill=None, progress=None):
+    """Build the matrix of pairings of symbols (rows) with Lie brackets (columns) using a pool of processes
+
+       Arguments:
+       ----------
+        symbols      : list of EilWords, EilTrees, or strings
+        brackets     : list of LieTrees or strings
+        grading_file : string  [None]
+           Instead of symbols and brackets, pair the star symbols of a file made by basisStore.write_grading
+           with its brackets.  Only the path is sent to workers, which read their trees from the file.
+        columns      : string  ["left"]
+           Brackets of the grading file to use ("left" or "lyndon")
+        workers      : integer  [number of processors]
+        chunk        : integer  [rows / (4 * workers)]
+           Number of rows computed by a worker at a time
+        spill        : string  [None]
+           Write the matrix sparsely to this file (readable by basisStore.GradingFile as matrix "pairing")
+           rather than to shared memory
+        progress     : function  [None]
+           Called after each chunk with a dictionary of rows done, total rows, and rows per second
+
+       Result:
+       -------
+        SharedMatrix, or GradingFile of the spill file (use .matrix("pairing")) -- close it when done
+    """
+    if grading_file is not None:
+        with GradingFile(grading_file) as basis:
+            rows = cols = len(basis)
+        symbols = brackets = None
+    else:
+        symbols  = [str(symbol) for symbol in symbols]
+        brackets = [str(bracket) for bracket in brackets]
+        rows , cols = len(symbols), len(brackets)
+
+    workers = workers or os.cpu_count() or 1
+    chunk   = chunk or max(1, rows // (4 * workers))
+
+    matrix = None if spill is not None else SharedMatrix(rows, cols)
+    shared = None if matrix is None else matrix.name
+
+    done , nonzero , began = 0, 0, time.time()
+    arguments = (symbols, brackets, grading_file, columns, shared, (rows, cols), spill)
+
+    try:
+        with concurrent.futures.ProcessPoolExecutor(workers, initializer=_start, initargs=arguments) as pool:
+            jobs = {pool.submit(_rows, start, min(start + chunk, rows)) : min(chunk, rows - start) for start in range(0, rows, chunk)}
+
+            for job in concurrent.futures.as_completed(jobs):
+                nonzero += job.result()
+                done    += jobs[job]
+                if progress is not None:
+                    elapsed = time.time() - began
+                    progress({"rows" : done, "total" : rows, "nonzero" : nonzero,
+                              "rows per second" : done / elapsed if elapsed > 0 else 0.0})
+    except BaseException:
+        if matrix is not None:
+            matrix.close()
+        raise
+
+    if matrix is not None:
+        return matrix
+
+    _merge(spill, rows, cols, chunk)
+    return GradingFile(spill)
+
+
+
+def _part(path):
+    """Read the arrays (row counts, column indices, values) of a spill file written by a worker"""
+    arrays = [array('q'), array('i'), array('q')]
+    with open(path, "rb") as file:
+        for part in arrays:
+            size , = struct.unpack("<Q", file.read(8))
+            part.frombytes(file.read(size * part.itemsize))
+    return arrays
+
+
+
+def _merge(spill, rows, cols, chunk):
+    """Merge the spill files of workers into one file of a sparse matrix (in the format of basisStore)"""
+    parts = [f'{spill}.{start}' for start in range(0, rows, chunk)]
+
+    indptr , total = array('q', [0]), 0
+    for part in parts:                                 # first pass: row pointers
+        counts = _part(part)[0]
+        indptr.extend([total + count for count in counts])
+        total += counts[-1] if counts else 0
+
+    sections = { "pairing.indptr"  : [0, 'q', len(indptr)],
+                 "pairing.indices" : [len(indptr) * 8, 'i', total],
+                 "pairing.data"    : [len(indptr) * 8 + -(-total * 4 // 8) * 8, 'q', total] }
+    header = json.dumps({ "grading" : "", "alphabet" : "", "count" : rows, "length" : 0, "columns" : cols,
+                          "matrices" : ["pairing"], "sections" : sections }).encode("utf-8")
+    header += b" " * (-len(header) % 8)
+
+    with open(spill + ".tmp", "wb") as out:
+        out.write(_magic + struct.pack("<Q", len(header)) + header + indptr.tobytes())
+
+        for n in (1, 2):                               # second pass: column indices, then values
+            written = 0
+            for part in parts:
+                raw = _part(part)[n].tobytes()
+                out.write(raw)
+                written += len(raw)
+            out.write(b"\0" * (-written % 8))
+
+    os.replace(spill + ".tmp", spill)
+
+    for part in parts:
+        os.remove(part)
+
+#######################################################################
+#######################################################################
@@ -0,0 +1,130 @@
+##################################################################
+#
+# Normal forms of coLie symbols in the star basis or in Lyndon EilWords
+#  © 2024 Benjamin Walter <benjamin.walter@uvi.edu>
+#
+# Included functions:
+#   symbol_to_basis( symbol, basis )
+#   symbols_to_basis( symbols, basis )
+#
+# See docstrings for more information on use
+#
+##################################################################
+
+from fractions import Fraction
+
+from coLie import EilTree, EilWord
+from basisCache import grading_basis, store
+from braiding import eil_expansion, lie_expansion
+
+
+#######################################################################
+#######################################################################
+# Rewriting symbols
+#
+# Arnold relations move the branches of a symbol onto a line:  a vertex with several branches is the sum of
+# the shuffles of its branches (followed by its decoration), so every symbol is a combination of EilWords
+# (eil_expansion with top=True).  The remaining relations between EilWords are shuffles -- together with
+# antisymmetry these span all relations -- and modulo shuffles the Lyndon EilWords are a basis.
+#
+# The EilWord w pairs with a Lie bracket as the coefficient of w in its expansion.  So the Lyndon form of a
+# symbol is found from its pairings with the standard brackets P_u = u + larger words, which are triangular:
+#     c_u = < s , P_u > - sum over Lyndon w > u of c_w < w , P_u >        (largest words first)
+# and its star form from its pairings with the dual left-greedy brackets:  a_w = < s , left_w > / diagonal_w.
+#
+# The expansions of the brackets of a grading are computed once and kept in the basis cache, as are the normal
+# forms of symbols (keyed by their normalized value, so symbols differing by the order of branches share them).
+#######################################################################
+
+def symbol_to_basis(symbol, basis="star"):
+    """Rewrite a coLie symbol in a basis (modulo antisymmetry and Arnold relations)
+
+       Arguments:
+       ----------
+        symbol : EilTree, EilWord, or string
+           Strings with parentheses are read as EilTrees, other strings as EilWords
+        basis  : string  ["star"]
+           "star"  -- star symbols (symbolStar) of Lyndon words, dual to the left-greedy brackets
+           "words" -- Lyndon EilWords (so tree symbols can use the braiding of linear symbols)
+
+       Result:
+       -------
+        dictionary { star symbol or Lyndon word : coefficient }  (coefficients are integers, or Fractions
+        in the star basis)
+
+       Example:
+       --------
+        symbol_to_basis("((a)b)(b)a")                  # { '((a)(a)b)b' : 1 }
+        symbol_to_basis("(b)(b)a", "words")            # { 'abb' : 2 }
+    """
+    return symbols_to_basis([symbol], basis)[0]
+
+
+
+def symbols_to_basis(symbols, basis="star"):
+    """Rewrite many coLie symbols in a basis (see symbol_to_basis)
+       The bracket expansions of each grading are only computed once.
+    """
+    if basis not in ("star", "words"):
+        raise ValueError(f'Unknown basis {basis}')
+
+    results = []
+    for symbol in symbols:
+        symbol  = _symbol(symbol)
+        key     = symbol.normalValue if isinstance(symbol, EilTree) else symbol.value
+        grading = ''.join(sorted([letter for letter in key if letter.isalpha()]))
+
+        results.append(store.get((grading, "normal form", basis, key), lambda: _rewrite(symbol, grading, basis)))
+
+    return results
+
+
+
+def _symbol(symbol):
+    if isinstance(symbol, (EilTree, EilWord)):
+        return symbol
+    return EilTree(symbol) if "(" in symbol else EilWord(symbol)
+
+
+
+def _rewrite(symbol, grading, basis):
+    """Normal form of one symbol (see symbols_to_basis)"""
+    expansion = eil_expansion(symbol, top=True)
+
+    def pair(bracket):                                  # < symbol , bracket > from the bracket's expansion
+        small , large = (expansion, bracket) if len(expansion) <= len(bracket) else (bracket, expansion)
+        return sum([c * large.get(w, 0) for w, c in small.items()])
+
+    if basis == "star":
+        result = dict()
+        for symbol, bracket, diagonal in _expansions(grading, "star"):
+            value = pair(bracket)
+            if value != 0:
+                value = Fraction(value, diagonal)
+                result[symbol] = int(value) if value.denominator == 1 else value
+        return result
+
+    result = dict()
+    for word, bracket in _expansions(grading, "words"):  # largest Lyndon words first
+        value = pair(bracket) - sum([c * bracket.get(w, 0) for w, c in result.items()])
+        if value != 0:
+            result[word] = value
+    return result
+
+
+
+def _expansions(grading, basis):
+    """Bracket expansions of a grading:  (star symbol, expansion of left-greedy bracket, diagonal) for "star", and
+       (Lyndon word, expansion of standard bracket) in decreasing order of words for "words"
+    """
+    def compute():
+        bases = grading_basis(grading)
+        if basis == "star":
+            return [(symbol, lie_expansion(bracket), diagonal)
+                    for symbol, bracket, diagonal in zip(bases.star, bases.left, bases.diagonal)]
+        return sorted([(word, lie_expansion(bracket)) for word, bracket in zip(bases.words, bases.lyndon)], reverse=True)
+
+    return store.get((grading, "normal form expansions", basis), compute)
+
+#######################################################################
+#######################################################################